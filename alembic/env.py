@@ -17,6 +17,23 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Postgres-only search objects created by hand in migration 0007
+UNMANAGED_COLUMNS = {("recipes", "search_vector")}
+UNMANAGED_INDEXES = {"ix_recipes_search_vector", "ix_recipes_name_trgm"}
+
+def include_object(object, name, type_, reflected, compare_to):
+    if not reflected or compare_to is not None:
+        return True
+    # Monthly partitions of telemetry_events are managed at runtime by
+    # app.services.telemetry_storage, not by migrations.
+    if type_ == "table":
+        return not (name.startswith("telemetry_events_p") or name == "telemetry_events_default")
+    if type_ == "column":
+        return (object.table.name, name) not in UNMANAGED_COLUMNS
+    if type_ == "index":
+        return name not in UNMANAGED_INDEXES
+    return True
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
@@ -24,6 +41,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -38,7 +56,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
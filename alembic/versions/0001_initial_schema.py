@@ -0,0 +1,136 @@
+"""initial schema
+
+The tables as Base.metadata.create_all() built them before migrations
+existed. Databases created that way should run `alembic stamp 0001`
+once, then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('has_completed_onboarding', sa.Boolean(), nullable=True),
+        sa.Column('goals', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('activity_level', sa.String(), nullable=True),
+        sa.Column('body_weight', sa.Float(), nullable=True),
+        sa.Column('primary_diet_type', sa.String(), nullable=True),
+        sa.Column('food_exclusions', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('budget', sa.String(), nullable=True),
+        sa.Column('meal_layout', sa.String(), nullable=True),
+        sa.Column('preferred_cooking_days', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('typical_prep_time', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'recipes',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('cook_time', sa.Integer(), nullable=False),
+        sa.Column('servings', sa.Integer(), nullable=False),
+        sa.Column('calories', sa.Integer(), nullable=False),
+        sa.Column('ingredients', sa.JSON(), nullable=False),
+        sa.Column('main_ingredients', sa.ARRAY(sa.String()), nullable=False),
+        sa.Column('instructions', sa.JSON(), nullable=False),
+        sa.Column('tags', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('cuisine', sa.String(), nullable=True),
+        sa.Column('prep_complexity', sa.String(), nullable=False),
+        sa.Column('protein', sa.String(), nullable=True),
+        sa.Column('grain', sa.String(), nullable=True),
+        sa.Column('vegetable', sa.String(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        sa.Column('source_url', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recipes_id', 'recipes', ['id'])
+
+    op.create_table(
+        'pantry_items',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('unit', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('storage_location', sa.String(), nullable=False),
+        sa.Column('added_at', sa.DateTime(), nullable=True),
+        sa.Column('purchase_source', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_pantry_items_id', 'pantry_items', ['id'])
+
+    op.create_table(
+        'week_plans',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('week_of', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('shared_ingredients', sa.ARRAY(sa.String()), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_week_plans_id', 'week_plans', ['id'])
+
+    op.create_table(
+        'meal_plans',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('week_plan_id', sa.String(), nullable=False),
+        sa.Column('recipe_id', sa.String(), nullable=False),
+        sa.Column('day', sa.String(), nullable=False),
+        sa.Column('meal_type', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id']),
+        sa.ForeignKeyConstraint(['week_plan_id'], ['week_plans.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_meal_plans_id', 'meal_plans', ['id'])
+
+    op.create_table(
+        'telemetry_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('event_data', sa.JSON(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_telemetry_events_id', 'telemetry_events', ['id'])
+    op.create_index('ix_telemetry_events_event_type', 'telemetry_events', ['event_type'])
+    op.create_index('ix_telemetry_events_timestamp', 'telemetry_events', ['timestamp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('telemetry_events')
+    op.drop_table('meal_plans')
+    op.drop_table('week_plans')
+    op.drop_table('pantry_items')
+    op.drop_table('recipes')
+    op.drop_table('users')
@@ -0,0 +1,64 @@
+"""pantry versions, change sequence and tombstones
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'pantry_versions',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('tombstone_floor', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+    op.create_table(
+        'pantry_tombstones',
+        sa.Column('item_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('item_id'),
+    )
+    op.create_index('ix_pantry_tombstones_deleted_at', 'pantry_tombstones', ['deleted_at'])
+    op.create_index(
+        'ix_pantry_tombstones_user_change_seq', 'pantry_tombstones', ['user_id', 'change_seq']
+    )
+
+    op.add_column('pantry_items', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Existing rows predate sync; clients pick them up through a reset
+    op.add_column(
+        'pantry_items',
+        sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.alter_column('pantry_items', 'change_seq', server_default=None)
+    op.create_index(
+        'ix_pantry_items_user_change_seq', 'pantry_items', ['user_id', 'change_seq']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pantry_items_user_change_seq', table_name='pantry_items')
+    op.drop_column('pantry_items', 'change_seq')
+    op.drop_column('pantry_items', 'updated_at')
+    op.drop_table('pantry_tombstones')
+    op.drop_table('pantry_versions')
@@ -0,0 +1,53 @@
+"""indexes for pantry listing, expiring items and foreign keys
+
+Built CONCURRENTLY so they don't block writes on a live database.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # GET /pantry/ keyset pagination
+    ('ix_pantry_items_user_added', 'pantry_items', ['user_id', 'added_at', 'id'], None),
+    # GET /pantry/expiring, POST /pantry/clear-expiring, notification job
+    (
+        'ix_pantry_items_user_expiring', 'pantry_items', ['user_id', 'expires_at'],
+        sa.text("storage_location <> 'freezer'"),
+    ),
+    # Foreign keys: joins and ON DELETE lookups
+    ('ix_meal_plans_week_plan_id', 'meal_plans', ['week_plan_id'], None),
+    ('ix_week_plans_user_id', 'week_plans', ['user_id'], None),
+    ('ix_telemetry_events_user_id', 'telemetry_events', ['user_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
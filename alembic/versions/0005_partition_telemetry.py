@@ -0,0 +1,141 @@
+"""partition telemetry_events by month; hourly rollup tables
+
+telemetry_events is rebuilt as a table partitioned by RANGE (timestamp)
+with one partition per month plus a default partition, and existing rows
+are copied over. The primary key becomes (id, timestamp) because
+Postgres requires the partition key in it. Later partitions are created
+by app.jobs.telemetry_maintenance.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+EVENT_INDEXES = [
+    ('ix_telemetry_events_event_type', ['event_type']),
+    ('ix_telemetry_events_timestamp', ['timestamp']),
+    ('ix_telemetry_events_user_id', ['user_id']),
+]
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    years, index = divmod(month.month - 1 + months, 12)
+    return datetime(month.year + years, index + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Move the old table out of the way (index names are schema-wide)
+    op.rename_table('telemetry_events', 'telemetry_events_legacy')
+    op.execute(
+        'ALTER TABLE telemetry_events_legacy '
+        'RENAME CONSTRAINT telemetry_events_pkey TO telemetry_events_legacy_pkey'
+    )
+    for name, _columns in EVENT_INDEXES + [('ix_telemetry_events_id', ['id'])]:
+        op.drop_index(name, table_name='telemetry_events_legacy')
+
+    op.create_table(
+        'telemetry_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('event_data', sa.JSON(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('ingested_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)',
+    )
+    for name, columns in EVENT_INDEXES + [('ix_telemetry_events_ingested_at', ['ingested_at'])]:
+        op.create_index(name, 'telemetry_events', columns)
+
+    op.execute('CREATE TABLE telemetry_events_default PARTITION OF telemetry_events DEFAULT')
+
+    now = datetime.utcnow()
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM telemetry_events_legacy')).scalar()
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE telemetry_events_p{month:%Y%m} PARTITION OF telemetry_events "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+        month = upper
+
+    op.execute(
+        'INSERT INTO telemetry_events (id, user_id, event_type, event_data, "timestamp") '
+        'SELECT id, user_id, event_type, event_data, coalesce("timestamp", now()) '
+        'FROM telemetry_events_legacy'
+    )
+    op.drop_table('telemetry_events_legacy')
+
+    op.create_table(
+        'telemetry_hourly_rollups',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('event_count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'event_type', 'user_id'),
+    )
+    op.create_index(
+        'ix_telemetry_hourly_rollups_user_bucket', 'telemetry_hourly_rollups', ['user_id', 'bucket']
+    )
+    op.create_table(
+        'telemetry_rollup_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('telemetry_rollup_watermarks')
+    op.drop_table('telemetry_hourly_rollups')
+
+    op.rename_table('telemetry_events', 'telemetry_events_partitioned')
+    op.execute(
+        'ALTER TABLE telemetry_events_partitioned '
+        'RENAME CONSTRAINT telemetry_events_pkey TO telemetry_events_partitioned_pkey'
+    )
+    for name, _columns in EVENT_INDEXES + [('ix_telemetry_events_ingested_at', ['ingested_at'])]:
+        op.drop_index(name, table_name='telemetry_events_partitioned')
+
+    op.create_table(
+        'telemetry_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('event_data', sa.JSON(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_telemetry_events_id', 'telemetry_events', ['id'])
+    for name, columns in EVENT_INDEXES:
+        op.create_index(name, 'telemetry_events', columns)
+
+    op.execute(
+        'INSERT INTO telemetry_events (id, user_id, event_type, event_data, "timestamp") '
+        'SELECT id, user_id, event_type, event_data, "timestamp" FROM telemetry_events_partitioned '
+        'ON CONFLICT (id) DO NOTHING'
+    )
+    # Drops every partition with it
+    op.drop_table('telemetry_events_partitioned')
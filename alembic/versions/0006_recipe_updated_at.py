@@ -0,0 +1,31 @@
+"""recipes.updated_at for incremental recipe index refreshes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('recipes', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE recipes SET updated_at = coalesce(created_at, now())')
+    op.create_index('ix_recipes_updated_at', 'recipes', ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recipes_updated_at', table_name='recipes')
+    op.drop_column('recipes', 'updated_at')
@@ -0,0 +1,65 @@
+"""recipe search: generated tsvector, GIN indexes, pg_trgm on name
+
+search_vector weights name (A) over cuisine (B) over tags (C). The tags
+array goes through an IMMUTABLE wrapper because array_to_string itself is
+only STABLE, which generated columns don't accept.
+
+pg_trgm is optional: when the server doesn't ship it the trigram index is
+skipped and search falls back to full-text matching only.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(cuisine, '')), 'B') || "
+    "setweight(to_tsvector('english', recipe_tags_text(tags)), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE OR REPLACE FUNCTION recipe_tags_text(tags text[]) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT coalesce(array_to_string(tags, ' '), '') $$"
+    )
+    op.add_column('recipes', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True)
+    ))
+    op.create_index('ix_recipes_search_vector', 'recipes', ['search_vector'], postgresql_using='gin')
+    op.create_index('ix_recipes_tags', 'recipes', ['tags'], postgresql_using='gin')
+    op.create_index('ix_recipes_main_ingredients', 'recipes', ['main_ingredients'], postgresql_using='gin')
+
+    bind = op.get_bind()
+    has_trgm = bind.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).scalar()
+    if has_trgm:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_recipes_name_trgm ON recipes USING gin (name gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS ix_recipes_name_trgm')
+    op.drop_index('ix_recipes_main_ingredients', table_name='recipes')
+    op.drop_index('ix_recipes_tags', table_name='recipes')
+    op.drop_index('ix_recipes_search_vector', table_name='recipes')
+    op.drop_column('recipes', 'search_vector')
+    op.execute('DROP FUNCTION IF EXISTS recipe_tags_text(text[])')
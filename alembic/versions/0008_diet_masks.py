@@ -0,0 +1,35 @@
+"""allergen/diet bitmasks on recipes and users
+
+Existing rows start at 0 (no categories); fill them with
+python -m app.jobs.backfill_diet_masks.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('recipes', sa.Column('contains_mask', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('ix_recipes_contains_mask', 'recipes', ['contains_mask'])
+    op.add_column('users', sa.Column('exclusion_mask', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'exclusion_mask')
+    op.drop_index('ix_recipes_contains_mask', table_name='recipes')
+    op.drop_column('recipes', 'contains_mask')
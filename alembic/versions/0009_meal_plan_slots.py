@@ -0,0 +1,60 @@
+"""unique (week_plan_id, day, meal_type) on meal_plans
+
+Streamed plan generation writes one meal at a time and may be resumed
+by a reconnecting client; the unique index makes those writes
+idempotent. Duplicate slots written before it existed are removed first
+(the row with the lowest id is kept), or the index build would fail.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # In the migration's own transaction, committed before the index build
+    op.execute(
+        'DELETE FROM meal_plans WHERE id NOT IN ('
+        'SELECT min(id) FROM meal_plans GROUP BY week_plan_id, day, meal_type)'
+    )
+    bind = op.get_bind()
+    # A failed concurrent build leaves an INVALID index behind, which
+    # if_not_exists would otherwise skip
+    invalid = bind.dialect.name == 'postgresql' and bind.execute(sa.text(
+        "SELECT NOT indisvalid FROM pg_index "
+        "WHERE indexrelid = to_regclass('ux_meal_plans_week_slot')"
+    )).scalar()
+    with op.get_context().autocommit_block():
+        if invalid:
+            op.drop_index(
+                'ux_meal_plans_week_slot', table_name='meal_plans',
+                postgresql_concurrently=True, if_exists=True,
+            )
+        op.create_index(
+            'ux_meal_plans_week_slot', 'meal_plans', ['week_plan_id', 'day', 'meal_type'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_meal_plans_week_slot', table_name='meal_plans',
+            postgresql_concurrently=True, if_exists=True,
+        )
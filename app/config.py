@@ -8,21 +8,94 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_echo: bool = False  # log every statement; local debugging only
+    # Per-request query counts/timings, slow-query log, N+1 detection
+    db_instrumentation: bool = True
+    db_slow_query_ms: float = 200
+    db_n_plus_one_threshold: int = 5  # same statement this often in one request
+
+    # Prometheus /metrics (set PROMETHEUS_MULTIPROC_DIR with several workers)
+    metrics_enabled: bool = True
+
+    # Startup warmup; GET /ready answers 503 until it's done
+    warmup_enabled: bool = True
+    warmup_db_connections: int = 5  # capped at db_pool_size
+    warmup_timeout_seconds: float = 10  # per step and attempt
+
+    # Pantry sync (GET /pantry/changes)
+    pantry_tombstone_retention_days: int = 30
     
     # Auth0
     auth0_domain: str
     auth0_api_audience: str
     auth0_algorithms: list[str] = ["RS256"]
+    auth0_jwks_ttl_seconds: float = 3600
+    token_cache_max_size: int = 10000
+    token_cache_max_ttl_seconds: float = 300
     auth0_management_client_id: str
     auth0_management_client_secret: str
+    auth0_management_base_url: str = ""  # e.g. a local stub server in tests
+    auth0_management_max_concurrency: int = 5
+    auth0_management_max_retry_delay_seconds: float = 10  # longer Retry-After: give up
+    admin_user_ids: list[str] = []  # Auth0 subs allowed app-wide views (e.g. telemetry rollups)
+    user_cache_ttl_seconds: float = 60
+    user_cache_max_size: int = 10000
     
     # AI
     anthropic_api_key: str
     openai_api_key: str = ""
+    anthropic_base_url: str = ""  # e.g. a local fake provider in tests
+    ai_model: str = "claude-sonnet-4-5"
+    ai_max_concurrency: int = 8
+    ai_queue_timeout_seconds: float = 30
+    ai_cache_ttl_seconds: float = 86400
+    ai_cache_max_size: int = 2000
+    ai_timeout_seconds: float = 60
+
+    # Recipe matching
+    recipe_index_refresh_seconds: float = 30
+    recipe_match_expiry_horizon_days: float = 7
+    recipe_match_expiry_weight: float = 0.5
+
+    # Local meal-plan generation
+    meal_plan_candidates: int = 300
+    meal_plan_cache_ttl_seconds: float = 3600
+    meal_plan_cache_max_size: int = 10000
+
+    # Streamed (LLM) meal-plan generation
+    meal_stream_shortlist: int = 40  # recipes offered to the model
+    meal_stream_max_tokens: int = 2048
+    meal_stream_keepalive_seconds: float = 15
+
+    # Shopping lists
+    shopping_cache_ttl_seconds: float = 3600
+    shopping_cache_max_size: int = 5000
+
+    # Ingredient substitutions
+    substitution_cache_max_size: int = 50000
+
+    # Per-user context snapshots for AI/planning features
+    context_cache_ttl_seconds: float = 3600
+    context_cache_max_size: int = 10000
+    context_recent_plans: int = 2
+    context_expiring_days: int = 3
+
+    # Telemetry ingestion buffer
+    telemetry_buffer_size: int = 50000
+    telemetry_batch_size: int = 1000
+    telemetry_flush_interval_seconds: float = 1.0
+    telemetry_enqueue_timeout_seconds: float = 0.5
+    telemetry_max_clock_skew_seconds: float = 86400
+    telemetry_partitions_ahead: int = 2
+    telemetry_retention_months: int = 6
+    telemetry_rollup_lag_seconds: float = 60
     
     # Email
     sendgrid_api_key: str
     from_email: str
+    email_max_concurrency: int = 4
     
     # Frontend
     frontend_url: str = "http://localhost:5173"
@@ -1,24 +1,99 @@
-from sqlalchemy import create_engine
+from sqlalchemy import JSON, String, create_engine
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
+from app.utils.db_instrumentation import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+from app.utils.metrics import instrument_pool
 
 settings = get_settings()
 
+# Async drivers used by the API for each sync driver in DATABASE_URL
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(database_url: str):
+    """
+    Translate the (sync) DATABASE_URL into its asyncio equivalent.
+    psycopg2's `sslmode` query option is spelled `ssl` by asyncpg.
+    """
+    url = make_url(database_url)
+    drivername = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+    if drivername == "postgresql+asyncpg" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername=drivername, query=query)
+
+def _is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+# Pools that time checkouts, when instrumentation is on (SQLite keeps its own pool)
+def _pool_class(url, timed_pool):
+    if not settings.db_instrumentation or _is_sqlite(url):
+        return {}
+    return {"poolclass": timed_pool}
+
+# --- Sync engine: used by Alembic and offline scripts ---
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    echo=settings.debug
+    echo=settings.db_echo,
+    **_pool_class(settings.database_url, TimedQueuePool)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- Async engine: used by the API routes ---
+_async_url = get_async_database_url(settings.database_url)
+# SQLite (local tests) doesn't take a sized connection pool
+_pool_options = {} if _is_sqlite(_async_url) else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+}
+async_engine = create_async_engine(
+    _async_url,
+    pool_pre_ping=True,
+    echo=settings.db_echo,
+    **_pool_options,
+    **_pool_class(_async_url, TimedAsyncQueuePool)
+)
+
+if settings.db_instrumentation:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+if settings.metrics_enabled:
+    instrument_pool(engine, "sync")
+    instrument_pool(async_engine.sync_engine, "async")
+
+# expire_on_commit=False so returned ORM objects can still be serialized
+# by the response_model after the route has committed.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
+# text[] on Postgres; a JSON list on SQLite, so the schema can be created
+# there for tests. Array operators (@>, &&) are Postgres-only.
+StringArray = ARRAY(String).with_variant(JSON(), "sqlite")
+
 # Dependency for routes
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Sync dependency, for scripts and anything that must stay on psycopg2
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
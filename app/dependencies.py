@@ -1,16 +1,52 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.config import get_settings
 from app.database import get_db
 from app.utils.auth0 import verify_token # Your "Gatekeeper"
+from app.utils.cache import TTLCache
 from app.models.user import User
 
+settings = get_settings()
+
+# Column snapshots of recently seen users, keyed by Auth0 'sub'.
+# Profile writes in routers/auth.py invalidate their entry.
+user_cache = TTLCache(
+    max_size=settings.user_cache_max_size,
+    ttl=settings.user_cache_ttl_seconds,
+    name="users"
+)
+
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+def _copy(value):
+    # ARRAY columns come back as lists; never share them between requests
+    return list(value) if isinstance(value, list) else value
+
+def _snapshot(user: User) -> dict:
+    return {key: _copy(getattr(user, key)) for key in _USER_COLUMNS}
+
+def _from_snapshot(snapshot: dict) -> User:
+    # Detached (not transient) so a merge() updates instead of inserting
+    user = User(**{key: _copy(value) for key, value in snapshot.items()})
+    make_transient_to_detached(user)
+    return user
+
+def invalidate_cached_user(user_id: str):
+    """Drop a user's cached snapshot after their row changes"""
+    user_cache.invalidate(user_id)
+
 async def get_current_user(
     token_payload: dict = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get or create current user from database based on Auth0 token.
-    This runs on almost every authenticated endpoint.
+    This runs on almost every authenticated endpoint, so users are served
+    from `user_cache` when possible. Cached users are detached from `db`:
+    write through an UPDATE statement, then call invalidate_cached_user().
     """
     user_id = token_payload.get("sub")
     if not user_id:
@@ -18,19 +54,37 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User ID (sub) not found in token"
         )
-        
-    user = db.query(User).filter(User.id == user_id).first()
-    
+
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return _from_snapshot(snapshot)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+
     if not user:
-        # User's first login. Create them in our DB.
-        email = token_payload.get("email")
-        
-        user = User(
+        # User's first login. Create them in our DB in one round trip;
+        # if a concurrent request won the race, read back its row.
+        stmt = insert(User).values(
             id=user_id, # Use Auth0 'sub' as our primary key
-            email=email
+            email=token_payload.get("email")
+        ).on_conflict_do_nothing(index_elements=[User.id]).returning(User)
+
+        user = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+
+        if not user:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user = result.scalar_one()
+
+    user_cache.set(user_id, _snapshot(user))
+    return user
+
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Current user, or 403 unless their Auth0 id is in admin_user_ids"""
+    if current_user.id not in settings.admin_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    
-    return user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,83 @@
+"""
+Recompute recipes.contains_mask and users.exclusion_mask.
+
+Run once after migration 0008, and again whenever the categories or the
+ingredient lexicon in app.utils.dietary change. Walks each table in
+primary-key order, one chunk per transaction, and only writes rows whose
+mask actually changed, so reruns are cheap.
+
+    python -m app.jobs.backfill_diet_masks [--chunk-size 2000] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy import select, update
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models.recipe import Recipe
+from app.models.user import User
+from app.utils.dietary import profile_mask, recipe_contains_mask
+
+logger = logging.getLogger(__name__)
+
+async def _backfill(model, columns: list, mask_column: str, compute: Callable, chunk_size: int, dry_run: bool) -> dict:
+    scanned = changed = 0
+    last_id = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(model.id, getattr(model, mask_column), *columns).order_by(model.id).limit(chunk_size)
+            if last_id is not None:
+                query = query.where(model.id > last_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                mask = compute(*row[2:])
+                if mask != row[1]:
+                    updates.append({"id": row[0], mask_column: mask})
+            if updates and not dry_run:
+                # Bulk UPDATE by primary key: one executemany per chunk
+                await db.execute(update(model), updates)
+                await db.commit()
+            scanned += len(rows)
+            changed += len(updates)
+            last_id = rows[-1][0]
+    return {"scanned": scanned, "changed": changed}
+
+async def run(chunk_size: int = 2000, dry_run: bool = False) -> dict:
+    started = time.perf_counter()
+    recipes = await _backfill(
+        Recipe, [Recipe.ingredients, Recipe.main_ingredients], "contains_mask",
+        recipe_contains_mask, chunk_size, dry_run
+    )
+    users = await _backfill(
+        User, [User.primary_diet_type, User.food_exclusions], "exclusion_mask",
+        lambda diet, exclusions: profile_mask(diet, exclusions)[0], chunk_size, dry_run
+    )
+    report = {
+        "recipes": recipes,
+        "users": users,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "dry_run": dry_run,
+    }
+    logger.info(f"Diet mask backfill: {report}")
+    return report
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill recipe/user diet bitmasks")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--dry-run", action="store_true", help="count changes, write nothing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        await run(chunk_size=args.chunk_size, dry_run=args.dry_run)
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
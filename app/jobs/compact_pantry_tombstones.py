@@ -0,0 +1,39 @@
+"""
+Drop pantry tombstones past their retention window.
+
+Clients that last synced before the window get `reset=true` from
+/pantry/changes and re-download their pantry once.
+
+    python -m app.jobs.compact_pantry_tombstones [--days 30]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, async_engine
+from app.services.pantry import compact_tombstones
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+async def run(retention_days: int) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    async with AsyncSessionLocal() as db:
+        users = await compact_tombstones(db, cutoff)
+        await db.commit()
+    logger.info(f"Compacted pantry tombstones older than {cutoff.isoformat()} for {users} users")
+    return users
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compact pantry tombstones")
+    parser.add_argument("--days", type=int, default=settings.pantry_tombstone_retention_days)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    await run(args.days)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
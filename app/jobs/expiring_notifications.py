@@ -0,0 +1,159 @@
+"""
+Nightly "your pantry items are expiring" emails.
+
+One query finds every user's expiring non-freezer items, streamed from the
+database in chunks and grouped per user. Users are packed into SendGrid
+calls of up to `batch_size` personalizations, sent with bounded
+concurrency. At most `max_pending` batches are in flight or waiting;
+reading pauses until one finishes, so memory stays flat however many
+users there are.
+
+    python -m app.jobs.expiring_notifications [--days 3] [--dry-run] [--stub]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, async_engine
+from app.models.pantry import PantryItem
+from app.models.user import User
+from app.services.email import EmailService, StubEmailSender, MAX_PERSONALIZATIONS
+from app.services.pantry import expiring_items_filter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (email, user_name, expiring items)
+Recipient = Tuple[str, str, list]
+
+@dataclass
+class NotificationStats:
+    users: int = 0
+    items: int = 0
+    api_calls: int = 0
+    failed_calls: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def users_per_s(self) -> float:
+        return round(self.users / self.elapsed_s, 1) if self.elapsed_s else 0.0
+
+async def stream_expiring_recipients(
+    db: AsyncSession,
+    days: int,
+    chunk_size: int
+) -> AsyncIterator[Recipient]:
+    """Yield one recipient per user with expiring items, from a single streamed query"""
+    stmt = select(
+        User.id, User.email, PantryItem.name, PantryItem.expires_at
+    ).join(PantryItem, PantryItem.user_id == User.id).where(
+        *expiring_items_filter(days)
+    ).order_by(User.id, PantryItem.expires_at).execution_options(yield_per=chunk_size)
+
+    result = await db.stream(stmt)
+    current_id, current_email, items = None, None, []
+    async for rows in result.partitions():
+        for row in rows:
+            if row.id != current_id:
+                if items:
+                    yield current_email, current_email.split("@")[0], items
+                current_id, current_email, items = row.id, row.email, []
+            items.append(row)
+    if items:
+        yield current_email, current_email.split("@")[0], items
+
+async def run(
+    days: int = 3,
+    batch_size: int = MAX_PERSONALIZATIONS,
+    chunk_size: int = 5000,
+    dry_run: bool = False,
+    email: Optional[EmailService] = None,
+    max_pending: Optional[int] = None
+) -> NotificationStats:
+    """Find users with expiring items and email them; returns throughput stats"""
+    owns_email = email is None
+    email = email or EmailService()
+    # Enough queued batches to keep every sender slot busy, and no more
+    slots = asyncio.Semaphore(max_pending or settings.email_max_concurrency * 2)
+    stats = NotificationStats()
+    started = time.perf_counter()
+    pending: Set[asyncio.Task] = set()
+
+    async def dispatch(batch: List[Recipient]):
+        try:
+            stats.api_calls += 1
+            if dry_run:
+                email.build_expiring_items_batch(batch)
+                return
+            if not await email.send_expiring_items_batch(batch):
+                stats.failed_calls += 1
+        finally:
+            slots.release()
+
+    async def submit(batch: List[Recipient]):
+        # Blocks (and stops reading rows) while max_pending batches are out
+        await slots.acquire()
+        task = asyncio.create_task(dispatch(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            batch: List[Recipient] = []
+            async for recipient in stream_expiring_recipients(db, days, chunk_size):
+                stats.users += 1
+                stats.items += len(recipient[2])
+                batch.append(recipient)
+                if len(batch) == batch_size:
+                    await submit(batch)
+                    batch = []
+            if batch:
+                await submit(batch)
+
+        await asyncio.gather(*pending)
+    finally:
+        if owns_email:
+            await email.aclose()
+    stats.elapsed_s = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Expiring-items notifications: {stats.users} users, {stats.items} items, "
+        f"{stats.api_calls} API calls ({stats.failed_calls} failed) in {stats.elapsed_s}s "
+        f"= {stats.users_per_s} users/s{' [dry run]' if dry_run else ''}"
+    )
+    return stats
+
+async def main():
+    parser = argparse.ArgumentParser(description="Email users about expiring pantry items")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=MAX_PERSONALIZATIONS)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="build payloads, send nothing")
+    parser.add_argument("--stub", action="store_true", help="send to an in-memory stub sender")
+    parser.add_argument("--stub-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sender = StubEmailSender(latency=args.stub_latency) if args.stub else None
+    email = EmailService(sender=sender)
+    try:
+        stats = await run(
+            days=args.days,
+            batch_size=min(args.batch_size, MAX_PERSONALIZATIONS),
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            email=email
+        )
+        print({**asdict(stats), "users_per_s": stats.users_per_s})
+    finally:
+        await email.aclose()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Telemetry storage upkeep; run it every few minutes (e.g. a cron job).
+
+- creates upcoming monthly partitions of telemetry_events
+- folds newly ingested events into the hourly rollups
+- drops partitions past the retention window (with --retention)
+
+    python -m app.jobs.telemetry_maintenance [--retention]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, async_engine
+from app.services.telemetry_storage import (
+    drop_expired_partitions, ensure_partitions, update_hourly_rollups
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+async def run(retention: bool = False) -> dict:
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        partitions = await ensure_partitions(db, settings.telemetry_partitions_ahead)
+        await db.commit()
+
+        rollup_rows = await update_hourly_rollups(db, settings.telemetry_rollup_lag_seconds)
+        await db.commit()
+
+        dropped = []
+        if retention:
+            dropped = await drop_expired_partitions(db, settings.telemetry_retention_months)
+            await db.commit()
+
+    report = {
+        "partitions": partitions,
+        "rollup_rows": rollup_rows,
+        "dropped_partitions": dropped,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Telemetry maintenance: {report}")
+    return report
+
+async def main():
+    parser = argparse.ArgumentParser(description="Telemetry partitions, rollups and retention")
+    parser.add_argument("--retention", action="store_true", help="also drop expired partitions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        await run(retention=args.retention)
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
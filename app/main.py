@@ -1,25 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 from app.routers import pantry
 from app.routers import pantry, auth  # <-- Import the new auth router
+from app.routers import telemetry, recipes, meal_plans, shopping, context
 from datetime import datetime  # <-- Import datetime
-from app.database import Base, engine # <-- Import Base and engine
-
-
-# --- 2. Create all database tables on startup ---
-# This looks at your app/models/ and creates tables.
-Base.metadata.create_all(bind=engine)
-# ------------------------------------------------
+from app.database import async_engine
+from app.dependencies import user_cache
+from app.utils.auth0 import verified_tokens
+from app.utils.auth0_management import management_client
+from app.utils.ai_client import ai_client
+from app.services.telemetry import telemetry_buffer
+from app.services.recipe_matching import recipe_index
+from app.services.meal_generation import plan_cache
+from app.services.meal_streaming import stream_stats
+from app.services.shopping import shopping_cache
+from app.services.substitutions import substitution_graph
+from app.services.context import context_cache
+from app.services.warmup import warmup
+from app.utils.db_instrumentation import DBStatsMiddleware, db_stats
+from app.utils import metrics
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await telemetry_buffer.start()
+    substitution_graph.load()
+    # JWKS, pool connections, recipe index, AI SDK; see GET /ready
+    warmup.start()
+    yield
+    await warmup.stop()
+    # Flush buffered telemetry before the pool goes away
+    await telemetry_buffer.stop()
+    # Close pooled outbound connections
+    await management_client.aclose()
+    await ai_client.aclose()
+    # Last, once nothing else needs the database; on SQLite the
+    # connection threads keep the process alive otherwise
+    await async_engine.dispose()
+    metrics.mark_process_dead()
+
 app = FastAPI(
     title=settings.app_name,
     description="Athyra Meal Planning API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS
@@ -29,11 +60,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the web app read pagination/caching headers and request timings
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Queries", "Server-Timing"],
 )
 
+if settings.db_instrumentation:
+    app.add_middleware(DBStatsMiddleware)
+if settings.metrics_enabled:
+    # Added last so it runs first and times everything below it
+    app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")   # <-- 3. Include auth router
 app.include_router(pantry.router, prefix="/api")
+app.include_router(telemetry.router, prefix="/api")
+app.include_router(recipes.router, prefix="/api")
+app.include_router(meal_plans.router, prefix="/api")
+app.include_router(shopping.router, prefix="/api")
+app.include_router(context.router, prefix="/api")
 
 
 # Health check
@@ -41,9 +85,37 @@ app.include_router(pantry.router, prefix="/api")
 async def health_check():
     return {
         "status": "ok",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "caches": {
+            "users": user_cache.stats(),
+            "tokens": verified_tokens.stats(),
+            "meal_plans": plan_cache.stats(),
+            "shopping_lists": shopping_cache.stats(),
+            "contexts": context_cache.stats()
+        },
+        "telemetry": telemetry_buffer.stats(),
+        "recipe_index": recipe_index.stats(),
+        "ai": ai_client.stats(),
+        "meal_plan_streams": stream_stats.stats(),
+        "substitutions": substitution_graph.stats(),
+        "db": db_stats.stats()
     }
 
+# Readiness: 503 until startup warmup is done (/health is liveness)
+@app.get("/ready")
+async def readiness(response: Response):
+    if not warmup.ready:
+        response.status_code = 503
+    return warmup.stats()
+
+# Prometheus scrape endpoint
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        # Sync: reading the multiprocess files runs in the threadpool
+        body, content_type = metrics.render()
+        return Response(body, media_type=content_type)
+
 # Root
 @app.get("/")
 async def root():
@@ -55,4 +127,4 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,3 @@
+# Import every model so relationship() string references resolve
+# no matter which model a module imports first.
+from app.models import user, pantry, recipe, meal_plan, telemetry
@@ -1,16 +1,16 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from app.database import Base
+from app.database import Base, StringArray
 
 class WeekPlan(Base):
     __tablename__ = "week_plans"
     
     id = Column(String, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     week_of = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    shared_ingredients = Column(ARRAY(String), default=list)
+    shared_ingredients = Column(StringArray, default=list)
     
     # Relationships
     user = relationship("User", back_populates="week_plans")
@@ -20,10 +20,15 @@ class MealPlan(Base):
     __tablename__ = "meal_plans"
     
     id = Column(String, primary_key=True, index=True)
-    week_plan_id = Column(String, ForeignKey("week_plans.id"), nullable=False)
+    week_plan_id = Column(String, ForeignKey("week_plans.id"), nullable=False, index=True)
     recipe_id = Column(String, ForeignKey("recipes.id"), nullable=False)
     day = Column(String, nullable=False)  # Monday, Tuesday, etc.
     meal_type = Column(String, nullable=False)  # breakfast, lunch, dinner
     
     # Relationships
-    week_plan = relationship("WeekPlan", back_populates="meals")
\ No newline at end of file
+    week_plan = relationship("WeekPlan", back_populates="meals")
+
+    __table_args__ = (
+        # One meal per slot; lets a resumed stream write idempotently
+        Index("ux_meal_plans_week_slot", "week_plan_id", "day", "meal_type", unique=True),
+    )
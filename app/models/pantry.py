@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, BigInteger, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -15,7 +15,53 @@ class PantryItem(Base):
     category = Column(String, nullable=False)  # protein, grain, vegetable, etc.
     storage_location = Column(String, nullable=False)  # pantry, fridge, freezer
     added_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     purchase_source = Column(String, nullable=True)
+    # PantryVersion.version of the write that last touched this row
+    change_seq = Column(BigInteger, nullable=False, default=0)
     
     # Relationships
-    user = relationship("User", back_populates="pantry_items")
\ No newline at end of file
+    user = relationship("User", back_populates="pantry_items")
+
+    __table_args__ = (
+        # Keyset pagination for GET /pantry/ (newest first)
+        Index("ix_pantry_items_user_added", "user_id", "added_at", "id"),
+        # Delta sync: GET /pantry/changes?since=
+        Index("ix_pantry_items_user_change_seq", "user_id", "change_seq"),
+        # Expiring-items queries never look at the freezer
+        Index(
+            "ix_pantry_items_user_expiring", "user_id", "expires_at",
+            postgresql_where=text("storage_location <> 'freezer'")
+        ),
+        # Same predicate across all users, for the nightly notification job
+        Index(
+            "ix_pantry_items_expiring", "expires_at",
+            postgresql_where=text("storage_location <> 'freezer'")
+        ),
+    )
+
+class PantryTombstone(Base):
+    """Marker left behind by a deleted pantry item so sync clients can drop it"""
+    __tablename__ = "pantry_tombstones"
+
+    item_id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_pantry_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+class PantryVersion(Base):
+    """
+    Per-user counter bumped by every pantry write. Backs the pantry ETag
+    and is the change sequence for delta sync.
+    """
+    __tablename__ = "pantry_versions"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    # Tombstones up to this sequence have been compacted away; clients
+    # syncing from an older cursor must take a full snapshot instead.
+    tombstone_floor = Column(BigInteger, nullable=False, default=0)
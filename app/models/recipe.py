@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer, JSON, ARRAY, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, JSON, DateTime, Index, event
 from datetime import datetime
-from app.database import Base
+from app.database import Base, StringArray
+from app.utils.dietary import recipe_contains_mask
 
 class Recipe(Base):
     __tablename__ = "recipes"
@@ -11,9 +12,9 @@ class Recipe(Base):
     servings = Column(Integer, nullable=False)
     calories = Column(Integer, nullable=False)
     ingredients = Column(JSON, nullable=False)  # Array of ingredient objects
-    main_ingredients = Column(ARRAY(String), nullable=False)
+    main_ingredients = Column(StringArray, nullable=False)
     instructions = Column(JSON, nullable=False)  # Array of step strings
-    tags = Column(ARRAY(String), default=list)
+    tags = Column(StringArray, default=list)
     cuisine = Column(String, nullable=True)
     prep_complexity = Column(String, nullable=False)  # quick, prep
     
@@ -21,9 +22,29 @@ class Recipe(Base):
     protein = Column(String, nullable=True)
     grain = Column(String, nullable=True)
     vegetable = Column(String, nullable=True)
+
+    # Allergen/diet categories of the ingredients (app.utils.dietary),
+    # kept in sync by the mapper events below
+    contains_mask = Column(BigInteger, nullable=False, default=0, server_default="0", index=True)
     
     # Metadata
     image_url = Column(String, nullable=True)
     source_url = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    created_by = Column(String, nullable=True)  # user_id or "system"
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    created_by = Column(String, nullable=True)  # user_id or "system"
+
+    # Searched with @> / && (app.services.recipe_search). The generated
+    # search_vector column and the name trigram index are Postgres-only and
+    # live in migration 0007 rather than on the model.
+    __table_args__ = (
+        Index("ix_recipes_tags", "tags", postgresql_using="gin"),
+        Index("ix_recipes_main_ingredients", "main_ingredients", postgresql_using="gin"),
+    )
+
+@event.listens_for(Recipe, "before_insert")
+@event.listens_for(Recipe, "before_update")
+def _set_contains_mask(mapper, connection, recipe):
+    # ORM writes only; bulk UPDATEs of ingredients must set contains_mask
+    # themselves (or rerun app.jobs.backfill_diet_masks)
+    recipe.contains_mask = recipe_contains_mask(recipe.ingredients, recipe.main_ingredients)
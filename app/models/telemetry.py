@@ -1,16 +1,45 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, BigInteger, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class TelemetryEvent(Base):
+    """
+    Raw client events. On Postgres the table is range-partitioned by month
+    on `timestamp` (see services/telemetry_storage.py), so the partition
+    key is part of the primary key.
+    """
     __tablename__ = "telemetry_events"
     
-    id = Column(String, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=True)
+    id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)
     event_type = Column(String, nullable=False, index=True)
     event_data = Column(JSON, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, primary_key=True, index=True)
+    # Server time the row was written; rollups advance a watermark over it
+    ingested_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     
     # Relationships
-    user = relationship("User", back_populates="telemetry_events")
\ No newline at end of file
+    user = relationship("User", back_populates="telemetry_events")
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
+
+class TelemetryHourlyRollup(Base):
+    """Event counts per hour, event type and user, maintained incrementally"""
+    __tablename__ = "telemetry_hourly_rollups"
+
+    bucket = Column(DateTime, primary_key=True)  # start of the hour
+    event_type = Column(String, primary_key=True)
+    user_id = Column(String, primary_key=True, default="")  # "" for anonymous events
+    event_count = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_telemetry_hourly_rollups_user_bucket", "user_id", "bucket"),
+    )
+
+class TelemetryRollupWatermark(Base):
+    """How far (in TelemetryEvent.ingested_at) each rollup has aggregated"""
+    __tablename__ = "telemetry_rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=False)
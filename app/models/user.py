@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Boolean, Integer, ARRAY, DateTime, Float
+from sqlalchemy import Column, String, Boolean, Integer, BigInteger, DateTime, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from app.database import Base
+from app.database import Base, StringArray
 
 class User(Base):
     __tablename__ = "users"
@@ -13,15 +13,17 @@ class User(Base):
     
     # Profile
     has_completed_onboarding = Column(Boolean, default=False)
-    goals = Column(ARRAY(String), default=list)
+    goals = Column(StringArray, default=list)
     activity_level = Column(String, default="moderate")
     body_weight = Column(Float, nullable=True)
     primary_diet_type = Column(String, nullable=True)
-    food_exclusions = Column(ARRAY(String), default=list)
+    food_exclusions = Column(StringArray, default=list)
     budget = Column(String, nullable=True)
     meal_layout = Column(String, default="breakfast-lunch-dinner")
-    preferred_cooking_days = Column(ARRAY(String), default=list)
+    preferred_cooking_days = Column(StringArray, default=list)
     typical_prep_time = Column(Integer, default=30)
+    # primary_diet_type + food_exclusions compiled by app.utils.dietary.profile_mask
+    exclusion_mask = Column(BigInteger, nullable=False, default=0, server_default="0")
     
     # Relationships
     pantry_items = relationship("PantryItem", back_populates="user", cascade="all, delete-orphan")
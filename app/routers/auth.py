@@ -1,13 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserProfileUpdate, UserResponse
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, invalidate_cached_user
 from app.utils.auth0_management import update_auth0_app_metadata
+from app.utils.dietary import profile_mask
+from app.utils.serialization import ResponseAdapter
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
+user_profile = ResponseAdapter(UserResponse, many=False)
+
+async def _update_user(db: AsyncSession, user: User, values: dict) -> User:
+    """
+    Write profile fields with one UPDATE ... RETURNING.
+    current_user may be a cached, detached snapshot, so we never
+    setattr() on it; the cached copy is invalidated instead.
+    Diet changes also recompile the user's exclusion_mask.
+    """
+    if "primary_diet_type" in values or "food_exclusions" in values:
+        values["exclusion_mask"], _ = profile_mask(
+            values.get("primary_diet_type", user.primary_diet_type),
+            values.get("food_exclusions", user.food_exclusions)
+        )
+    result = await db.execute(
+        update(User).where(User.id == user.id).values(**values).returning(User)
+    )
+    user = result.scalar_one()
+    await db.commit()
+    invalidate_cached_user(user.id)
+    return user
+
 @router.get("", response_model=UserResponse)
 async def get_user_profile(
     current_user: User = Depends(get_current_user)
@@ -16,13 +41,13 @@ async def get_user_profile(
     Get the current user's full profile from *our* database.
     This is called by the frontend on every app load after login.
     """
-    return current_user
+    return user_profile.response(current_user)
 
 @router.post("/complete-onboarding", response_model=UserResponse)
 async def complete_onboarding(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     The main onboarding endpoint from the frontend.
@@ -32,13 +57,9 @@ async def complete_onboarding(
     
     # 1. Update our local database with the full profile
     update_data = profile_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(current_user, field, value)
-    
-    current_user.has_completed_onboarding = True
+    update_data["has_completed_onboarding"] = True
         
-    db.commit()
-    db.refresh(current_user)
+    current_user = await _update_user(db, current_user, update_data)
 
     # 2. Update Auth0 app_metadata with ONLY the flag.
     # This is what your frontend's useEffect hook will check on next login.
@@ -57,18 +78,14 @@ async def complete_onboarding(
 async def update_user_profile(
     profile_update: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update the current user's profile in *our* database.
     This is for all future profile updates (from the settings page).
     """
     update_data = profile_update.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(current_user, field, value)
+    if not update_data:
+        return current_user
         
-    db.commit()
-    db.refresh(current_user)
-    
-    return current_user
\ No newline at end of file
+    return await _update_user(db, current_user, update_data)
\ No newline at end of file
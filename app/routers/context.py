@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.context import ContextResponse
+from app.services.context import get_context
+from app.services.pantry import etag_matches
+
+router = APIRouter(prefix="/context", tags=["context"])
+
+@router.get("", response_model=ContextResponse)
+async def get_user_context(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    What the AI and planning features know about the user: profile,
+    pantry, items about to expire and recent week plans, as data and in
+    the compact text form used in prompts. Send the ETag back as
+    If-None-Match to get a 304 while nothing changed.
+    """
+    snapshot = await get_context(db, current_user.id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": snapshot.etag})
+    response.headers["ETag"] = snapshot.etag
+    return snapshot
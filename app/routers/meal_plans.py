@@ -0,0 +1,105 @@
+import json
+import time
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.meal_plan import WeekPlanResponse
+from app.schemas.recipe import SubstitutionResponse
+from app.services.meal_generation import NoRecipesFit, generate_week_plan, get_week_plan
+from app.services.meal_streaming import StreamEvent, open_week_plan, parse_event_id, stream_week_plan
+from app.services.substitutions import recipe_substitutions
+
+router = APIRouter(prefix="/meal-plans", tags=["meal-plans"])
+
+@router.post("/generate", response_model=WeekPlanResponse)
+async def generate_plan(
+    regenerate: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Plan this week's meals from the recipe catalog, using up what's in the
+    pantry (soonest-expiring first) and reusing ingredients across meals.
+    Returns the previously generated plan if neither the profile nor the
+    pantry changed since, unless `regenerate=true`. Answers 422 if no
+    recipe fits the profile.
+    """
+    try:
+        return await generate_week_plan(db, current_user, regenerate=regenerate)
+    except NoRecipesFit as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def _sse(events: AsyncIterator[Optional[StreamEvent]]) -> AsyncIterator[str]:
+    async for event in events:
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+        lines = [f"event: {event.event}"]
+        if event.id:
+            lines.append(f"id: {event.id}")
+        lines.append(f"data: {json.dumps(event.data, default=str)}")
+        yield "\n".join(lines) + "\n\n"
+
+@router.get("/stream")
+async def stream_plan(
+    week_plan_id: Optional[str] = None,
+    use_ai: bool = True,
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Generate this week's plan as Server-Sent Events: `plan` (with the
+    week_plan_id), one `meal` per slot as soon as it is picked and saved,
+    then `done` with the time to first meal. To resume after a dropped
+    connection, reconnect with `week_plan_id` (EventSource also sends
+    Last-Event-ID by itself): meals already saved are replayed and
+    generation continues with the empty slots.
+    """
+    started = time.perf_counter()
+    resume_id, after = parse_event_id(last_event_id)
+    if week_plan_id is None:
+        week_plan_id = resume_id
+    elif resume_id != week_plan_id:
+        after = 0
+    week_plan = await open_week_plan(db, current_user, week_plan_id)
+    if not week_plan:
+        raise HTTPException(status_code=404, detail="Week plan not found")
+    # The stream has its own session; don't keep this one's connection
+    # (or its read transaction) checked out for the whole response
+    await db.close()
+    return StreamingResponse(
+        _sse(stream_week_plan(current_user, week_plan, after=after, use_ai=use_ai, started=started)),
+        media_type="text/event-stream",
+        # No proxy buffering, or meals arrive all at once at the end
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{week_plan_id}", response_model=WeekPlanResponse)
+async def get_plan(
+    week_plan_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    week_plan = await get_week_plan(db, current_user.id, week_plan_id)
+    if not week_plan:
+        raise HTTPException(status_code=404, detail="Week plan not found")
+    return week_plan
+
+@router.get("/{week_plan_id}/substitutions", response_model=List[SubstitutionResponse])
+async def get_plan_substitutions(
+    week_plan_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Substitutions for every ingredient of the week's meals at once; see /recipes/{id}/substitutions"""
+    week_plan = await get_week_plan(db, current_user.id, week_plan_id)
+    if not week_plan:
+        raise HTTPException(status_code=404, detail="Week plan not found")
+    return await recipe_substitutions(db, current_user, [meal.recipe_id for meal in week_plan.meals])
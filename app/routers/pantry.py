@@ -1,40 +1,289 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import select, insert, delete, tuple_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 import uuid
 
 from app.database import get_db
 from app.models.user import User
 from app.models.pantry import PantryItem
-from app.schemas.pantry import PantryItemCreate, PantryItemUpdate, PantryItemResponse
+from app.schemas.pantry import (
+    PantryItemCreate, PantryItemUpdate, PantryItemResponse,
+    PantryItemBatchUpdate, PantryBatchError, PantryBatchResponse,
+    PantryChangesResponse
+)
 from app.dependencies import get_current_user
+from app.services.pantry import (
+    bump_pantry_version, get_pantry_version, pantry_etag, etag_matches,
+    record_deletions, get_pantry_changes, expiring_items_filter
+)
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.serialization import ResponseAdapter
 
 router = APIRouter(prefix="/pantry", tags=["pantry"])
 
+# Column rows straight to JSON bytes for the list endpoints
+pantry_items = ResponseAdapter(PantryItemResponse)
+
 @router.get("/", response_model=List[PantryItemResponse])
 async def get_pantry_items(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all pantry items for current user"""
-    items = db.query(PantryItem).filter(
+    """
+    Get pantry items for current user, newest first.
+    Pass `limit` to page through them; the next page's cursor comes back
+    in the X-Next-Cursor header. Send the ETag back as If-None-Match to
+    get a 304 when nothing changed since.
+    """
+    etag = pantry_etag(await get_pantry_version(db, current_user.id))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    query = select(*pantry_items.columns(PantryItem)).where(
         PantryItem.user_id == current_user.id
-    ).order_by(PantryItem.added_at.desc()).all()
-    
-    return items
+    ).order_by(PantryItem.added_at.desc(), PantryItem.id.desc())
+
+    if cursor:
+        added_at, item_id = decode_cursor(cursor, 2)
+        try:
+            added_at = datetime.fromisoformat(added_at)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(PantryItem.added_at, PantryItem.id) < tuple_(added_at, item_id)
+        )
+    if limit:
+        query = query.limit(limit + 1)
+
+    result = await db.execute(query)
+    items = result.all()
+
+    headers = {"ETag": etag}
+    if limit and len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.added_at.isoformat(), last.id)
+
+    return pantry_items.response(items, headers=headers)
+
+@router.get("/changes", response_model=PantryChangesResponse)
+async def get_pantry_changes_since(
+    since: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delta sync: items created or updated, and ids deleted, after `since`.
+    Store the returned `cursor` and pass it as `since` next time. When
+    `reset` is true, `items` is the full pantry and replaces local state.
+    """
+    return await get_pantry_changes(db, current_user.id, since)
+
+# --- Batch endpoints ---
+# Declared before the /{item_id} routes so "batch" isn't read as an item id.
+
+MAX_BATCH_SIZE = 500
+
+def _check_batch_size(size: int):
+    if size == 0 or size > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch must contain between 1 and {MAX_BATCH_SIZE} items"
+        )
+
+ITEM_NOT_FOUND = "Item not found"
+
+def _raise_batch_errors(errors: List[PantryBatchError], status_code: int = status.HTTP_409_CONFLICT):
+    """404 when every error is an unknown id, `status_code` otherwise"""
+    if all(error.detail == ITEM_NOT_FOUND for error in errors):
+        status_code = status.HTTP_404_NOT_FOUND
+    raise HTTPException(
+        status_code=status_code,
+        detail=[error.model_dump() for error in errors]
+    )
+
+@router.post("/batch", response_model=PantryBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_pantry_items(
+    items: List[PantryItemCreate],
+    atomic: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many pantry items with one multi-row INSERT ... RETURNING.
+    If that fails the rows are retried one by one, each in a savepoint,
+    to find the ones the database rejects. With atomic=true (default)
+    they are reported in a 422 and nothing is created; with
+    atomic=false the rest are created and the rejects listed in `errors`.
+    """
+    _check_batch_size(len(items))
+    version = await bump_pantry_version(db, current_user.id)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": current_user.id,
+            "change_seq": version,
+            **item.model_dump()
+        }
+        for item in items
+    ]
+    stmt = insert(PantryItem).returning(PantryItem, sort_by_parameter_order=True)
+
+    try:
+        result = await db.execute(stmt, rows)
+        created = list(result.scalars())
+    except DBAPIError:
+        await db.rollback()
+
+        # Isolate the offending rows, each in its own savepoint
+        version = await bump_pantry_version(db, current_user.id)
+        for row in rows:
+            row["change_seq"] = version
+        created, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(stmt, [row])
+                    created.append(result.scalar_one())
+            except DBAPIError as e:
+                errors.append(PantryBatchError(index=index, detail=str(e.orig)))
+        if errors and atomic:
+            await db.rollback()
+            _raise_batch_errors(errors, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if created:
+            await db.commit()
+        else:
+            await db.rollback()
+        return PantryBatchResponse(items=created, errors=errors)
+
+    await db.commit()
+    return PantryBatchResponse(items=created)
+
+@router.patch("/batch", response_model=PantryBatchResponse)
+async def update_pantry_items(
+    updates: List[PantryItemBatchUpdate],
+    atomic: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Update many pantry items in one transaction.
+    Items are locked with a single SELECT ... FOR UPDATE and written in
+    one flush, which batches rows that change the same columns into one
+    executemany UPDATE. Unknown ids are reported per item; with
+    atomic=true (default) any error rolls back the whole batch.
+    """
+    _check_batch_size(len(updates))
+    ids = [update.id for update in updates]
+    result = await db.execute(
+        select(PantryItem).where(
+            PantryItem.id.in_(ids),
+            PantryItem.user_id == current_user.id
+        ).with_for_update()
+    )
+    db_items = {item.id: item for item in result.scalars()}
+
+    updated, errors, seen = [], [], set()
+    for index, item_update in enumerate(updates):
+        db_item = db_items.get(item_update.id)
+        if db_item is None:
+            errors.append(PantryBatchError(index=index, id=item_update.id, detail=ITEM_NOT_FOUND))
+            continue
+        if item_update.id in seen:
+            errors.append(PantryBatchError(index=index, id=item_update.id, detail="Duplicate id in batch"))
+            continue
+        seen.add(item_update.id)
+
+        for field, value in item_update.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(db_item, field, value)
+        updated.append(db_item)
+
+    if errors and atomic:
+        await db.rollback()
+        _raise_batch_errors(errors)
+
+    if updated:
+        version = await bump_pantry_version(db, current_user.id)
+        for db_item in updated:
+            db_item.change_seq = version
+    await db.commit()
+    return PantryBatchResponse(items=updated, errors=errors)
+
+@router.delete("/batch", response_model=PantryBatchResponse)
+async def delete_pantry_items(
+    ids: List[str] = Body(...),
+    atomic: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete many pantry items with one DELETE ... RETURNING.
+    Ids that don't exist (or aren't yours) are reported per item; with
+    atomic=true (default) nothing is deleted if any id is unknown.
+    """
+    _check_batch_size(len(ids))
+    result = await db.execute(
+        delete(PantryItem).where(
+            PantryItem.id.in_(ids),
+            PantryItem.user_id == current_user.id
+        ).returning(PantryItem.id)
+    )
+    deleted = set(result.scalars())
+
+    errors = [
+        PantryBatchError(index=index, id=item_id, detail=ITEM_NOT_FOUND)
+        for index, item_id in enumerate(ids)
+        if item_id not in deleted
+    ]
+    if errors and atomic:
+        await db.rollback()
+        _raise_batch_errors(errors)
+
+    if deleted:
+        version = await bump_pantry_version(db, current_user.id)
+        await record_deletions(db, current_user.id, list(deleted), version)
+    await db.commit()
+    return PantryBatchResponse(
+        deleted_ids=[item_id for item_id in dict.fromkeys(ids) if item_id in deleted],
+        errors=errors
+    )
+
+@router.get("/expiring", response_model=List[PantryItemResponse])
+async def get_expiring_items(
+    days: int = 3,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get items expiring within specified days"""
+    result = await db.execute(
+        select(*pantry_items.columns(PantryItem)).where(
+            PantryItem.user_id == current_user.id,
+            *expiring_items_filter(days)
+        ).order_by(PantryItem.expires_at)
+    )
+
+    return pantry_items.response(result.all())
 
 @router.get("/{item_id}", response_model=PantryItemResponse)
 async def get_pantry_item(
     item_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific pantry item"""
-    item = db.query(PantryItem).filter(
-        PantryItem.id == item_id,
-        PantryItem.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(PantryItem).where(
+            PantryItem.id == item_id,
+            PantryItem.user_id == current_user.id
+        )
+    )
+    item = result.scalar_one_or_none()
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -45,18 +294,20 @@ async def get_pantry_item(
 async def create_pantry_item(
     item: PantryItemCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new pantry item"""
+    version = await bump_pantry_version(db, current_user.id)
     db_item = PantryItem(
         id=str(uuid.uuid4()),
         user_id=current_user.id,
+        change_seq=version,
         **item.model_dump()
     )
     
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     
     return db_item
 
@@ -65,13 +316,16 @@ async def update_pantry_item(
     item_id: str,
     item_update: PantryItemUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a pantry item"""
-    db_item = db.query(PantryItem).filter(
-        PantryItem.id == item_id,
-        PantryItem.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(PantryItem).where(
+            PantryItem.id == item_id,
+            PantryItem.user_id == current_user.id
+        )
+    )
+    db_item = result.scalar_one_or_none()
     
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -80,9 +334,10 @@ async def update_pantry_item(
     update_data = item_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_item, field, value)
+    db_item.change_seq = await bump_pantry_version(db, current_user.id)
     
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
     
     return db_item
 
@@ -90,52 +345,41 @@ async def update_pantry_item(
 async def delete_pantry_item(
     item_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a pantry item"""
-    db_item = db.query(PantryItem).filter(
-        PantryItem.id == item_id,
-        PantryItem.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(PantryItem).where(
+            PantryItem.id == item_id,
+            PantryItem.user_id == current_user.id
+        )
+    )
+    db_item = result.scalar_one_or_none()
     
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    db.delete(db_item)
-    db.commit()
-
-@router.get("/expiring", response_model=List[PantryItemResponse])
-async def get_expiring_items(
-    days: int = 3,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get items expiring within specified days"""
-    expiring_date = datetime.utcnow() + timedelta(days=days)
-    
-    items = db.query(PantryItem).filter(
-        PantryItem.user_id == current_user.id,
-        PantryItem.expires_at <= expiring_date,
-        PantryItem.expires_at >= datetime.utcnow(),
-        PantryItem.storage_location != "freezer"
-    ).order_by(PantryItem.expires_at).all()
-    
-    return items
+    await db.delete(db_item)
+    version = await bump_pantry_version(db, current_user.id)
+    await record_deletions(db, current_user.id, [item_id], version)
+    await db.commit()
 
 @router.post("/clear-expiring", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_expiring_items(
     days: int = 3,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete items expiring within specified days"""
-    expiring_date = datetime.utcnow() + timedelta(days=days)
-    
-    db.query(PantryItem).filter(
-        PantryItem.user_id == current_user.id,
-        PantryItem.expires_at <= expiring_date,
-        PantryItem.expires_at >= datetime.utcnow(),
-        PantryItem.storage_location != "freezer"
-    ).delete()
+    result = await db.execute(
+        delete(PantryItem).where(
+            PantryItem.user_id == current_user.id,
+            *expiring_items_filter(days)
+        ).returning(PantryItem.id)
+    )
+    deleted_ids = list(result.scalars())
     
-    db.commit()
\ No newline at end of file
+    if deleted_ids:
+        version = await bump_pantry_version(db, current_user.id)
+        await record_deletions(db, current_user.id, deleted_ids, version)
+    await db.commit()
\ No newline at end of file
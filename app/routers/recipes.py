@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.config import get_settings
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.recipe import Recipe
+from app.models.user import User
+from app.schemas.recipe import RecipeMatchResponse, RecipeSearchHit, SubstitutionResponse
+from app.services.recipe_matching import load_pantry_terms, recipe_index
+from app.services.recipe_search import SearchFilters, search_recipes
+from app.services.substitutions import recipe_substitutions
+from app.utils.dietary import profile_mask
+from app.utils.pagination import encode_cursor, decode_cursor
+
+settings = get_settings()
+
+router = APIRouter(prefix="/recipes", tags=["recipes"])
+
+@router.get("/match", response_model=List[RecipeMatchResponse])
+async def match_recipes(
+    limit: int = Query(20, ge=1, le=100),
+    max_missing: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Recipes the user can cook with what's in their pantry, best first.
+    Favors recipes that use items about to expire and leaves out anything
+    the user's diet or food exclusions rule out. `max_missing` caps how
+    many ingredients the user would still have to buy.
+    """
+    await recipe_index.ensure_fresh(db, settings.recipe_index_refresh_seconds)
+    pantry = await load_pantry_terms(db, current_user.id)
+    _, excluded_terms = profile_mask(current_user.primary_diet_type, current_user.food_exclusions)
+    matches = recipe_index.match(
+        pantry,
+        limit=limit,
+        max_missing=max_missing,
+        exclude_mask=current_user.exclusion_mask or 0,
+        exclude_terms=excluded_terms
+    )
+    if not matches:
+        return []
+
+    result = await db.execute(
+        select(Recipe).where(Recipe.id.in_([m.recipe_id for m in matches]))
+    )
+    recipes = {recipe.id: recipe for recipe in result.scalars()}
+    return [
+        RecipeMatchResponse(
+            recipe=recipes[m.recipe_id],
+            score=m.score,
+            coverage=m.coverage,
+            missing_count=m.missing_count,
+            missing_ingredients=m.missing_ingredients,
+            expiring_ingredients=m.expiring_ingredients
+        )
+        for m in matches
+        # Deleted since the index last refreshed
+        if m.recipe_id in recipes
+    ]
+
+@router.get("/search", response_model=List[RecipeSearchHit])
+async def search(
+    response: Response,
+    q: Optional[str] = Query(None, max_length=200),
+    cuisine: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    ingredients: Optional[List[str]] = Query(None),
+    respect_profile: bool = True,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search recipes by name, cuisine and tags, typo-tolerant, best match
+    first. `tags` must all be present; `ingredients` matches recipes with
+    any of them as a main ingredient. Recipes the user's diet or food
+    exclusions rule out are hidden unless `respect_profile=false`. The
+    next page's cursor comes back in the X-Next-Cursor header.
+    """
+    after = None
+    if cursor:
+        rank, recipe_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(rank), recipe_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    filters = SearchFilters(
+        q=q, cuisine=cuisine, tags=tags, ingredients=ingredients,
+        exclude_mask=(current_user.exclusion_mask or 0) if respect_profile else 0
+    )
+    hits = await search_recipes(db, filters, limit=limit + 1, after=after)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        last, rank = hits[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(repr(rank), last.id)
+    return [RecipeSearchHit(recipe=recipe, rank=rank) for recipe, rank in hits]
+
+@router.get("/{recipe_id}/substitutions", response_model=List[SubstitutionResponse])
+async def substitutions(
+    recipe_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Substitutes for the recipe's ingredients that the user's diet or food
+    exclusions rule out (listed first) or that aren't in the pantry,
+    preferring substitutes the pantry already has.
+    """
+    exists = await db.scalar(select(Recipe.id).where(Recipe.id == recipe_id))
+    if not exists:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return await recipe_substitutions(db, current_user, [recipe_id])
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.shopping import ShoppingListResponse
+from app.services.shopping import get_shopping_list
+
+router = APIRouter(prefix="/shopping", tags=["shopping"])
+
+@router.get("/{week_plan_id}", response_model=ShoppingListResponse)
+async def shopping_list(
+    week_plan_id: str,
+    servings: Optional[int] = Query(None, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Everything the week plan's meals need, summed across recipes with
+    units converted, minus what the pantry already has. Pass `servings`
+    to scale every recipe to that many portions. Items the pantry fully
+    covers come back under `covered`.
+    """
+    result = await get_shopping_list(db, current_user.id, week_plan_id, servings)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Week plan not found")
+    return result
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_admin_user, get_current_user
+from app.models.user import User
+from app.schemas.telemetry import TelemetryBatch, TelemetryIngestResponse, TelemetryRollupPoint
+from app.services.telemetry import BufferFull, telemetry_buffer
+from app.services.telemetry_storage import query_hourly_rollups
+
+MAX_ROLLUP_RANGE = timedelta(days=92)
+
+def _naive_utc(moment: datetime) -> datetime:
+    # Event times are stored as naive UTC
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _rollup_range(start: datetime, end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    start = _naive_utc(start)
+    end = _naive_utc(end) if end else datetime.utcnow()
+    if end <= start or end - start > MAX_ROLLUP_RANGE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"end must be after start and within {MAX_ROLLUP_RANGE.days} days of it"
+        )
+    return start, end
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+@router.post("/events", response_model=TelemetryIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_events(
+    batch: TelemetryBatch,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Accept a batch of client events. They are buffered in memory and
+    written in bulk shortly after, so this returns before they hit the DB.
+    Returns 503 with Retry-After when the buffer is saturated; none of
+    the batch was kept then, so resend all of it.
+    """
+    try:
+        accepted = await telemetry_buffer.enqueue(current_user.id, batch.events)
+    except BufferFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Telemetry buffer full: {e}",
+            headers={"Retry-After": "1"}
+        )
+    return TelemetryIngestResponse(accepted=accepted)
+
+@router.get("/rollups", response_model=List[TelemetryRollupPoint])
+async def get_rollups(
+    start: datetime,
+    end: Optional[datetime] = None,
+    event_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Hourly counts of the current user's events per event type in
+    [start, end), read from the rollup table rather than raw events.
+    """
+    start, end = _rollup_range(start, end)
+    return await query_hourly_rollups(db, start, end, event_type=event_type, user_id=current_user.id)
+
+@router.get("/rollups/all", response_model=List[TelemetryRollupPoint])
+async def get_all_rollups(
+    start: datetime,
+    end: Optional[datetime] = None,
+    event_type: Optional[str] = None,
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Same as /rollups but counted over every user's events. Admins only."""
+    start, end = _rollup_range(start, end)
+    return await query_hourly_rollups(db, start, end, event_type=event_type)
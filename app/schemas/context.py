@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict
+
+class ContextResponse(BaseModel):
+    version: str
+    built_at: datetime
+    data: Dict[str, Any]
+    text: str  # compact form used in prompts
+
+    class Config:
+        from_attributes = True
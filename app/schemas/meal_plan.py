@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class MealPlanResponse(BaseModel):
+    id: str
+    recipe_id: str
+    day: str
+    meal_type: str
+
+    class Config:
+        from_attributes = True
+
+class WeekPlanResponse(BaseModel):
+    id: str
+    user_id: str
+    week_of: datetime
+    created_at: Optional[datetime] = None
+    shared_ingredients: List[str]
+    meals: List[MealPlanResponse]
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class PantryItemBase(BaseModel):
     name: str
@@ -28,4 +28,23 @@ class PantryItemResponse(PantryItemBase):
     added_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PantryItemBatchUpdate(PantryItemUpdate):
+    id: str
+
+class PantryBatchError(BaseModel):
+    index: int  # position in the request list
+    id: Optional[str] = None
+    detail: str
+
+class PantryBatchResponse(BaseModel):
+    items: List[PantryItemResponse] = []
+    deleted_ids: List[str] = []
+    errors: List[PantryBatchError] = []
+
+class PantryChangesResponse(BaseModel):
+    cursor: int  # pass back as ?since= on the next sync
+    reset: bool = False  # True: `items` is the full pantry, drop local state
+    items: List[PantryItemResponse] = []
+    deleted_ids: List[str] = []
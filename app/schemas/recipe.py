@@ -0,0 +1,50 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, List, Optional
+
+class RecipeResponse(BaseModel):
+    id: str
+    name: str
+    cook_time: int
+    servings: int
+    calories: int
+    ingredients: List[Any]
+    main_ingredients: List[str]
+    instructions: List[Any]
+    tags: Optional[List[str]] = None
+    cuisine: Optional[str] = None
+    prep_complexity: str
+    protein: Optional[str] = None
+    grain: Optional[str] = None
+    vegetable: Optional[str] = None
+    image_url: Optional[str] = None
+    source_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class RecipeMatchResponse(BaseModel):
+    recipe: RecipeResponse
+    score: float
+    coverage: float  # weighted share of the recipe's ingredients already in the pantry
+    missing_count: int
+    missing_ingredients: List[str]
+    expiring_ingredients: List[str]  # pantry items close to expiry this recipe uses
+
+class RecipeSearchHit(BaseModel):
+    recipe: RecipeResponse
+    rank: float
+
+class SubstitutionResponse(BaseModel):
+    ingredient: str
+    reason: str  # missing | excluded
+    substitute: Optional[str] = None
+    ratio: Optional[float] = None
+    note: Optional[str] = None
+    in_pantry: bool = False
+    contains: List[str] = []
+    recipe_ids: List[str] = []
+
+    class Config:
+        from_attributes = True
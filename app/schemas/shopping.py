@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class ShoppingItemResponse(BaseModel):
+    name: str
+    unit: Optional[str] = None  # None when recipes give no amount
+    required: Optional[float] = None
+    in_pantry: Optional[float] = None
+    to_buy: Optional[float] = None
+    recipe_ids: List[str]
+
+    class Config:
+        from_attributes = True
+
+class ShoppingListResponse(BaseModel):
+    week_plan_id: str
+    servings: Optional[int] = None
+    pantry_version: int
+    items: List[ShoppingItemResponse]
+    covered: List[ShoppingItemResponse]
+
+    class Config:
+        from_attributes = True
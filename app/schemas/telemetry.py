@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class TelemetryEventIn(BaseModel):
+    event_type: str = Field(min_length=1, max_length=100)
+    event_data: Dict[str, Any] = {}
+    timestamp: Optional[datetime] = None  # client time; defaults to receipt
+
+class TelemetryBatch(BaseModel):
+    events: List[TelemetryEventIn] = Field(min_length=1, max_length=500)
+
+class TelemetryIngestResponse(BaseModel):
+    accepted: int
+
+class TelemetryRollupPoint(BaseModel):
+    bucket: datetime  # start of the hour (UTC)
+    event_type: str
+    count: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,240 @@
+"""
+Per-user context snapshots for AI and planning features.
+
+A snapshot bundles what those features need to know about a user: the
+profile, the unexpired pantry, what is about to expire, and the most
+recent week plans. build_context() loads all of it in one query (the
+pantry and the plans as one UNION ALL, left-joined to the user row, so
+it runs on SQLite too) and renders it twice: `data` for API clients,
+and `text`, a terse line-per-section form that costs a fraction of the
+tokens of the JSON in a prompt.
+
+Snapshots are cached under the user's context version, a hash of
+everything the bundle depends on:
+
+- the pantry version, which every pantry write bumps
+- users.updated_at, which every profile write bumps
+- how many week plans the user has and how many meals the recent ones
+  hold, which change when plans are generated or streamed in
+- today's date, because expiry countdowns move daily
+
+Checking the version costs one small indexed query, so a cache hit
+stays correct across workers without any explicit invalidation.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, Float, String, cast, func, literal_column, null, or_, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.pantry import PantryItem, PantryVersion
+from app.models.recipe import Recipe
+from app.models.user import User
+from app.services.meal_generation import WEEKDAYS
+from app.services.recipe_matching import MEAL_TYPES
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+@dataclass
+class ContextSnapshot:
+    user_id: str
+    version: str
+    built_at: datetime
+    data: dict
+    text: str
+
+    @property
+    def etag(self) -> str:
+        return f'W/"context-{self.version}"'
+
+# (user id, context version) -> ContextSnapshot
+context_cache = TTLCache(
+    max_size=settings.context_cache_max_size,
+    ttl=settings.context_cache_ttl_seconds,
+    name="contexts"
+)
+
+def _recent_plans(user_id: str):
+    return (
+        select(WeekPlan.id, WeekPlan.week_of, WeekPlan.created_at)
+        .where(WeekPlan.user_id == user_id)
+        .order_by(WeekPlan.created_at.desc())
+        .limit(settings.context_recent_plans)
+        .subquery()
+    )
+
+async def context_version(db: AsyncSession, user_id: str) -> Optional[str]:
+    """None if the user doesn't exist"""
+    recent = _recent_plans(user_id)
+    row = (await db.execute(
+        select(
+            User.updated_at,
+            select(PantryVersion.version).where(PantryVersion.user_id == user_id).scalar_subquery(),
+            select(func.count(WeekPlan.id)).where(WeekPlan.user_id == user_id).scalar_subquery(),
+            select(func.count(MealPlan.id)).join(recent, MealPlan.week_plan_id == recent.c.id).scalar_subquery()
+        ).where(User.id == user_id)
+    )).one_or_none()
+    if row is None:
+        return None
+    parts = [*row, datetime.utcnow().date()]
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+def _days_left(expires_at: Optional[datetime], now: datetime) -> Optional[int]:
+    if expires_at is None:
+        return None
+    return max((expires_at - now).days, 0)
+
+def _number(value) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+def render(data: dict) -> str:
+    """
+    Terse text form of a snapshot's data, one line per section:
+
+        profile: diet vegetarian; avoid cilantro; prep <=30 min; ...
+        pantry: chicken 1 kg (2d); rice 2 kg; ...
+        expiring: milk 1d, chicken 2d
+        plan 2026-10-12: Mon oatmeal / lentil soup / chicken curry; Tue ...
+    """
+    profile = data["profile"]
+    fields = []
+    labels = [
+        ("diet", "diet"), ("exclusions", "avoid"), ("goals", "goals"), ("activity_level", "activity"),
+        ("body_weight", "weight"), ("budget", "budget"), ("meal_layout", "meals"),
+        ("cooking_days", "cooks"),
+    ]
+    for key, label in labels:
+        value = profile.get(key)
+        if value:
+            fields.append(f"{label} {', '.join(value) if isinstance(value, list) else _number(value)}")
+    if profile.get("prep_time"):
+        fields.append(f"prep <={profile['prep_time']} min")
+    lines = [f"profile: {'; '.join(fields) or 'none'}"]
+
+    items = []
+    for item in data["pantry"]:
+        entry = f"{item['name']} {_number(item['quantity'])} {item['unit']}".rstrip()
+        if item["expires_in_days"] is not None:
+            entry += f" ({item['expires_in_days']}d)"
+        items.append(entry)
+    lines.append(f"pantry: {'; '.join(items) or 'empty'}")
+    if data["expiring"]:
+        lines.append("expiring: " + ", ".join(f"{item['name']} {item['expires_in_days']}d" for item in data["expiring"]))
+
+    for plan in data["recent_plans"]:
+        days = {}
+        for meal in plan["meals"]:
+            days.setdefault(meal["day"][:3], []).append(meal["recipe"])
+        lines.append(f"plan {plan['week_of']}: " + "; ".join(f"{day} {' / '.join(recipes)}" for day, recipes in days.items()))
+    return "\n".join(lines)
+
+async def build_context(db: AsyncSession, user_id: str, version: str) -> Optional[ContextSnapshot]:
+    """Load and render the bundle in one query"""
+    now = datetime.utcnow()
+    # Pantry items and recent meals share one column layout (UNION ALL)
+    pantry = select(
+        literal_column("'pantry'", String).label("source"),
+        PantryItem.name.label("name"),
+        PantryItem.unit.label("detail"),
+        PantryItem.storage_location.label("day"),
+        cast(null(), String).label("meal_type"),
+        PantryItem.quantity.label("quantity"),
+        PantryItem.expires_at.label("moment"),
+        cast(null(), DateTime).label("week_of")
+    ).where(
+        PantryItem.user_id == user_id,
+        or_(PantryItem.expires_at.is_(None), PantryItem.expires_at >= now)
+    )
+    recent = _recent_plans(user_id)
+    plans = select(
+        literal_column("'plan'", String),
+        recent.c.id,
+        Recipe.name,
+        MealPlan.day,
+        MealPlan.meal_type,
+        cast(null(), Float),
+        recent.c.created_at,
+        recent.c.week_of
+    ).select_from(recent).join(
+        MealPlan, MealPlan.week_plan_id == recent.c.id
+    ).join(Recipe, Recipe.id == MealPlan.recipe_id)
+    bundle = union_all(pantry, plans).subquery("bundle")
+
+    # Left-joined to the user row, so a user with neither still comes back
+    rows = (await db.execute(
+        select(User, bundle).outerjoin(bundle, true()).where(User.id == user_id)
+    )).all()
+    if not rows:
+        return None
+    user = rows[0][0]
+    pantry_rows, plan_rows = [], []
+    for _, source, name, detail, day, meal_type, quantity, moment, week_of in rows:
+        if source == "pantry":
+            pantry_rows.append((name, quantity, detail, moment, day))
+        elif source == "plan":
+            plan_rows.append((moment, name, week_of, day, meal_type, detail))
+    pantry_rows.sort(key=lambda row: row[0])
+    plan_rows.sort(key=lambda row: row[0], reverse=True)
+
+    profile = {
+        "diet": user.primary_diet_type,
+        "exclusions": sorted(user.food_exclusions or []),
+        "goals": list(user.goals or []),
+        "activity_level": user.activity_level,
+        "body_weight": user.body_weight,
+        "budget": user.budget,
+        "meal_layout": user.meal_layout,
+        "cooking_days": list(user.preferred_cooking_days or []),
+        "prep_time": user.typical_prep_time,
+    }
+    pantry_items = [
+        {
+            "name": name,
+            "quantity": quantity,
+            "unit": unit,
+            "location": location,
+            "expires_in_days": _days_left(expires_at, now),
+        }
+        for name, quantity, unit, expires_at, location in pantry_rows
+    ]
+    expiring = sorted(
+        (item for item in pantry_items
+         if item["expires_in_days"] is not None and item["expires_in_days"] <= settings.context_expiring_days),
+        key=lambda item: (item["expires_in_days"], item["name"])
+    )
+
+    recent_plans: List[dict] = []
+    by_id = {}
+    for _, plan_id, week_of, day, meal_type, recipe in plan_rows:
+        if plan_id not in by_id:
+            by_id[plan_id] = {"week_of": week_of.date().isoformat(), "meals": []}
+            recent_plans.append(by_id[plan_id])
+        by_id[plan_id]["meals"].append({"day": day, "meal_type": meal_type, "recipe": recipe})
+    slot_order = {(day, meal_type): (i, j) for i, day in enumerate(WEEKDAYS) for j, meal_type in enumerate(MEAL_TYPES)}
+    for plan in recent_plans:
+        plan["meals"].sort(key=lambda meal: slot_order.get((meal["day"], meal["meal_type"]), (7, 0)))
+
+    data = {
+        "profile": {key: value for key, value in profile.items() if value not in (None, "", [])},
+        "pantry": pantry_items,
+        "expiring": expiring,
+        "recent_plans": recent_plans,
+    }
+    return ContextSnapshot(user_id=user_id, version=version, built_at=now, data=data, text=render(data))
+
+async def get_context(db: AsyncSession, user_id: str) -> Optional[ContextSnapshot]:
+    """The user's snapshot, rebuilt only when its version moved"""
+    version = await context_version(db, user_id)
+    if version is None:
+        return None
+    snapshot = context_cache.get((user_id, version))
+    if snapshot is None:
+        snapshot = await build_context(db, user_id, version)
+        if snapshot is not None:
+            context_cache.set((user_id, version), snapshot)
+    return snapshot
@@ -1,16 +1,117 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 from app.config import get_settings
+from app.utils.metrics import external_call
+from datetime import datetime
+from html import escape
+from typing import TYPE_CHECKING, List, Optional
+import asyncio
+import httpx
 import logging
 
+# The SendGrid helpers only build payloads; they're imported where used
+# so loading this module (and starting the API) doesn't pay for them
+if TYPE_CHECKING:
+    from sendgrid.helpers.mail import Mail
+
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# SendGrid accepts at most 1000 personalizations per /mail/send call
+MAX_PERSONALIZATIONS = 1000
+
+class SendGridSender:
+    """
+    Posts Mail payloads to the SendGrid v3 API over one pooled async
+    connection, with at most `max_concurrency` calls in flight.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.sendgrid.com",
+        max_concurrency: int = 4,
+        timeout: float = 30
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def send(self, payload: dict) -> int:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=self.max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            with external_call("sendgrid"):
+                response = await self._client.post("/v3/mail/send", json=payload)
+                response.raise_for_status()
+        return response.status_code
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class StubEmailSender:
+    """Records payloads instead of sending them, for local runs and tests"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent: List[dict] = []
+
+    async def send(self, payload: dict) -> int:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append(payload)
+        return 202
+
+    async def aclose(self):
+        pass
+
+def _expiring_items_html(expiring_items: list, now: datetime) -> str:
+    items_html = "<ul>"
+    for item in expiring_items:
+        days_left = (item.expires_at - now).days
+        items_html += f"<li>{escape(item.name)} - expires in {days_left} days</li>"
+    items_html += "</ul>"
+    return items_html
+
+def _expiring_items_body(user_name: str, items_html: str) -> str:
+    return f"""
+            <html>
+                <body>
+                    <h2>Hey {user_name}!</h2>
+                    <p>You have some pantry items expiring soon:</p>
+                    {items_html}
+                    <p>Consider using these ingredients in your next meal plan!</p>
+                    <a href="{settings.frontend_url}/plan">Plan Your Week</a>
+                </body>
+            </html>
+            """
+
 class EmailService:
-    def __init__(self):
-        self.client = SendGridAPIClient(settings.sendgrid_api_key)
+    def __init__(self, sender=None):
+        self.sender = sender or SendGridSender(
+            settings.sendgrid_api_key,
+            max_concurrency=settings.email_max_concurrency
+        )
         self.from_email = settings.from_email
-    
+
+    async def _send(self, message: "Mail", description: str) -> bool:
+        try:
+            status_code = await self.sender.send(message.get())
+            logger.info(f"Email sent to {description}: {status_code}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send email to {description}: {e}")
+            return False
+
     async def send_expiring_items_notification(
         self,
         to_email: str,
@@ -18,36 +119,56 @@ class EmailService:
         expiring_items: list
     ):
         """Send email notification for expiring pantry items"""
-        
-        items_html = "<ul>"
-        for item in expiring_items:
-            days_left = (item.expires_at - datetime.utcnow()).days
-            items_html += f"<li>{item.name} - expires in {days_left} days</li>"
-        items_html += "</ul>"
-        
+        from sendgrid.helpers.mail import Mail
+
+        items_html = _expiring_items_html(expiring_items, datetime.utcnow())
+
         message = Mail(
             from_email=self.from_email,
             to_emails=to_email,
             subject="🥗 Pantry Items Expiring Soon!",
-            html_content=f"""
-            <html>
-                <body>
-                    <h2>Hey {user_name}!</h2>
-                    <p>You have some pantry items expiring soon:</p>
-                    {items_html}
-                    <p>Consider using these ingredients in your next meal plan!</p>
-                    <a href="{settings.frontend_url}/plan">Plan Your Week</a>
-                </body>
-            </html>
-            """
+            html_content=_expiring_items_body(escape(user_name), items_html)
         )
-        
+
+        return await self._send(message, to_email)
+
+    def build_expiring_items_batch(self, recipients: list, now: datetime = None) -> dict:
+        """
+        One /mail/send payload for many users: the body is shared and each
+        recipient gets a personalization carrying their name and item list.
+        `recipients` is a list of (email, user_name, expiring_items).
+        """
+        from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
+
+        if len(recipients) > MAX_PERSONALIZATIONS:
+            raise ValueError(f"At most {MAX_PERSONALIZATIONS} recipients per call")
+
+        now = now or datetime.utcnow()
+        message = Mail(
+            from_email=self.from_email,
+            subject="🥗 Pantry Items Expiring Soon!",
+            html_content=_expiring_items_body("-name-", "-items-")
+        )
+        for to_email, user_name, expiring_items in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(to_email))
+            personalization.add_substitution(Substitution("-name-", escape(user_name)))
+            personalization.add_substitution(
+                Substitution("-items-", _expiring_items_html(expiring_items, now))
+            )
+            message.add_personalization(personalization)
+        return message.get()
+
+    async def send_expiring_items_batch(self, recipients: list) -> bool:
+        """Send the expiring-items email to up to 1000 users in one API call"""
         try:
-            response = self.client.send(message)
-            logger.info(f"Email sent to {to_email}: {response.status_code}")
+            status_code = await self.sender.send(self.build_expiring_items_batch(recipients))
+            logger.info(f"Expiring-items email sent to {len(recipients)} users: {status_code}")
+            return True
         except Exception as e:
-            logger.error(f"Failed to send email: {e}")
-    
+            logger.error(f"Failed to send expiring-items batch of {len(recipients)}: {e}")
+            return False
+
     async def send_week_plan_ready(
         self,
         to_email: str,
@@ -55,6 +176,8 @@ class EmailService:
         week_plan_id: str
     ):
         """Send email when week plan is generated"""
+        from sendgrid.helpers.mail import Mail
+
         message = Mail(
             from_email=self.from_email,
             to_emails=to_email,
@@ -62,18 +185,15 @@ class EmailService:
             html_content=f"""
             <html>
                 <body>
-                    <h2>Hi {user_name}!</h2>
+                    <h2>Hi {escape(user_name)}!</h2>
                     <p>Your meal plan for this week is ready.</p>
                     <a href="{settings.frontend_url}/plan">View Your Plan</a>
                 </body>
             </html>
             """
         )
-        
-        try:
-            response = self.client.send(message)
-            logger.info(f"Email sent to {to_email}: {response.status_code}")
-        except Exception as e:
-            logger.error(f"Failed to send email: {e}")
 
-email_service = EmailService()
\ No newline at end of file
+        return await self._send(message, to_email)
+
+    async def aclose(self):
+        await self.sender.aclose()
@@ -0,0 +1,212 @@
+"""
+Local weekly meal-plan generation, no LLM call involved.
+
+plan_week() picks the best few hundred candidate recipes for the user
+from the in-memory RecipeIndex (pantry coverage, diet mask, prep time),
+builds the recipe-to-recipe ingredient-overlap matrix for those
+candidates once, and then fills the week's slots greedily: each pick
+scores its pantry coverage, the still-unused expiring pantry items it
+would use up, and how many ingredients it shares with what is already on
+the plan (so one bunch of cilantro serves three meals). Ties break on
+index order, so the same inputs always give the same week.
+
+generate_week_plan() wraps it for the API: it persists the result as a
+WeekPlan and caches the plan id under a fingerprint of the profile, the
+pantry version and the catalog generation, so asking again without any
+of those changing returns the stored plan.
+"""
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import get_settings
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.user import User
+from app.services.pantry import get_pantry_version
+from app.services.recipe_matching import (
+    MEAL_TYPE_BITS, RecipeIndex, load_pantry_terms, recipe_index
+)
+from app.utils.cache import TTLCache
+from app.utils.dietary import profile_mask
+
+settings = get_settings()
+
+class NoRecipesFit(Exception):
+    """No recipe in the catalog fits the user's diet, exclusions and prep time"""
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Weights of the greedy objective; coverage is in [0, 1]
+EXPIRY_WEIGHT = 0.5
+REUSE_WEIGHT = 0.3
+
+@dataclass
+class PlannedMeal:
+    day: str
+    meal_type: str
+    recipe_id: str
+
+@dataclass
+class PlanDraft:
+    meals: List[PlannedMeal] = field(default_factory=list)
+    shared_ingredients: List[str] = field(default_factory=list)
+    candidates: int = 0
+
+def plan_slots(meal_layout: Optional[str], cooking_days: Optional[List[str]]) -> List[Tuple[str, str]]:
+    """(day, meal_type) pairs in week order, e.g. meal_layout 'lunch-dinner'"""
+    meal_types = [m for m in (meal_layout or "breakfast-lunch-dinner").lower().split("-") if m in MEAL_TYPE_BITS]
+    wanted = {day.capitalize() for day in cooking_days or []}
+    days = [day for day in WEEKDAYS if day in wanted] or WEEKDAYS
+    return [(day, meal_type) for day in days for meal_type in meal_types or ["dinner"]]
+
+def plan_week(
+    index: RecipeIndex,
+    pantry: Dict[str, float],
+    slots: List[Tuple[str, str]],
+    max_cook_time: Optional[int] = None,
+    exclude_mask: int = 0,
+    exclude_terms: Tuple[str, ...] = (),
+    candidates: Optional[int] = None
+) -> PlanDraft:
+    """Fill `slots` from the index; see the module docstring"""
+    limit = candidates or settings.meal_plan_candidates
+    rows, _, coverage, _ = index.rank(
+        pantry, limit,
+        exclude_mask=exclude_mask, exclude_terms=exclude_terms,
+        max_cook_time=max_cook_time, require_match=False
+    )
+    if max_cook_time is not None and len(rows) < len(slots):
+        # Too few quick recipes; better a longer cook than an empty slot
+        rows, _, coverage, _ = index.rank(
+            pantry, limit,
+            exclude_mask=exclude_mask, exclude_terms=exclude_terms, require_match=False
+        )
+    if len(rows) == 0 or not slots:
+        return PlanDraft()
+
+    # Candidate x ingredient incidence, and the overlap matrix A @ A.T
+    vocabulary: Dict[str, int] = {}
+    entries, columns = [], []
+    for i, row in enumerate(rows.tolist()):
+        for term in index.terms(row):
+            entries.append(i)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+    incidence = np.zeros((len(rows), len(vocabulary)), dtype=np.float32)
+    incidence[entries, columns] = 1.0
+    overlap = incidence @ incidence.T
+    np.fill_diagonal(overlap, 0)
+    sizes = np.maximum(incidence.sum(axis=1), 1)
+
+    urgency = np.zeros(len(vocabulary), dtype=np.float32)
+    for term, value in pantry.items():
+        column = vocabulary.get(term)
+        if column is not None:
+            urgency[column] = value
+
+    base = coverage[rows].astype(np.float32)
+    meal_types = index.meal_types(rows)
+    reuse = np.zeros(len(rows), dtype=np.float32)
+    uses = np.zeros(len(rows), dtype=np.int32)
+    draft = PlanDraft(candidates=len(rows))
+    for day, meal_type in slots:
+        eligible = (meal_types & MEAL_TYPE_BITS[meal_type]) > 0
+        if not eligible.any():
+            eligible = np.ones(len(rows), dtype=bool)
+        # Only repeat a recipe once every eligible one is on the plan
+        eligible &= uses == uses[eligible].min()
+        gain = base + EXPIRY_WEIGHT * (incidence @ urgency) + REUSE_WEIGHT * reuse / sizes
+        gain[~eligible] = -np.inf
+        pick = int(np.argmax(gain))
+
+        uses[pick] += 1
+        reuse += overlap[:, pick]
+        urgency[incidence[pick] > 0] = 0  # used up
+        draft.meals.append(PlannedMeal(day, meal_type, index.recipe_id(int(rows[pick]))))
+
+    chosen = np.flatnonzero(uses)
+    shared = np.flatnonzero(incidence[chosen].sum(axis=0) >= 2)
+    terms = list(vocabulary)
+    draft.shared_ingredients = sorted(terms[column] for column in shared.tolist())
+    return draft
+
+def week_start(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+
+def plan_fingerprint(user: User, pantry_version: int, week_of: datetime, generation: int) -> str:
+    """Everything a generated plan depends on; expiry urgency moves daily"""
+    _, excluded_terms = profile_mask(user.primary_diet_type, user.food_exclusions)
+    parts = [
+        user.id, user.meal_layout, ",".join(sorted(user.preferred_cooking_days or [])),
+        user.typical_prep_time, user.exclusion_mask, ",".join(sorted(excluded_terms)),
+        pantry_version, week_of.date(), datetime.utcnow().date(), generation,
+    ]
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+# fingerprint -> week plan id
+plan_cache = TTLCache(
+    max_size=settings.meal_plan_cache_max_size,
+    ttl=settings.meal_plan_cache_ttl_seconds,
+    name="meal_plans"
+)
+
+async def get_week_plan(db: AsyncSession, user_id: str, week_plan_id: str) -> Optional[WeekPlan]:
+    result = await db.execute(
+        select(WeekPlan).options(selectinload(WeekPlan.meals)).where(
+            WeekPlan.id == week_plan_id,
+            WeekPlan.user_id == user_id
+        )
+    )
+    return result.scalar_one_or_none()
+
+async def generate_week_plan(db: AsyncSession, user: User, regenerate: bool = False) -> WeekPlan:
+    """
+    Plan this week for `user` and store it, or return the cached plan.
+    Raises NoRecipesFit, storing nothing, if no slot could be filled.
+    """
+    await recipe_index.ensure_fresh(db, settings.recipe_index_refresh_seconds)
+    week_of = week_start()
+    fingerprint = plan_fingerprint(
+        user, await get_pantry_version(db, user.id), week_of, recipe_index.generation
+    )
+    if not regenerate:
+        cached_id = plan_cache.get(fingerprint)
+        if cached_id:
+            week_plan = await get_week_plan(db, user.id, cached_id)
+            if week_plan is not None:
+                return week_plan
+
+    pantry = await load_pantry_terms(db, user.id)
+    _, excluded_terms = profile_mask(user.primary_diet_type, user.food_exclusions)
+    draft = plan_week(
+        recipe_index, pantry,
+        plan_slots(user.meal_layout, user.preferred_cooking_days),
+        max_cook_time=user.typical_prep_time,
+        exclude_mask=user.exclusion_mask or 0,
+        exclude_terms=tuple(excluded_terms)
+    )
+    if not draft.meals:
+        # Not stored or cached, so the next call tries again
+        raise NoRecipesFit("No recipes fit the profile's diet, exclusions and prep time")
+
+    week_plan = WeekPlan(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        week_of=week_of,
+        shared_ingredients=draft.shared_ingredients,
+        meals=[
+            MealPlan(id=str(uuid.uuid4()), recipe_id=meal.recipe_id, day=meal.day, meal_type=meal.meal_type)
+            for meal in draft.meals
+        ]
+    )
+    db.add(week_plan)
+    await db.commit()
+    plan_cache.set(fingerprint, week_plan.id)
+    return week_plan
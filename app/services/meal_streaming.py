@@ -0,0 +1,387 @@
+"""
+Streamed week-plan generation (GET /api/meal-plans/stream).
+
+The LLM picks one recipe per slot from a shortlist the local planner
+ranked for the user, answering one JSON object per line. Each accepted
+line is written to meal_plans and sent to the client right away, so the
+first meal shows up after one line of output instead of the whole week.
+
+Meals are written and sent in slot order (a line for a later slot waits
+until the earlier ones are in), so the stored meals are always a prefix
+of the week. A client that reconnects with the week_plan_id and its last
+event id gets the meals it missed replayed from the database, and
+generation carries on from the first empty slot. Slots the LLM skips,
+fills with a recipe that isn't on the shortlist, or never gets to
+because the call failed get the local planner's pick instead.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.recipe import Recipe
+from app.models.user import User
+from app.schemas.meal_plan import MealPlanResponse
+from app.services.context import get_context
+from app.services.meal_generation import get_week_plan, plan_slots, plan_week, week_start
+from app.services.recipe_matching import load_pantry_terms, recipe_index
+from app.utils.ai_client import ai_client
+from app.utils.dietary import profile_mask
+from app.utils.percentile import percentile
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+Slot = Tuple[str, str]
+
+SYSTEM_PROMPT = (
+    "You plan a week of home-cooked meals. Pick one recipe for every slot "
+    "from the candidates only, favouring recipes that use up the user's "
+    "expiring pantry items and recipes that share ingredients, and avoid "
+    "repeating a recipe or one of last week's. Answer with one JSON object "
+    "per line and nothing else, in the order the slots are given, e.g.\n"
+    '{"day": "Monday", "meal_type": "dinner", "recipe_id": "..."}'
+)
+
+@dataclass
+class StreamEvent:
+    event: str
+    data: dict
+    id: Optional[str] = None
+
+class StreamStats:
+    """Time-to-first-meal and meal sources across streams, for /health"""
+
+    def __init__(self):
+        self.streams = 0
+        self.resumed = 0
+        self.ai_meals = 0
+        self.planner_meals = 0
+        self.ai_failures = 0
+        self._ttfm: deque = deque(maxlen=1000)
+
+    def record(self, ttfm_ms: Optional[float], resumed: bool, ai_meals: int, planner_meals: int):
+        self.streams += 1
+        self.resumed += resumed
+        self.ai_meals += ai_meals
+        self.planner_meals += planner_meals
+        if ttfm_ms is not None:
+            self._ttfm.append(ttfm_ms)
+
+    def stats(self) -> dict:
+        ttfm = sorted(self._ttfm)
+        return {
+            "streams": self.streams,
+            "resumed": self.resumed,
+            "ai_meals": self.ai_meals,
+            "planner_meals": self.planner_meals,
+            "ai_failures": self.ai_failures,
+            "ttfm_p50_ms": percentile(ttfm, 0.5),
+            "ttfm_p95_ms": percentile(ttfm, 0.95),
+        }
+
+stream_stats = StreamStats()
+
+def event_id(week_plan_id: str, position: int) -> str:
+    return f"{week_plan_id}:{position}"
+
+def parse_event_id(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """Last-Event-ID -> (week_plan_id, meals already received)"""
+    if not value or ":" not in value:
+        return None, 0
+    week_plan_id, _, position = value.rpartition(":")
+    try:
+        return week_plan_id, max(int(position), 0)
+    except ValueError:
+        return None, 0
+
+async def open_week_plan(db: AsyncSession, user: User, week_plan_id: Optional[str] = None) -> Optional[WeekPlan]:
+    """The plan to resume (None if it isn't the user's), or a new empty one"""
+    if week_plan_id:
+        return await get_week_plan(db, user.id, week_plan_id)
+    week_plan = WeekPlan(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        week_of=week_start(),
+        shared_ingredients=[],
+        meals=[]
+    )
+    db.add(week_plan)
+    await db.commit()
+    return week_plan
+
+async def _save_meal(db: AsyncSession, week_plan_id: str, slot: Slot, recipe_id: str) -> MealPlan:
+    day, meal_type = slot
+    stmt = insert(MealPlan).values(
+        id=str(uuid.uuid4()),
+        week_plan_id=week_plan_id,
+        recipe_id=recipe_id,
+        day=day,
+        meal_type=meal_type
+    ).on_conflict_do_nothing(
+        index_elements=[MealPlan.week_plan_id, MealPlan.day, MealPlan.meal_type]
+    ).returning(MealPlan)
+    meal = (await db.execute(stmt)).scalar_one_or_none()
+    if meal is None:
+        # An earlier connection for the same plan filled the slot first
+        result = await db.execute(
+            select(MealPlan).where(
+                MealPlan.week_plan_id == week_plan_id,
+                MealPlan.day == day,
+                MealPlan.meal_type == meal_type
+            )
+        )
+        meal = result.scalar_one()
+    # Also hands the connection back to the pool until the next meal
+    await db.commit()
+    return meal
+
+def _parse_pick(line: str, wanted: Set[Slot], allowed: Set[str]) -> Optional[Tuple[Slot, str]]:
+    line = line.strip().rstrip(",")
+    if not line.startswith("{"):
+        return None
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(value, dict):
+        return None
+    slot = (str(value.get("day", "")).capitalize(), str(value.get("meal_type", "")).lower())
+    recipe_id = str(value.get("recipe_id", ""))
+    if slot not in wanted or recipe_id not in allowed:
+        return None
+    wanted.discard(slot)
+    return slot, recipe_id
+
+_END = object()
+
+async def _pump(chunks: AsyncIterator[str], queue: asyncio.Queue):
+    try:
+        async for chunk in chunks:
+            await queue.put(chunk)
+        await queue.put(_END)
+    except Exception as exc:
+        await queue.put(exc)
+
+async def _ai_picks(
+    db: AsyncSession,
+    user: User,
+    slots: List[Slot],
+    shortlist: List[str]
+) -> AsyncIterator[Optional[Tuple[Slot, str]]]:
+    """
+    Yield (slot, recipe_id) picks as the model's lines arrive, and None
+    whenever it has been quiet for the keepalive interval. The call runs
+    in its own task so waiting for a line can time out without
+    cancelling the stream underneath.
+    """
+    result = await db.execute(
+        select(Recipe.id, Recipe.name, Recipe.cook_time, Recipe.main_ingredients, Recipe.tags)
+        .where(Recipe.id.in_(shortlist))
+    )
+    candidates = {
+        row.id: {
+            "id": row.id,
+            "name": row.name,
+            "cook_time": row.cook_time,
+            "main_ingredients": list(row.main_ingredients or []),
+            "tags": list(row.tags or []),
+        }
+        for row in result
+    }
+    prompt = json.dumps({
+        "slots": [{"day": day, "meal_type": meal_type} for day, meal_type in slots],
+        "candidates": [candidates[recipe_id] for recipe_id in shortlist if recipe_id in candidates],
+    })
+    # Profile, pantry, expiring items and recent plans, in the compact form
+    snapshot = await get_context(db, user.id)
+    system = f"{SYSTEM_PROMPT}\n\nAbout the user:\n{snapshot.text}" if snapshot else SYSTEM_PROMPT
+    # End the read transaction: waiting on the model (and on a free AI
+    # call slot) must not hold a pooled connection idle in transaction
+    await db.commit()
+
+    wanted, allowed = set(slots), set(candidates)
+    queue: asyncio.Queue = asyncio.Queue()
+    pump = asyncio.create_task(_pump(
+        ai_client.stream(
+            prompt, system=system,
+            max_tokens=settings.meal_stream_max_tokens
+        ),
+        queue
+    ))
+    buffer = ""
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.meal_stream_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            buffer += item
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                pick = _parse_pick(line, wanted, allowed)
+                if pick:
+                    yield pick
+        pick = _parse_pick(buffer, wanted, allowed)
+        if pick:
+            yield pick
+    finally:
+        pump.cancel()
+
+def _meal_event(week_plan_id: str, position: int, meal: MealPlan, source: str, started: float) -> StreamEvent:
+    return StreamEvent(
+        event="meal",
+        id=event_id(week_plan_id, position),
+        data={
+            "position": position,
+            "source": source,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "meal": MealPlanResponse.model_validate(meal).model_dump(),
+        }
+    )
+
+async def stream_week_plan(
+    user: User,
+    week_plan: WeekPlan,
+    after: int = 0,
+    use_ai: bool = True,
+    started: Optional[float] = None
+) -> AsyncIterator[Optional[StreamEvent]]:
+    """
+    Events for the client: `plan` first, then one `meal` per slot (ids
+    "<week_plan_id>:<position>"), then `done` with the timings. Stored
+    meals past `after` are replayed before anything new is generated.
+    None means nothing happened for a while (send a keepalive).
+    """
+    started = started or time.perf_counter()
+    slots = plan_slots(user.meal_layout, user.preferred_cooking_days)
+    order = {slot: i for i, slot in enumerate(slots)}
+    stored = sorted(week_plan.meals, key=lambda meal: order.get((meal.day, meal.meal_type), len(slots)))
+    filled = {(meal.day, meal.meal_type) for meal in stored}
+    remaining = [slot for slot in slots if slot not in filled]
+    resumed = bool(stored)
+
+    yield StreamEvent("plan", {
+        "week_plan_id": week_plan.id,
+        "week_of": week_plan.week_of.isoformat(),
+        "slots": len(slots),
+        "stored": len(stored),
+        "resumed": resumed,
+    })
+
+    position = 0
+    first_meal_ms = None
+    for meal in stored:
+        position += 1
+        if position > after:
+            yield _meal_event(week_plan.id, position, meal, "stored", started)
+            first_meal_ms = first_meal_ms or round((time.perf_counter() - started) * 1000, 1)
+
+    ai_meals = planner_meals = 0
+    generated_first_ms = None
+    async with AsyncSessionLocal() as db:
+        if remaining:
+            await recipe_index.ensure_fresh(db, settings.recipe_index_refresh_seconds)
+            pantry = await load_pantry_terms(db, user.id)
+            _, excluded_terms = profile_mask(user.primary_diet_type, user.food_exclusions)
+            options = dict(
+                max_cook_time=user.typical_prep_time,
+                exclude_mask=user.exclusion_mask or 0,
+                exclude_terms=tuple(excluded_terms)
+            )
+            draft = plan_week(recipe_index, pantry, remaining, **options)
+            fallback = {(meal.day, meal.meal_type): meal.recipe_id for meal in draft.meals}
+
+            picks: Dict[Slot, str] = {}
+            next_slot = 0
+            if use_ai and settings.anthropic_api_key and fallback:
+                rows, _, _, _ = recipe_index.rank(
+                    pantry, settings.meal_stream_shortlist, require_match=False, **options
+                )
+                shortlist = list(dict.fromkeys(
+                    [recipe_index.recipe_id(row) for row in rows.tolist()] + list(fallback.values())
+                ))
+                ai = _ai_picks(db, user, remaining, shortlist)
+                try:
+                    while True:
+                        try:
+                            pick = await ai.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        except Exception:
+                            stream_stats.ai_failures += 1
+                            logger.warning(f"AI meal picks failed for plan {week_plan.id}; using the planner", exc_info=True)
+                            break
+                        if pick is None:
+                            yield None
+                            continue
+                        picks[pick[0]] = pick[1]
+                        # Strictly in slot order, so stored meals stay a prefix
+                        while next_slot < len(remaining) and remaining[next_slot] in picks:
+                            slot = remaining[next_slot]
+                            meal = await _save_meal(db, week_plan.id, slot, picks[slot])
+                            next_slot += 1
+                            position += 1
+                            ai_meals += 1
+                            yield _meal_event(week_plan.id, position, meal, "ai", started)
+                            generated_first_ms = generated_first_ms or round((time.perf_counter() - started) * 1000, 1)
+                finally:
+                    await ai.aclose()
+
+            for slot in remaining[next_slot:]:
+                recipe_id = picks.get(slot) or fallback.get(slot)
+                if recipe_id is None:
+                    continue  # empty catalog
+                meal = await _save_meal(db, week_plan.id, slot, recipe_id)
+                position += 1
+                source = "ai" if slot in picks else "planner"
+                ai_meals += source == "ai"
+                planner_meals += source == "planner"
+                yield _meal_event(week_plan.id, position, meal, source, started)
+                generated_first_ms = generated_first_ms or round((time.perf_counter() - started) * 1000, 1)
+
+        # Ingredients used by two or more of the week's recipes
+        meals = (await db.execute(
+            select(MealPlan.recipe_id).where(MealPlan.week_plan_id == week_plan.id)
+        )).scalars().all()
+        counts: Dict[str, int] = {}
+        for recipe_id in set(meals):
+            for term in recipe_index.terms_for(recipe_id):
+                counts[term] = counts.get(term, 0) + 1
+        shared = sorted(term for term, count in counts.items() if count >= 2)
+        await db.execute(update(WeekPlan).where(WeekPlan.id == week_plan.id).values(shared_ingredients=shared))
+        await db.commit()
+
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    first_meal_ms = first_meal_ms or generated_first_ms
+    if remaining:
+        stream_stats.record(generated_first_ms, resumed, ai_meals, planner_meals)
+    logger.info(
+        f"Streamed week plan {week_plan.id}: {position} meals ({ai_meals} ai, {planner_meals} planner), "
+        f"first meal after {first_meal_ms} ms, done after {total_ms} ms"
+    )
+    yield StreamEvent("done", {
+        "week_plan_id": week_plan.id,
+        "meals": position,
+        "ai_meals": ai_meals,
+        "planner_meals": planner_meals,
+        "shared_ingredients": shared,
+        "time_to_first_meal_ms": first_meal_ms,
+        "total_ms": total_ms,
+    }, id=event_id(week_plan.id, position))
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pantry import PantryItem, PantryTombstone, PantryVersion
+
+# A literal, not a bind parameter, so the planner can prove the predicate
+# of the partial index ix_pantry_items_user_expiring.
+NOT_IN_FREEZER = PantryItem.storage_location != literal_column("'freezer'")
+
+def expiring_items_filter(days: int, now: datetime = None) -> list:
+    """WHERE clauses for non-freezer items expiring within `days`"""
+    now = now or datetime.utcnow()
+    return [
+        PantryItem.expires_at <= now + timedelta(days=days),
+        PantryItem.expires_at >= now,
+        NOT_IN_FREEZER
+    ]
+
+async def bump_pantry_version(db: AsyncSession, user_id: str) -> int:
+    """
+    Increment the user's pantry version inside the caller's transaction.
+    Call this from every pantry write, before committing, and stamp the
+    returned value on the rows written (PantryItem.change_seq) or deleted
+    (record_deletions). The upsert row-locks pantry_versions until commit,
+    so a user's writes commit in sequence order.
+    """
+    stmt = insert(PantryVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PantryVersion.user_id],
+        set_={"version": PantryVersion.version + 1}
+    ).returning(PantryVersion.version)
+    result = await db.execute(stmt)
+    return result.scalar_one()
+
+async def get_pantry_version(db: AsyncSession, user_id: str) -> int:
+    """Current pantry version (0 if the user has never written)"""
+    result = await db.execute(
+        select(PantryVersion.version).where(PantryVersion.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+def pantry_etag(version: int) -> str:
+    return f'W/"pantry-{version}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an If-None-Match header against our (weak) ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+async def record_deletions(db: AsyncSession, user_id: str, item_ids: List[str], version: int):
+    """Leave tombstones for deleted items so delta sync can report them"""
+    if not item_ids:
+        return
+    await db.execute(insert(PantryTombstone), [
+        {"item_id": item_id, "user_id": user_id, "change_seq": version}
+        for item_id in item_ids
+    ])
+
+async def get_pantry_changes(db: AsyncSession, user_id: str, since: int) -> dict:
+    """
+    Everything that changed in the user's pantry after sequence `since`.
+
+    Returns `reset=True` with the full pantry when the client has never
+    synced (since=0), when its cursor is ahead of ours, or when the
+    tombstones it would need have been compacted.
+    """
+    result = await db.execute(
+        select(PantryVersion.version, PantryVersion.tombstone_floor)
+        .where(PantryVersion.user_id == user_id)
+    )
+    version, floor = result.one_or_none() or (0, 0)
+
+    reset = since <= 0 or since > version or since < floor
+    items_query = select(PantryItem).where(PantryItem.user_id == user_id)
+    if reset:
+        items_query = items_query.order_by(PantryItem.added_at.desc(), PantryItem.id.desc())
+        deleted_ids = []
+    else:
+        items_query = items_query.where(
+            PantryItem.change_seq > since
+        ).order_by(PantryItem.change_seq)
+        deleted = await db.execute(
+            select(PantryTombstone.item_id).where(
+                PantryTombstone.user_id == user_id,
+                PantryTombstone.change_seq > since
+            ).order_by(PantryTombstone.change_seq)
+        )
+        deleted_ids = list(deleted.scalars())
+
+    items = (await db.execute(items_query)).scalars().all()
+    return {"cursor": version, "reset": reset, "items": items, "deleted_ids": deleted_ids}
+
+async def compact_tombstones(db: AsyncSession, older_than: datetime) -> int:
+    """
+    Delete tombstones older than `older_than` in one statement, raising
+    each affected user's tombstone_floor to the newest sequence removed.
+    Returns the number of users compacted; the caller commits.
+    """
+    removed = delete(PantryTombstone).where(
+        PantryTombstone.deleted_at < older_than
+    ).returning(PantryTombstone.user_id, PantryTombstone.change_seq).cte("removed")
+
+    floors = select(
+        removed.c.user_id,
+        func.max(removed.c.change_seq).label("floor")
+    ).group_by(removed.c.user_id).cte("floors")
+
+    result = await db.execute(
+        update(PantryVersion)
+        .where(PantryVersion.user_id == floors.c.user_id)
+        .values(tombstone_floor=func.greatest(PantryVersion.tombstone_floor, floors.c.floor))
+    )
+    return result.rowcount
@@ -0,0 +1,403 @@
+"""
+"What can I cook with what I have": pantry-aware recipe matching.
+
+RecipeIndex keeps an inverted index from normalized ingredient to the
+recipes that use it, as NumPy arrays, so scoring every recipe in the
+catalog against a pantry is a few bincounts over the postings of the
+ingredients the user owns instead of a Python loop over all recipes.
+
+Each worker holds its own index. It is built from the recipes table on
+first use and kept current by refresh(), which only reads recipes whose
+updated_at moved and drops ids that disappeared.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.pantry import PantryItem
+from app.models.recipe import Recipe
+from app.utils.ingredients import ingredient_name, normalize_ingredient
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MAIN_INGREDIENT_WEIGHT = 2.0
+INGREDIENT_WEIGHT = 1.0
+
+# Assumed to be in every kitchen; they neither count as missing nor as a match
+STAPLES = frozenset({"salt", "pepper", "black pepper", "water", "oil", "olive oil", "vegetable oil"})
+
+# Recipe.tags that place a recipe in a meal slot; untagged recipes count as
+# lunch or dinner
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+MEAL_TYPE_BITS = {meal_type: 1 << bit for bit, meal_type in enumerate(MEAL_TYPES)}
+UNTAGGED_MEAL_TYPES = MEAL_TYPE_BITS["lunch"] | MEAL_TYPE_BITS["dinner"]
+
+def meal_type_mask(tags: Optional[list]) -> int:
+    mask = 0
+    for tag in tags or []:
+        mask |= MEAL_TYPE_BITS.get(str(tag).lower(), 0)
+    return mask or UNTAGGED_MEAL_TYPES
+
+# Re-read changed recipes from slightly before the watermark so rows from
+# transactions that committed late are not skipped
+_REFRESH_OVERLAP = timedelta(seconds=60)
+
+def recipe_terms(ingredients: Optional[list], main_ingredients: Optional[list]) -> Dict[str, float]:
+    """Normalized ingredient -> weight for one recipe, staples left out"""
+    terms: Dict[str, float] = {}
+    for ingredient in ingredients or []:
+        term = normalize_ingredient(ingredient_name(ingredient))
+        if term and term not in STAPLES:
+            terms[term] = INGREDIENT_WEIGHT
+    for ingredient in main_ingredients or []:
+        term = normalize_ingredient(ingredient)
+        if term and term not in STAPLES:
+            terms[term] = MAIN_INGREDIENT_WEIGHT
+    return terms
+
+def expiry_urgency(expires_at: Optional[datetime], now: datetime, horizon_days: float) -> float:
+    """0 for items with no date or far from expiring, rising to 1 at expiry"""
+    if expires_at is None:
+        return 0.0
+    days_left = (expires_at - now).total_seconds() / 86400
+    return min(max(1.0 - days_left / horizon_days, 0.0), 1.0)
+
+@dataclass
+class RecipeMatch:
+    recipe_id: str
+    score: float
+    coverage: float  # share of the recipe's (weighted) ingredients in the pantry
+    missing_count: int
+    missing_ingredients: List[str] = field(default_factory=list)
+    expiring_ingredients: List[str] = field(default_factory=list)
+
+class RecipeIndex:
+    """
+    Inverted ingredient index over the recipe catalog.
+
+    Recipes live in rows; per-row arrays hold the total ingredient weight,
+    the ingredient count, the allergen/diet contains_mask, cook time, meal
+    types and an alive flag. Postings map an ingredient to
+    (rows, weights) arrays. An updated recipe gets a new row and its old
+    row is marked dead, so postings are only ever appended to; new
+    postings wait in a pending list and are merged into the arrays of the
+    touched ingredients before the next match. Once dead rows make up a
+    quarter of the index it is compacted.
+    """
+
+    def __init__(self, expiry_weight: float = 0.5):
+        self.expiry_weight = expiry_weight
+        self.built_at: Optional[float] = None
+        self.watermark: Optional[datetime] = None
+        # Bumped on every change, so callers can key caches on it
+        self.generation = 0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._terms: List[Dict[str, float]] = []
+        self._rows: Dict[str, int] = {}
+        self._versions: Dict[str, Optional[datetime]] = {}
+        self._total_weight = np.zeros(0, dtype=np.float32)
+        self._term_count = np.zeros(0, dtype=np.int32)
+        self._masks = np.zeros(0, dtype=np.int64)
+        self._cook_time = np.zeros(0, dtype=np.int32)
+        self._meal_types = np.zeros(0, dtype=np.uint8)
+        self._alive = np.zeros(0, dtype=bool)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._pending: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def dead_rows(self) -> int:
+        return len(self._ids) - len(self._rows)
+
+    def _grow(self, size: int):
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        for name in ("_total_weight", "_term_count", "_masks", "_cook_time", "_meal_types", "_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def upsert(
+        self,
+        recipe_id: str,
+        terms: Dict[str, float],
+        version: Optional[datetime] = None,
+        contains_mask: int = 0,
+        cook_time: int = 0,
+        meal_types: int = UNTAGGED_MEAL_TYPES
+    ) -> bool:
+        """Add a recipe, or replace it unless `version` says it is unchanged"""
+        if recipe_id in self._rows:
+            if version is not None and self._versions.get(recipe_id) == version:
+                return False
+            self._alive[self._rows[recipe_id]] = False
+
+        row = len(self._ids)
+        self._grow(row + 1)
+        self._ids.append(recipe_id)
+        self._terms.append(terms)
+        self._rows[recipe_id] = row
+        self._versions[recipe_id] = version
+        self._total_weight[row] = sum(terms.values())
+        self._term_count[row] = len(terms)
+        self._masks[row] = contains_mask
+        self._cook_time[row] = cook_time
+        self._meal_types[row] = meal_types
+        self._alive[row] = True
+        self.generation += 1
+        for term, weight in terms.items():
+            rows, weights = self._pending.setdefault(term, ([], []))
+            rows.append(row)
+            weights.append(weight)
+        return True
+
+    def remove(self, recipe_ids: Iterable[str]) -> int:
+        removed = 0
+        for recipe_id in recipe_ids:
+            row = self._rows.pop(recipe_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._versions.pop(recipe_id, None)
+                removed += 1
+                self.generation += 1
+        return removed
+
+    def _merge_pending(self):
+        for term, (rows, weights) in self._pending.items():
+            new_rows = np.asarray(rows, dtype=np.int32)
+            new_weights = np.asarray(weights, dtype=np.float32)
+            existing = self._postings.get(term)
+            if existing is not None:
+                new_rows = np.concatenate((existing[0], new_rows))
+                new_weights = np.concatenate((existing[1], new_weights))
+            self._postings[term] = (new_rows, new_weights)
+        self._pending = {}
+
+    def compact(self):
+        """Rebuild the arrays from live rows only"""
+        live = sorted(self._rows.items(), key=lambda item: item[1])
+        entries = [
+            (
+                recipe_id, self._terms[row], self._versions.get(recipe_id), int(self._masks[row]),
+                int(self._cook_time[row]), int(self._meal_types[row])
+            )
+            for recipe_id, row in live
+        ]
+        generation = self.generation
+        self._reset()
+        for entry in entries:
+            self.upsert(*entry)
+        self._merge_pending()
+        self.generation = generation + 1
+
+    def recipe_id(self, row: int) -> str:
+        return self._ids[row]
+
+    def terms(self, row: int) -> Dict[str, float]:
+        return self._terms[row]
+
+    def terms_for(self, recipe_id: str) -> Dict[str, float]:
+        row = self._rows.get(recipe_id)
+        return self._terms[row] if row is not None else {}
+
+    def meal_types(self, rows: np.ndarray) -> np.ndarray:
+        return self._meal_types[rows]
+
+    def rank(
+        self,
+        pantry: Dict[str, float],
+        limit: int = 20,
+        max_missing: Optional[int] = None,
+        exclude_mask: int = 0,
+        exclude_terms: Iterable[str] = (),
+        max_cook_time: Optional[int] = None,
+        require_match: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The vectorized part of match(): returns the best `limit` rows,
+        best first, with the score, coverage and missing-count arrays
+        (indexed by row) they were ranked on.
+        """
+        if self._pending:
+            self._merge_pending()
+        size = len(self._ids)
+        row_parts, weight_parts, urgent = [], [], []
+        for term, urgency in pantry.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            row_parts.append(postings[0])
+            weight_parts.append(postings[1])
+            if urgency > 0:
+                urgent.append((postings[0], urgency))
+        empty = np.zeros(0, dtype=np.int64)
+        if (require_match and not row_parts) or limit <= 0 or size == 0:
+            return empty, empty, empty, empty
+
+        if row_parts:
+            rows = np.concatenate(row_parts)
+            covered = np.bincount(rows, weights=np.concatenate(weight_parts), minlength=size)
+            matched = np.bincount(rows, minlength=size)
+        else:
+            covered = np.zeros(size)
+            matched = np.zeros(size, dtype=np.int64)
+        total = self._total_weight[:size]
+        coverage = np.divide(covered, total, out=np.zeros(size), where=total > 0)
+        missing = self._term_count[:size] - matched
+
+        score = coverage
+        if urgent and self.expiry_weight:
+            urgency = np.zeros(size)
+            for term_rows, value in urgent:
+                urgency[term_rows] += value
+            score = coverage + self.expiry_weight * urgency
+
+        valid = self._alive[:size].copy()
+        if require_match:
+            valid &= matched > 0
+        if max_cook_time is not None:
+            valid &= self._cook_time[:size] <= max_cook_time
+        if max_missing is not None:
+            valid &= missing <= max_missing
+        if exclude_mask:
+            valid &= (self._masks[:size] & exclude_mask) == 0
+        for term in exclude_terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                valid[postings[0]] = False
+        candidates = np.flatnonzero(valid)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-score[candidates], limit - 1)[:limit]]
+        # Highest score first; row order breaks ties so results are stable
+        candidates = candidates[np.lexsort((candidates, -score[candidates]))]
+        return candidates, score, coverage, missing
+
+    def match(
+        self,
+        pantry: Dict[str, float],
+        limit: int = 20,
+        max_missing: Optional[int] = None,
+        exclude_mask: int = 0,
+        exclude_terms: Iterable[str] = ()
+    ) -> List[RecipeMatch]:
+        """
+        Best recipes for a pantry given as normalized ingredient -> expiry
+        urgency (0..1). Score is the weighted share of the recipe's
+        ingredients on hand plus `expiry_weight` times the summed urgency
+        of the pantry items it uses. Recipes sharing no ingredient with
+        the pantry are never returned, nor are recipes whose contains_mask
+        overlaps `exclude_mask` or that use one of `exclude_terms`.
+        """
+        candidates, score, coverage, missing = self.rank(
+            pantry, limit, max_missing, exclude_mask, exclude_terms
+        )
+        results = []
+        for row in candidates.tolist():
+            terms = self._terms[row]
+            results.append(RecipeMatch(
+                recipe_id=self._ids[row],
+                score=round(float(score[row]), 4),
+                coverage=round(float(coverage[row]), 4),
+                missing_count=int(missing[row]),
+                missing_ingredients=sorted(term for term in terms if term not in pantry),
+                expiring_ingredients=sorted(term for term in terms if pantry.get(term, 0) > 0)
+            ))
+        return results
+
+    async def refresh(self, db: AsyncSession, chunk_size: int = 5000) -> int:
+        """
+        Bring the index up to date with the recipes table: (re)index
+        recipes updated since the last refresh and drop deleted ones.
+        The first call loads the whole catalog. Returns recipes upserted.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            query = select(
+                Recipe.id, Recipe.ingredients, Recipe.main_ingredients, Recipe.tags,
+                Recipe.cook_time, Recipe.contains_mask, Recipe.updated_at
+            ).execution_options(yield_per=chunk_size)
+            if self.watermark is not None:
+                query = query.where(Recipe.updated_at >= self.watermark - _REFRESH_OVERLAP)
+
+            upserted = 0
+            watermark = self.watermark
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                for row in rows:
+                    terms = recipe_terms(row.ingredients, row.main_ingredients)
+                    if self.upsert(
+                        row.id, terms, row.updated_at, row.contains_mask,
+                        row.cook_time, meal_type_mask(row.tags)
+                    ):
+                        upserted += 1
+                    if row.updated_at is not None and (watermark is None or row.updated_at > watermark):
+                        watermark = row.updated_at
+            self.watermark = watermark or datetime.utcnow()
+
+            total = (await db.execute(select(func.count()).select_from(Recipe))).scalar_one()
+            removed = 0
+            if total != len(self._rows):
+                existing = set((await db.execute(select(Recipe.id))).scalars())
+                removed = self.remove([recipe_id for recipe_id in self._rows if recipe_id not in existing])
+
+            if self.dead_rows > max(len(self._rows) // 4, 1000):
+                self.compact()
+            self._merge_pending()
+            self.built_at = time.monotonic()
+            if upserted or removed:
+                logger.info(
+                    f"Recipe index: {upserted} upserted, {removed} removed, {len(self)} recipes "
+                    f"in {time.perf_counter() - started:.3f}s"
+                )
+            return upserted
+
+    async def ensure_fresh(self, db: AsyncSession, max_age: float):
+        if self.built_at is None or time.monotonic() - self.built_at > max_age:
+            await self.refresh(db)
+
+    def stats(self) -> dict:
+        return {
+            "recipes": len(self),
+            "dead_rows": self.dead_rows,
+            "generation": self.generation,
+            "ingredients": len(self._postings.keys() | self._pending.keys()),
+        }
+
+async def load_pantry_terms(db: AsyncSession, user_id: str, now: Optional[datetime] = None) -> Dict[str, float]:
+    """The user's unexpired pantry as normalized ingredient -> expiry urgency"""
+    now = now or datetime.utcnow()
+    result = await db.execute(
+        select(PantryItem.name, PantryItem.expires_at).where(
+            PantryItem.user_id == user_id,
+            (PantryItem.expires_at.is_(None)) | (PantryItem.expires_at >= now)
+        )
+    )
+    pantry: Dict[str, float] = {}
+    for name, expires_at in result:
+        term = normalize_ingredient(name)
+        if term:
+            urgency = expiry_urgency(expires_at, now, settings.recipe_match_expiry_horizon_days)
+            pantry[term] = max(pantry.get(term, 0.0), urgency)
+    return pantry
+
+recipe_index = RecipeIndex(expiry_weight=settings.recipe_match_expiry_weight)
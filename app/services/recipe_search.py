@@ -0,0 +1,218 @@
+"""
+Ranked recipe search by name, cuisine and tags.
+
+On Postgres this is the generated `recipes.search_vector` column (GIN
+indexed, migration 0007) matched with websearch_to_tsquery, plus pg_trgm
+similarity on the name when the extension is installed, so "chiken
+curry" still finds "Chicken Curry". Tag and ingredient filters use the
+GIN-indexed array operators.
+
+Other databases (SQLite in tests) get InMemorySearchIndex, which mimics
+the same ranking in-process.
+
+Results are ordered by (rank desc, id) and paginated by keyset on that
+pair.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Float, and_, cast, func, literal, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.recipe import Recipe
+
+# pg_trgm's default similarity threshold for the % operator
+TRIGRAM_THRESHOLD = 0.3
+
+# Field weights, matching setweight() A/B/C in migration 0007
+NAME_WEIGHT = 1.0
+CUISINE_WEIGHT = 0.4
+TAG_WEIGHT = 0.2
+
+# (rank, id) of the last result on the previous page
+SearchCursor = Tuple[float, str]
+
+@dataclass
+class SearchFilters:
+    q: Optional[str] = None
+    cuisine: Optional[str] = None
+    tags: Optional[List[str]] = None  # recipe must have all of them
+    ingredients: Optional[List[str]] = None  # recipe must have any of them as a main ingredient
+    exclude_mask: int = 0  # recipe's contains_mask must not overlap it
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _words(value: Optional[str]) -> List[str]:
+    return _WORD.findall((value or "").lower())
+
+def trigrams(value: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two spaces in front, one behind"""
+    grams = set()
+    for word in _words(value):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+# --- Postgres ---
+
+_has_trgm: Optional[bool] = None
+
+async def _trigram_available(db: AsyncSession) -> bool:
+    global _has_trgm
+    if _has_trgm is None:
+        result = await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _has_trgm = result.scalar() is not None
+    return _has_trgm
+
+async def _search_postgres(
+    db: AsyncSession,
+    filters: SearchFilters,
+    limit: int,
+    after: Optional[SearchCursor]
+) -> List[Tuple[Recipe, float]]:
+    conditions = []
+    rank = literal(0.0)
+    if filters.q:
+        search_vector = literal_column("recipes.search_vector")
+        query = func.websearch_to_tsquery(literal_column("'english'"), filters.q)
+        matches = search_vector.op("@@")(query)
+        rank = func.ts_rank_cd(search_vector, query)
+        if await _trigram_available(db):
+            conditions.append(or_(matches, Recipe.name.op("%")(filters.q)))
+            rank = rank + func.similarity(Recipe.name, filters.q)
+        else:
+            conditions.append(matches)
+    if filters.cuisine:
+        conditions.append(func.lower(Recipe.cuisine) == filters.cuisine.lower())
+    if filters.tags:
+        conditions.append(Recipe.tags.contains(filters.tags))
+    if filters.ingredients:
+        conditions.append(Recipe.main_ingredients.overlap(filters.ingredients))
+    if filters.exclude_mask:
+        conditions.append(Recipe.contains_mask.op("&")(filters.exclude_mask) == 0)
+
+    ranked = select(
+        Recipe.id, cast(rank, Float).label("rank")
+    ).where(*conditions).subquery("ranked")
+    query = select(Recipe, ranked.c.rank).join(ranked, ranked.c.id == Recipe.id)
+    if after:
+        after_rank, after_id = after
+        query = query.where(or_(
+            ranked.c.rank < after_rank,
+            and_(ranked.c.rank == after_rank, ranked.c.id > after_id)
+        ))
+    query = query.order_by(ranked.c.rank.desc(), ranked.c.id).limit(limit)
+    result = await db.execute(query)
+    return [(recipe, rank) for recipe, rank in result.all()]
+
+# --- In-process fallback ---
+
+class InMemorySearchIndex:
+    """
+    Token and trigram postings over the recipe catalog, for databases
+    without full-text search. Rebuilt whenever the recipes table's
+    (count, max updated_at) signature changes.
+    """
+
+    def __init__(self):
+        self.signature: Optional[Tuple[int, Optional[datetime]]] = None
+        self._words: Dict[str, Dict[str, float]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._name_trigrams: Dict[str, Set[str]] = {}
+        self._recipes: Dict[str, tuple] = {}
+
+    def build(self, rows):
+        """`rows` of (id, name, cuisine, tags, main_ingredients, contains_mask)"""
+        self._words, self._trigrams, self._name_trigrams, self._recipes = {}, {}, {}, {}
+        for recipe_id, name, cuisine, tags, main_ingredients, contains_mask in rows:
+            weights: Dict[str, float] = {}
+            for weight, words in (
+                (TAG_WEIGHT, _words(" ".join(tags or []))),
+                (CUISINE_WEIGHT, _words(cuisine)),
+                (NAME_WEIGHT, _words(name)),
+            ):
+                for word in words:
+                    weights[word] = max(weights.get(word, 0.0), weight)
+            for word, weight in weights.items():
+                self._words.setdefault(word, {})[recipe_id] = weight
+            grams = trigrams(name)
+            self._name_trigrams[recipe_id] = grams
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(recipe_id)
+            self._recipes[recipe_id] = (
+                (cuisine or "").lower(), set(tags or []), set(main_ingredients or []), contains_mask
+            )
+
+    async def ensure_fresh(self, db: AsyncSession):
+        signature = tuple((await db.execute(
+            select(func.count(), func.max(Recipe.updated_at)).select_from(Recipe)
+        )).one())
+        if signature != self.signature:
+            result = await db.execute(select(
+                Recipe.id, Recipe.name, Recipe.cuisine, Recipe.tags, Recipe.main_ingredients,
+                Recipe.contains_mask
+            ))
+            self.build(result.all())
+            self.signature = signature
+
+    def search(self, filters: SearchFilters, limit: int, after: Optional[SearchCursor]) -> List[Tuple[str, float]]:
+        if filters.q:
+            words = _words(filters.q)
+            scores: Dict[str, float] = {}
+            for word in words:
+                for recipe_id, weight in self._words.get(word, {}).items():
+                    scores[recipe_id] = scores.get(recipe_id, 0.0) + weight / len(words)
+            query_grams = trigrams(filters.q)
+            candidates = set().union(*(self._trigrams.get(gram, ()) for gram in query_grams))
+            for recipe_id in candidates:
+                score = similarity(query_grams, self._name_trigrams[recipe_id])
+                if recipe_id in scores:
+                    scores[recipe_id] += score
+                elif score >= TRIGRAM_THRESHOLD:
+                    scores[recipe_id] = score
+        else:
+            scores = dict.fromkeys(self._recipes, 0.0)
+
+        hits = []
+        for recipe_id, score in scores.items():
+            cuisine, tags, main_ingredients, contains_mask = self._recipes[recipe_id]
+            if contains_mask & filters.exclude_mask:
+                continue
+            if filters.cuisine and cuisine != filters.cuisine.lower():
+                continue
+            if filters.tags and not tags.issuperset(filters.tags):
+                continue
+            if filters.ingredients and main_ingredients.isdisjoint(filters.ingredients):
+                continue
+            if after and not (score < after[0] or (score == after[0] and recipe_id > after[1])):
+                continue
+            hits.append((recipe_id, score))
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:limit]
+
+in_memory_index = InMemorySearchIndex()
+
+async def search_recipes(
+    db: AsyncSession,
+    filters: SearchFilters,
+    limit: int = 20,
+    after: Optional[SearchCursor] = None
+) -> List[Tuple[Recipe, float]]:
+    """Up to `limit` (recipe, rank) pairs, best first, following cursor `after`"""
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, filters, limit, after)
+
+    await in_memory_index.ensure_fresh(db)
+    hits = in_memory_index.search(filters, limit, after)
+    if not hits:
+        return []
+    result = await db.execute(select(Recipe).where(Recipe.id.in_([recipe_id for recipe_id, _ in hits])))
+    recipes = {recipe.id: recipe for recipe in result.scalars()}
+    return [(recipes[recipe_id], rank) for recipe_id, rank in hits if recipe_id in recipes]
@@ -0,0 +1,252 @@
+"""
+Shopping list for a week plan.
+
+One query loads every meal's recipe and the user's unexpired pantry
+(UNION ALL, one round trip). Each recipe is parsed once (and cached by
+id and updated_at) into its lines' items, where an item is a normalized
+ingredient name plus the base unit of its dimension (see
+app.utils.units), and an array of amounts converted to that base unit
+through the compiled unit table. A list is then the recipes' amount
+arrays scaled to the servings and concatenated, summed per item with
+np.bincount, minus the pantry converted the same way.
+
+Lists are cached under (week plan, servings, pantry version, meals on
+the plan, newest recipe edit, next pantry expiry). Every pantry write
+bumps the version, a plan only changes by getting meals added (streamed
+generation), an edited recipe moves its updated_at, and once the next
+pantry item expires the next expiry moves on; so changed inputs simply
+miss the cache in every worker instead of needing an invalidation.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import JSON, DateTime, Float, Integer, String, cast, exists, func, literal_column, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.pantry import PantryItem, PantryVersion
+from app.models.recipe import Recipe
+from app.utils.cache import TTLCache
+from app.utils.ingredients import normalize_ingredient
+from app.utils.units import UNIT_BASES, UNIT_FACTORS, UNIT_IDS, display_unit, normalize_unit, parse_ingredient
+
+settings = get_settings()
+
+@dataclass
+class ShoppingItem:
+    name: str
+    unit: Optional[str]  # None when no recipe gives an amount ("salt to taste")
+    required: Optional[float]
+    in_pantry: Optional[float]
+    to_buy: Optional[float]
+    recipe_ids: List[str] = field(default_factory=list)
+
+@dataclass
+class ShoppingList:
+    week_plan_id: str
+    servings: Optional[int]
+    pantry_version: int
+    items: List[ShoppingItem] = field(default_factory=list)  # still to buy
+    covered: List[ShoppingItem] = field(default_factory=list)  # the pantry has enough
+
+@dataclass
+class ParsedRecipe:
+    """A recipe's ingredient lines, converted to base units once"""
+    keys: List[Tuple[str, str]]  # (normalized name, base unit) per line with an amount
+    amounts: np.ndarray  # matching amounts in the base unit, for one batch
+    unquantified: List[str]  # names of lines without an amount
+
+def _base_unit(unit: str) -> Tuple[int, str]:
+    row = UNIT_IDS.get(unit)
+    return (row, UNIT_BASES[row]) if row is not None else (-1, unit)
+
+def parse_recipe(ingredients: Optional[list]) -> ParsedRecipe:
+    keys, rows, quantities, unquantified = [], [], [], []
+    for ingredient in ingredients or []:
+        quantity, unit, name = parse_ingredient(ingredient)
+        term = normalize_ingredient(name)
+        if not term:
+            continue
+        if quantity is None:
+            unquantified.append(term)
+            continue
+        row, base = _base_unit(unit)
+        keys.append((term, base))
+        rows.append(row)
+        quantities.append(quantity)
+    # Units missing from the table count as their own base (row -1 -> factor 1)
+    factors = np.append(UNIT_FACTORS, 1.0)[np.asarray(rows, dtype=np.int64)]
+    return ParsedRecipe(keys, np.asarray(quantities, dtype=np.float64) * factors, unquantified)
+
+@lru_cache(maxsize=65536)
+def _pantry_key(name: str, unit: str) -> Tuple[Tuple[str, str], float]:
+    row, base = _base_unit(normalize_unit(unit))
+    return (normalize_ingredient(name), base), (UNIT_FACTORS[row] if row >= 0 else 1.0)
+
+def build_shopping_list(
+    meals: Iterable[Tuple[str, Optional[list], Optional[int]]],
+    pantry: Iterable[Tuple[str, Optional[float], Optional[str]]],
+    servings: Optional[int] = None,
+    parsed: Optional[Dict[str, ParsedRecipe]] = None
+) -> Tuple[List[ShoppingItem], List[ShoppingItem]]:
+    """
+    `meals` holds (recipe_id, ingredients, recipe servings) once per meal
+    on the plan, `pantry` (name, quantity, unit) per pantry item. With
+    `servings`, every recipe is scaled from its own servings to that.
+    `parsed` holds already parsed recipes by id. Returns (to buy, covered
+    by the pantry).
+    """
+    parsed = dict(parsed or {})
+    keys: List[Tuple[str, str]] = []
+    amounts, owners = [], []
+    # Lines without an amount, by name; listed only if no line has one
+    unquantified: Dict[str, Set[str]] = {}
+    recipe_ids = []
+    for recipe_id, ingredients, recipe_servings in meals:
+        recipe = parsed.get(recipe_id)
+        if recipe is None:
+            recipe = parsed[recipe_id] = parse_recipe(ingredients)
+        scale = servings / recipe_servings if servings and recipe_servings else 1.0
+        keys.extend(recipe.keys)
+        amounts.append(recipe.amounts * scale)
+        owners.append(np.full(len(recipe.keys), len(recipe_ids), dtype=np.int64))
+        recipe_ids.append(recipe_id)
+        for term in recipe.unquantified:
+            unquantified.setdefault(term, set()).add(recipe_id)
+
+    items: Dict[Tuple[str, str], int] = {}
+    item_rows = np.fromiter((items.setdefault(key, len(items)) for key in keys), dtype=np.int64, count=len(keys))
+    size = len(items)
+    amounts = np.concatenate(amounts) if amounts else np.zeros(0)
+    required = np.bincount(item_rows, weights=amounts, minlength=size)
+
+    have = np.zeros(size)
+    pantry_terms = set()
+    pantry_rows, pantry_amounts = [], []
+    for name, quantity, unit in pantry:
+        key, factor = _pantry_key(name or "", unit or "")
+        pantry_terms.add(key[0])
+        item = items.get(key)
+        if item is not None and quantity is not None:
+            pantry_rows.append(item)
+            pantry_amounts.append(quantity * factor)
+    if pantry_rows:
+        have = np.bincount(pantry_rows, weights=pantry_amounts, minlength=size)
+    to_buy = np.maximum(required - have, 0)
+
+    # Distinct (item, recipe) pairs -> which recipes need each item
+    recipes: List[Set[str]] = [set() for _ in range(size)]
+    if size:
+        pairs = np.unique(item_rows * len(recipe_ids) + np.concatenate(owners))
+        for item, owner in zip((pairs // len(recipe_ids)).tolist(), (pairs % len(recipe_ids)).tolist()):
+            recipes[item].add(recipe_ids[owner])
+
+    to_list, covered = [], []
+    for (term, base), item in items.items():
+        divisor, unit = display_unit(float(required[item]), base)
+        entry = ShoppingItem(
+            name=term,
+            unit=unit,
+            required=round(float(required[item]) / divisor, 2),
+            in_pantry=round(float(have[item]) / divisor, 2),
+            to_buy=round(float(to_buy[item]) / divisor, 2),
+            recipe_ids=sorted(recipes[item] | unquantified.get(term, set()))
+        )
+        (to_list if to_buy[item] > 1e-6 else covered).append(entry)
+    # Terms that also have a quantified line were merged into every base above
+    for term, _ in items:
+        unquantified.pop(term, None)
+    for term, ids in unquantified.items():
+        entry = ShoppingItem(term, None, None, None, None, sorted(ids))
+        (covered if term in pantry_terms else to_list).append(entry)
+
+    def order(entry: ShoppingItem):
+        return entry.name, entry.unit or ""
+
+    return sorted(to_list, key=order), sorted(covered, key=order)
+
+# (recipe id, updated_at) -> ParsedRecipe
+_parsed_recipes = TTLCache(max_size=20000, ttl=settings.shopping_cache_ttl_seconds, name="parsed_recipes")
+
+# (week plan, servings, pantry version, meal count, recipes' max updated_at,
+#  next pantry expiry) -> ShoppingList
+shopping_cache = TTLCache(
+    max_size=settings.shopping_cache_max_size,
+    ttl=settings.shopping_cache_ttl_seconds,
+    name="shopping_lists"
+)
+
+async def get_shopping_list(
+    db: AsyncSession,
+    user_id: str,
+    week_plan_id: str,
+    servings: Optional[int] = None
+) -> Optional[ShoppingList]:
+    """None if the week plan isn't the user's"""
+    now = datetime.utcnow()
+    unexpired = (PantryItem.expires_at.is_(None)) | (PantryItem.expires_at >= now)
+    owned, meal_count, recipes_updated, pantry_version, next_expiry = (await db.execute(select(
+        exists().where(WeekPlan.id == week_plan_id, WeekPlan.user_id == user_id),
+        select(func.count(MealPlan.id)).where(MealPlan.week_plan_id == week_plan_id).scalar_subquery(),
+        select(func.max(Recipe.updated_at)).join(MealPlan, MealPlan.recipe_id == Recipe.id)
+        .where(MealPlan.week_plan_id == week_plan_id).scalar_subquery(),
+        select(PantryVersion.version).where(PantryVersion.user_id == user_id).scalar_subquery(),
+        select(func.min(PantryItem.expires_at))
+        .where(PantryItem.user_id == user_id, PantryItem.expires_at >= now).scalar_subquery()
+    ))).one()
+    if not owned:
+        return None
+    pantry_version = pantry_version or 0
+    key = (week_plan_id, servings, pantry_version, meal_count, recipes_updated, next_expiry)
+    cached = shopping_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # One row per meal (a recipe cooked twice counts twice), then the pantry
+    meals = select(
+        literal_column("'meal'", String).label("source"),
+        Recipe.id.label("name"),
+        Recipe.updated_at,
+        Recipe.ingredients,
+        Recipe.servings,
+        cast(null(), Float).label("quantity"),
+        cast(null(), String).label("unit")
+    ).join(MealPlan, MealPlan.recipe_id == Recipe.id).where(MealPlan.week_plan_id == week_plan_id)
+    pantry = select(
+        literal_column("'pantry'", String),
+        PantryItem.name,
+        cast(null(), DateTime),
+        cast(null(), JSON),
+        cast(null(), Integer),
+        PantryItem.quantity,
+        PantryItem.unit
+    ).where(PantryItem.user_id == user_id, unexpired)
+    rows = (await db.execute(union_all(meals, pantry))).all()
+
+    meal_rows, pantry_rows, parsed = [], [], {}
+    for source, name, updated_at, ingredients, recipe_servings, quantity, unit in rows:
+        if source == "pantry":
+            pantry_rows.append((name, quantity, unit))
+            continue
+        meal_rows.append((name, ingredients, recipe_servings))
+        if name not in parsed:
+            recipe = _parsed_recipes.get((name, updated_at))
+            if recipe is None:
+                recipe = parse_recipe(ingredients)
+                _parsed_recipes.set((name, updated_at), recipe)
+            parsed[name] = recipe
+
+    items, covered = build_shopping_list(meal_rows, pantry_rows, servings, parsed)
+    shopping_list = ShoppingList(
+        week_plan_id=week_plan_id,
+        servings=servings,
+        pantry_version=pantry_version,
+        items=items,
+        covered=covered
+    )
+    shopping_cache.set(key, shopping_list)
+    return shopping_list
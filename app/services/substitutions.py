@@ -0,0 +1,342 @@
+"""
+Ingredient substitutions, without an LLM call.
+
+The graph below is loaded once (at startup, see app.main) into CSR
+arrays: ingredient i's substitutes are targets[indptr[i]:indptr[i + 1]],
+best first, with the amount of substitute per unit of the original in
+`ratios`. Every node carries its diet tags, the app.utils.dietary
+category mask of its name, so ruling substitutes out for a user is one
+mask test.
+
+Which substitutes a user may have depends only on the ingredient and the
+user's exclusions, so that list is memoized per (ingredient, exclusion
+mask, unmapped exclusions); the pantry then only decides which of them
+is already at home. An ingredient needs a substitute when the pantry
+doesn't have it or the user's exclusions rule it out. lookup_many()
+answers that for every ingredient of a recipe or a whole week at once.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.recipe import Recipe
+from app.models.user import User
+from app.services.recipe_matching import load_pantry_terms
+from app.utils.cache import TTLCache
+from app.utils.dietary import describe_mask, ingredient_mask, profile_mask
+from app.utils.ingredients import normalize_ingredient
+from app.utils.units import parse_ingredient
+
+settings = get_settings()
+
+# ingredient -> substitutes, best first: (substitute, ratio, note)
+_SUBSTITUTES = {
+    # dairy
+    "butter": [("olive oil", 0.75, None), ("vegan butter", 1, None), ("coconut oil", 1, None), ("margarine", 1, None)],
+    "milk": [("oat milk", 1, None), ("soy milk", 1, None), ("almond milk", 1, None), ("rice milk", 1, None)],
+    "cream": [("coconut cream", 1, None), ("evaporated milk", 1, None), ("cashew cream", 1, None)],
+    "heavy cream": [("coconut cream", 1, None), ("evaporated milk", 1, None), ("cashew cream", 1, None)],
+    "sour cream": [("greek yogurt", 1, None), ("coconut yogurt", 1, None), ("cashew cream", 1, None)],
+    "yogurt": [("greek yogurt", 1, None), ("sour cream", 1, None), ("coconut yogurt", 1, None)],
+    "greek yogurt": [("yogurt", 1, "strain it for thickness"), ("sour cream", 1, None), ("coconut yogurt", 1, None)],
+    "buttermilk": [("milk", 1, "plus 1 tbsp lemon juice per cup"), ("yogurt", 1, "thinned with water"), ("oat milk", 1, "plus 1 tbsp lemon juice per cup")],
+    "cream cheese": [("mascarpone", 1, None), ("greek yogurt", 1, None), ("vegan cream cheese", 1, None)],
+    "mascarpone": [("cream cheese", 1, None), ("ricotta", 1, None)],
+    "ricotta": [("cottage cheese", 1, None), ("silken tofu", 1, None)],
+    "parmesan": [("pecorino", 1, None), ("nutritional yeast", 0.5, None)],
+    "mozzarella": [("provolone", 1, None), ("vegan mozzarella", 1, None)],
+    "feta": [("goat cheese", 1, None), ("vegan feta", 1, None)],
+    "cheddar": [("gouda", 1, None), ("vegan cheddar", 1, None), ("nutritional yeast", 0.5, None)],
+    "ghee": [("butter", 1, None), ("coconut oil", 1, None)],
+    # eggs
+    "egg": [("flax egg", 1, "1 tbsp ground flax + 3 tbsp water per egg"), ("chia egg", 1, "1 tbsp chia + 3 tbsp water per egg"),
+            ("silken tofu", 0.25, "cups per egg"), ("applesauce", 0.25, "cups per egg, baking only")],
+    "mayonnaise": [("vegan mayonnaise", 1, None), ("greek yogurt", 1, None), ("avocado", 1, "mashed")],
+    # gluten
+    "flour": [("gluten free flour", 1, None), ("oat flour", 1.3, None), ("almond flour", 1, None)],
+    "breadcrumb": [("panko", 1, None), ("rolled oat", 1, None), ("almond flour", 1, None), ("crushed cracker", 1, None)],
+    "panko": [("breadcrumb", 1, None), ("rolled oat", 1, None), ("almond flour", 1, None)],
+    "pasta": [("gluten free pasta", 1, None), ("rice noodle", 1, None), ("zucchini noodle", 1.5, None)],
+    "spaghetti": [("gluten free pasta", 1, None), ("rice noodle", 1, None), ("zucchini noodle", 1.5, None)],
+    "noodle": [("rice noodle", 1, None), ("gluten free pasta", 1, None)],
+    "couscous": [("quinoa", 1, None), ("rice", 1, None), ("cauliflower rice", 1, None)],
+    "bulgur": [("quinoa", 1, None), ("couscous", 1, None), ("rice", 1, None)],
+    "bread": [("gluten free bread", 1, None)],
+    "tortilla": [("corn tortilla", 1, None), ("lettuce wrap", 1, None)],
+    "soy sauce": [("tamari", 1, None), ("coconut aminos", 1, None)],
+    "beer": [("non alcoholic beer", 1, None), ("vegetable broth", 1, None)],
+    # nuts and seeds
+    "peanut butter": [("sunflower seed butter", 1, None), ("almond butter", 1, None), ("tahini", 1, None)],
+    "almond butter": [("peanut butter", 1, None), ("sunflower seed butter", 1, None)],
+    "almond": [("sunflower seed", 1, None), ("pumpkin seed", 1, None), ("cashew", 1, None)],
+    "walnut": [("pecan", 1, None), ("sunflower seed", 1, None)],
+    "pecan": [("walnut", 1, None), ("sunflower seed", 1, None)],
+    "cashew": [("sunflower seed", 1, None), ("almond", 1, None)],
+    "pine nut": [("sunflower seed", 1, None), ("walnut", 1, None)],
+    "tahini": [("sunflower seed butter", 1, None), ("peanut butter", 1, None)],
+    "almond milk": [("oat milk", 1, None), ("soy milk", 1, None), ("milk", 1, None)],
+    "almond flour": [("sunflower seed flour", 1, None), ("oat flour", 1, None)],
+    # soy
+    "tofu": [("tempeh", 1, None), ("chickpea", 1, None), ("paneer", 1, None)],
+    "tempeh": [("tofu", 1, None), ("chickpea", 1, None)],
+    "soy milk": [("oat milk", 1, None), ("almond milk", 1, None), ("milk", 1, None)],
+    "miso": [("tahini", 1, "plus a pinch of salt"), ("soy sauce", 0.5, None)],
+    # seafood
+    "fish sauce": [("soy sauce", 1, None), ("coconut aminos", 1, "plus a pinch of salt")],
+    "salmon": [("trout", 1, None), ("arctic char", 1, None), ("tofu", 1, None)],
+    "tuna": [("salmon", 1, None), ("chickpea", 1, "mashed")],
+    "cod": [("haddock", 1, None), ("tilapia", 1, None), ("tofu", 1, None)],
+    "shrimp": [("scallop", 1, None), ("chicken", 1, None), ("tofu", 1, None)],
+    "anchovy": [("capers", 1, None), ("miso", 0.5, None)],
+    "oyster sauce": [("hoisin sauce", 1, None), ("soy sauce", 1, "plus a pinch of sugar")],
+    # meat
+    "chicken": [("turkey", 1, None), ("tofu", 1, None), ("chickpea", 1, None)],
+    "chicken breast": [("chicken thigh", 1, None), ("turkey breast", 1, None), ("tofu", 1, None)],
+    "chicken thigh": [("chicken breast", 1, None), ("turkey", 1, None), ("tofu", 1, None)],
+    "turkey": [("chicken", 1, None), ("tofu", 1, None)],
+    "beef": [("lamb", 1, None), ("mushroom", 1, None), ("lentil", 1, None)],
+    "ground beef": [("ground turkey", 1, None), ("plant based mince", 1, None), ("lentil", 1, "cooked")],
+    "steak": [("portobello mushroom", 1, None), ("lamb", 1, None)],
+    "pork": [("chicken", 1, None), ("jackfruit", 1, None)],
+    "bacon": [("turkey bacon", 1, None), ("smoked tempeh", 1, None), ("shiitake", 1, "roasted")],
+    "sausage": [("chicken sausage", 1, None), ("plant based sausage", 1, None)],
+    "ham": [("smoked turkey", 1, None), ("smoked tofu", 1, None)],
+    "lamb": [("beef", 1, None), ("mushroom", 1, None)],
+    "chicken broth": [("vegetable broth", 1, None), ("mushroom broth", 1, None)],
+    "chicken stock": [("vegetable stock", 1, None), ("mushroom broth", 1, None)],
+    "beef broth": [("mushroom broth", 1, None), ("vegetable broth", 1, None)],
+    "beef stock": [("mushroom broth", 1, None), ("vegetable stock", 1, None)],
+    "gelatin": [("agar", 1, None)],
+    # sweeteners and alcohol
+    "honey": [("maple syrup", 1, None), ("agave", 1, None), ("brown sugar", 1.25, None)],
+    "sugar": [("coconut sugar", 1, None), ("honey", 0.75, None), ("maple syrup", 0.75, None)],
+    "brown sugar": [("coconut sugar", 1, None), ("sugar", 1, "plus 1 tbsp molasses per cup")],
+    "maple syrup": [("honey", 1, None), ("agave", 1, None)],
+    "white wine": [("chicken broth", 1, None), ("vegetable broth", 1, None), ("white wine vinegar", 0.5, None)],
+    "red wine": [("beef broth", 1, None), ("vegetable broth", 1, None), ("red wine vinegar", 0.5, None)],
+    "wine": [("vegetable broth", 1, None), ("grape juice", 1, None)],
+    # produce, herbs and pantry staples
+    "lemon juice": [("lime juice", 1, None), ("white wine vinegar", 0.5, None)],
+    "lime juice": [("lemon juice", 1, None)],
+    "lemon": [("lime", 1, None)],
+    "lime": [("lemon", 1, None)],
+    "cilantro": [("parsley", 1, None), ("basil", 1, None), ("mint", 0.5, None)],
+    "parsley": [("cilantro", 1, None), ("chervil", 1, None), ("basil", 1, None)],
+    "basil": [("parsley", 1, None), ("oregano", 0.33, "dried"), ("spinach", 1, None)],
+    "shallot": [("onion", 1, None), ("red onion", 1, None)],
+    "onion": [("shallot", 1, None), ("leek", 1, None), ("onion powder", 0.125, "tbsp per onion")],
+    "garlic": [("garlic powder", 0.125, "tsp per clove"), ("shallot", 1, None)],
+    "scallion": [("chive", 1, None), ("leek", 1, None), ("onion", 0.5, None)],
+    "spinach": [("kale", 1, None), ("chard", 1, None)],
+    "kale": [("spinach", 1, None), ("chard", 1, None)],
+    "zucchini": [("yellow squash", 1, None), ("eggplant", 1, None)],
+    "potato": [("sweet potato", 1, None), ("cauliflower", 1, None)],
+    "rice": [("quinoa", 1, None), ("cauliflower rice", 1, None), ("couscous", 1, None)],
+    "quinoa": [("rice", 1, None), ("couscous", 1, None), ("bulgur", 1, None)],
+    "cornstarch": [("arrowroot", 1, None), ("potato starch", 1, None), ("flour", 2, None)],
+    "vegetable oil": [("canola oil", 1, None), ("olive oil", 1, None), ("coconut oil", 1, None)],
+    "olive oil": [("avocado oil", 1, None), ("vegetable oil", 1, None), ("butter", 1, None)],
+    "sesame oil": [("olive oil", 1, None), ("vegetable oil", 1, None)],
+    "vinegar": [("lemon juice", 1, None)],
+    "chickpea": [("white bean", 1, None), ("lentil", 1, None)],
+    "black bean": [("kidney bean", 1, None), ("pinto bean", 1, None)],
+    "lentil": [("chickpea", 1, None), ("split pea", 1, None)],
+}
+
+@dataclass
+class Substitution:
+    ingredient: str
+    reason: str  # "missing" (not in the pantry) or "excluded" (diet / food exclusions)
+    substitute: Optional[str] = None  # None when nothing suitable is known
+    ratio: Optional[float] = None  # substitute per unit of the original
+    note: Optional[str] = None
+    in_pantry: bool = False
+    contains: List[str] = field(default_factory=list)
+    recipe_ids: List[str] = field(default_factory=list)  # recipes that use the ingredient
+
+def _excluded_by_term(term: str, excluded_terms: Sequence[str]) -> bool:
+    padded = f" {term} "
+    return any(f" {excluded} " in padded for excluded in excluded_terms)
+
+class SubstitutionGraph:
+    """See the module docstring"""
+
+    def __init__(self):
+        self.loaded = False
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.ratios = np.zeros(0, dtype=np.float32)
+        self.notes: List[Optional[str]] = []
+        self.masks = np.zeros(0, dtype=np.int64)
+        self._allowed = TTLCache(
+            max_size=settings.substitution_cache_max_size, ttl=float("inf"), name="substitutions"
+        )
+
+    def load(self, substitutes: Optional[Dict[str, list]] = None):
+        """Compile an ingredient -> [(substitute, ratio, note)] mapping"""
+        substitutes = _SUBSTITUTES if substitutes is None else substitutes
+        names: Dict[str, int] = {}
+
+        def node(name: str) -> int:
+            return names.setdefault(normalize_ingredient(name), len(names))
+
+        edges = []
+        for ingredient, options in substitutes.items():
+            source = node(ingredient)
+            for substitute, ratio, note in options:
+                edges.append((source, node(substitute), ratio, note))
+        edges.sort(key=lambda edge: edge[0])  # stable: keeps best-first order
+
+        self._names = list(names)
+        self._ids = names
+        counts = np.bincount([edge[0] for edge in edges], minlength=len(names))
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+        self.targets = np.array([edge[1] for edge in edges], dtype=np.int32)
+        self.ratios = np.array([edge[2] for edge in edges], dtype=np.float32)
+        self.notes = [edge[3] for edge in edges]
+        self.masks = np.array([ingredient_mask(name) for name in self._names], dtype=np.int64)
+        self._allowed.clear()
+        self.loaded = True
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def node(self, term: str) -> Optional[int]:
+        """
+        Graph node for a normalized ingredient, dropping leading words
+        until one matches: 'unsalted butter' -> butter
+        """
+        words = term.split()
+        for start in range(len(words)):
+            node = self._ids.get(" ".join(words[start:]))
+            if node is not None:
+                return node
+        return None
+
+    def allowed(self, node: int, exclusion_mask: int = 0, excluded_terms: Tuple[str, ...] = ()) -> Tuple[int, ...]:
+        """Edge indexes of `node`'s substitutes the user may have, best first (memoized)"""
+        key = (node, exclusion_mask, excluded_terms)
+        edges = self._allowed.get(key)
+        if edges is None:
+            start, end = int(self.indptr[node]), int(self.indptr[node + 1])
+            candidates = np.arange(start, end)
+            fits = (self.masks[self.targets[start:end]] & exclusion_mask) == 0
+            edges = tuple(
+                int(edge) for edge in candidates[fits]
+                if not _excluded_by_term(self._names[self.targets[edge]], excluded_terms)
+            )
+            self._allowed.set(key, edges)
+        return edges
+
+    def pantry_nodes(self, pantry_terms: Iterable[str]) -> Set[int]:
+        nodes = set()
+        for term in pantry_terms:
+            node = self.node(term)
+            if node is not None:
+                nodes.add(node)
+        return nodes
+
+    def best(
+        self,
+        ingredient: str,
+        pantry_nodes: Set[int],
+        reason: str = "missing",
+        exclusion_mask: int = 0,
+        excluded_terms: Tuple[str, ...] = ()
+    ) -> Substitution:
+        """
+        Best substitute for `ingredient`: the first allowed one the pantry
+        has, else the first allowed one at all.
+        """
+        self._ensure_loaded()
+        result = Substitution(ingredient=ingredient, reason=reason)
+        node = self.node(normalize_ingredient(ingredient))
+        if node is None:
+            return result
+        edges = self.allowed(node, exclusion_mask, excluded_terms)
+        if not edges:
+            return result
+        edge = next((e for e in edges if int(self.targets[e]) in pantry_nodes), edges[0])
+        target = int(self.targets[edge])
+        result.substitute = self._names[target]
+        result.ratio = round(float(self.ratios[edge]), 3)
+        result.note = self.notes[edge]
+        result.in_pantry = target in pantry_nodes
+        result.contains = describe_mask(int(self.masks[target]))
+        return result
+
+    def lookup_many(
+        self,
+        ingredients: Iterable[str],
+        pantry_terms: Iterable[str],
+        exclusion_mask: int = 0,
+        excluded_terms: Sequence[str] = (),
+        normalized: bool = False
+    ) -> Dict[str, Substitution]:
+        """
+        Substitutions for every ingredient the pantry lacks or the user's
+        exclusions rule out, keyed by normalized ingredient. Ingredients
+        that are fine as they are are left out.
+
+        `ingredients` are recipe lines ("2 cups flour"), or with
+        normalized=True terms the caller already normalized, which are
+        used (and returned) as given: parsing them again would read the
+        number in "5 spice powder" or "00 flour" as a quantity.
+        """
+        self._ensure_loaded()
+        pantry_terms = set(pantry_terms)
+        pantry_nodes = self.pantry_nodes(pantry_terms)
+        excluded_terms = tuple(sorted(excluded_terms))
+        results: Dict[str, Substitution] = {}
+        for ingredient in ingredients:
+            term = ingredient if normalized else normalize_ingredient(parse_ingredient(ingredient)[2])
+            if not term or term in results:
+                continue
+            if ingredient_mask(term) & exclusion_mask or _excluded_by_term(term, excluded_terms):
+                reason = "excluded"
+            elif term in pantry_terms or self.node(term) in pantry_nodes:
+                continue
+            else:
+                reason = "missing"
+            results[term] = self.best(term, pantry_nodes, reason, exclusion_mask, excluded_terms)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "ingredients": len(self._names),
+            "edges": len(self.targets),
+            "memo": self._allowed.stats(),
+        }
+
+substitution_graph = SubstitutionGraph()
+
+async def recipe_substitutions(db: AsyncSession, user: User, recipe_ids: Sequence[str]) -> List[Substitution]:
+    """
+    One batch lookup over every ingredient of `recipe_ids` (a recipe or a
+    week's meals) against the user's pantry and exclusions
+    """
+    result = await db.execute(
+        select(Recipe.id, Recipe.ingredients).where(Recipe.id.in_(set(recipe_ids)))
+    )
+    used_by: Dict[str, Set[str]] = {}
+    for recipe_id, ingredients in result:
+        for ingredient in ingredients or []:
+            term = normalize_ingredient(parse_ingredient(ingredient)[2])
+            if term:
+                used_by.setdefault(term, set()).add(recipe_id)
+    pantry = await load_pantry_terms(db, user.id)
+    _, excluded_terms = profile_mask(user.primary_diet_type, user.food_exclusions)
+    found = substitution_graph.lookup_many(
+        used_by, pantry, user.exclusion_mask or 0, excluded_terms, normalized=True
+    )
+    for term, substitution in found.items():
+        substitution.recipe_ids = sorted(used_by[term])
+    # Conflicts with the user's diet first, then alphabetical
+    return sorted(found.values(), key=lambda s: (s.reason != "excluded", s.ingredient))
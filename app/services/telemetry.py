@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import insert
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.telemetry import TelemetryEvent
+from app.schemas.telemetry import TelemetryEventIn
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ["id", "user_id", "event_type", "event_data", "timestamp"]
+
+class BufferFull(Exception):
+    """The buffer stayed full for the whole enqueue timeout"""
+
+async def write_events(rows: List[dict]):
+    """
+    Write a batch of event rows. On Postgres this is a binary COPY through
+    the asyncpg connection; elsewhere one multi-row INSERT.
+    """
+    async with AsyncSessionLocal() as db:
+        connection = await db.connection()
+        if connection.dialect.name == "postgresql":
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                TelemetryEvent.__tablename__,
+                records=[
+                    (r["id"], r["user_id"], r["event_type"], json.dumps(r["event_data"]), r["timestamp"])
+                    for r in rows
+                ],
+                columns=_COLUMNS
+            )
+        else:
+            await db.execute(insert(TelemetryEvent).values(rows))
+        await db.commit()
+
+class TelemetryBuffer:
+    """
+    In-process queue between the ingestion endpoint and the database.
+
+    Requests only enqueue. A background task flushes whenever `batch_size`
+    events are waiting or `flush_interval` seconds after the oldest
+    unflushed event arrived. When the queue has no room for a request's
+    events, enqueue waits up to `enqueue_timeout` and then raises
+    BufferFull, having queued none of them, so the endpoint can shed
+    load. stop() drains everything that was accepted.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+        writer: Callable[[List[dict]], Awaitable[None]] = write_events,
+        max_write_attempts: int = 3
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.writer = writer
+        self.max_write_attempts = max_write_attempts
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._drained: Optional[asyncio.Event] = None  # set when the flusher takes a batch
+        self._carry: List[dict] = []
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._drained = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting events and flush whatever is still queued"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        if self._inflight is not None:
+            await self._inflight
+        remaining, self._carry = self._carry, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+        logger.info(f"Telemetry buffer drained: {self.stats()}")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def enqueue(self, user_id: Optional[str], events: List[TelemetryEventIn]) -> int:
+        """
+        Queue all of `events` or none of them: a batch is only admitted
+        once the queue has room for the whole of it, so a client that
+        retries after BufferFull never duplicates events.
+        """
+        if not self.running:
+            raise BufferFull("Telemetry buffer is not running")
+        if len(events) > self.max_size:
+            self.rejected += len(events)
+            raise BufferFull(f"Batch of {len(events)} events is larger than the buffer")
+
+        now = datetime.utcnow()
+        latest = now + timedelta(seconds=settings.telemetry_max_clock_skew_seconds)
+        rows = []
+        for event in events:
+            timestamp = event.timestamp or now
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            if timestamp > latest:
+                # Broken client clock; don't land in a partition that doesn't exist yet
+                timestamp = now
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "event_type": event.event_type,
+                "event_data": event.event_data,
+                "timestamp": timestamp
+            })
+
+        deadline = time.monotonic() + self.enqueue_timeout
+        while self.max_size - self._queue.qsize() < len(rows):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                self.rejected += len(rows)
+                raise BufferFull(f"No room for {len(rows)} events")
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        # No await from the check to here, so nothing else can take the room
+        for row in rows:
+            self._queue.put_nowait(row)
+        self.accepted += len(rows)
+        return len(rows)
+
+    async def _run(self):
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                self._drained.set()
+                # Shielded so stop() can't cancel a COPY halfway through;
+                # stop() waits for it instead.
+                self._inflight = asyncio.ensure_future(self._flush(batch))
+                batch = []
+                await asyncio.shield(self._inflight)
+        except asyncio.CancelledError:
+            # Hand the half-built batch to stop() for the final drain
+            self._carry = batch
+            raise
+
+    async def _flush(self, batch: List[dict]):
+        for attempt in range(1, self.max_write_attempts + 1):
+            try:
+                await self.writer(batch)
+                self.written += len(batch)
+                self.flushes += 1
+                return
+            except Exception as e:
+                logger.warning(f"Telemetry flush of {len(batch)} events failed (attempt {attempt}): {e}")
+                if attempt < self.max_write_attempts:
+                    await asyncio.sleep(0.5 * attempt)
+        self.dropped += len(batch)
+        logger.error(f"Dropped {len(batch)} telemetry events after {self.max_write_attempts} attempts")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+telemetry_buffer = TelemetryBuffer(
+    max_size=settings.telemetry_buffer_size,
+    batch_size=settings.telemetry_batch_size,
+    flush_interval=settings.telemetry_flush_interval_seconds,
+    enqueue_timeout=settings.telemetry_enqueue_timeout_seconds
+)
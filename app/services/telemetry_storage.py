@@ -0,0 +1,172 @@
+"""
+Storage maintenance for telemetry: monthly partitions of telemetry_events,
+partition retention, and the incrementally maintained hourly rollups that
+dashboards read instead of raw events.
+
+Partition DDL is Postgres-only; rollup maintenance is too (it relies on
+date_trunc and ON CONFLICT).
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.telemetry import TelemetryEvent, TelemetryHourlyRollup, TelemetryRollupWatermark
+
+logger = logging.getLogger(__name__)
+
+EVENTS_TABLE = TelemetryEvent.__tablename__
+PARTITION_PREFIX = f"{EVENTS_TABLE}_p"
+DEFAULT_PARTITION = f"{EVENTS_TABLE}_default"
+HOURLY_ROLLUP = "hourly"
+
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+def _add_months(month: datetime, months: int) -> datetime:
+    years, index = divmod(month.month - 1 + months, 12)
+    return datetime(month.year + years, index + 1, 1)
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """Create this month's partition and the next `months_ahead` if missing"""
+    month = _month_start(now or datetime.utcnow())
+    names = []
+    for offset in range(months_ahead + 1):
+        lower = _add_months(month, offset)
+        upper = _add_months(lower, 1)
+        name = partition_name(lower)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {EVENTS_TABLE} "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        ))
+        names.append(name)
+    return names
+
+async def list_partitions(db: AsyncSession) -> List[str]:
+    result = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent ORDER BY child.relname"
+    ), {"parent": EVENTS_TABLE})
+    return list(result.scalars())
+
+async def drop_expired_partitions(
+    db: AsyncSession,
+    retention_months: int,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Drop monthly partitions that end before the retention cutoff, and
+    delete expired stragglers from the default partition. Dropping a
+    partition is a metadata operation, unlike DELETE on one big table.
+    Rollups are kept.
+    """
+    cutoff = _add_months(_month_start(now or datetime.utcnow()), -retention_months)
+    dropped = []
+    for name in await list_partitions(db):
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month, 1) <= cutoff:
+            await db.execute(text(f"ALTER TABLE {EVENTS_TABLE} DETACH PARTITION {name}"))
+            await db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+
+    await db.execute(
+        text(f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" < :cutoff'),
+        {"cutoff": cutoff}
+    )
+    if dropped:
+        logger.info(f"Dropped telemetry partitions older than {cutoff:%Y-%m}: {dropped}")
+    return dropped
+
+async def update_hourly_rollups(db: AsyncSession, lag_seconds: float) -> int:
+    """
+    Fold events ingested since the last run into telemetry_hourly_rollups.
+
+    Only events with watermark < ingested_at <= now - lag are read; the lag
+    gives still-open ingestion transactions time to commit. Late events
+    for an old hour just add to that hour's count. The watermark row is
+    locked, so concurrent runs serialize instead of double counting.
+    Returns the number of rollup rows touched; the caller commits.
+    """
+    await db.execute(
+        insert(TelemetryRollupWatermark)
+        .values(name=HOURLY_ROLLUP, watermark=datetime(1970, 1, 1))
+        .on_conflict_do_nothing(index_elements=[TelemetryRollupWatermark.name])
+    )
+    low = (await db.execute(
+        select(TelemetryRollupWatermark.watermark)
+        .where(TelemetryRollupWatermark.name == HOURLY_ROLLUP)
+        .with_for_update()
+    )).scalar_one()
+    # Database clock, the same one that filled ingested_at
+    high = (await db.execute(
+        select(func.localtimestamp() - timedelta(seconds=lag_seconds))
+    )).scalar_one()
+    if high <= low:
+        return 0
+
+    # Literals, not bind parameters, so GROUP BY matches the select list
+    bucket = func.date_trunc(literal_column("'hour'"), TelemetryEvent.timestamp)
+    user_id = func.coalesce(TelemetryEvent.user_id, literal_column("''"))
+    new_counts = select(
+        bucket, TelemetryEvent.event_type, user_id, func.count()
+    ).where(
+        TelemetryEvent.ingested_at > low,
+        TelemetryEvent.ingested_at <= high
+    ).group_by(bucket, TelemetryEvent.event_type, user_id)
+
+    stmt = insert(TelemetryHourlyRollup).from_select(
+        ["bucket", "event_type", "user_id", "event_count"], new_counts
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["bucket", "event_type", "user_id"],
+        set_={"event_count": TelemetryHourlyRollup.event_count + stmt.excluded.event_count}
+    )
+    result = await db.execute(stmt)
+
+    await db.execute(
+        TelemetryRollupWatermark.__table__.update()
+        .where(TelemetryRollupWatermark.name == HOURLY_ROLLUP)
+        .values(watermark=high)
+    )
+    return result.rowcount
+
+async def query_hourly_rollups(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    event_type: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> list:
+    """Hourly counts per event type in [start, end), optionally for one user"""
+    query = select(
+        TelemetryHourlyRollup.bucket,
+        TelemetryHourlyRollup.event_type,
+        func.sum(TelemetryHourlyRollup.event_count).label("count")
+    ).where(
+        TelemetryHourlyRollup.bucket >= start,
+        TelemetryHourlyRollup.bucket < end
+    )
+    if event_type:
+        query = query.where(TelemetryHourlyRollup.event_type == event_type)
+    if user_id is not None:
+        query = query.where(TelemetryHourlyRollup.user_id == user_id)
+    query = query.group_by(
+        TelemetryHourlyRollup.bucket, TelemetryHourlyRollup.event_type
+    ).order_by(TelemetryHourlyRollup.bucket, TelemetryHourlyRollup.event_type)
+
+    result = await db.execute(query)
+    return result.all()
@@ -0,0 +1,145 @@
+"""
+Startup warmup, run from the lifespan in the background.
+
+Without it the first authenticated requests after a deploy pay for the
+JWKS fetch, opening pool connections, the recipe index build and the
+AI SDK import. The steps below run in parallel as soon as the worker
+starts, and GET /ready answers 503 until they are done, so a load
+balancer only sends traffic to warm workers (GET /health stays 200 for
+liveness the whole time).
+
+Required steps (the database) are retried until they succeed. Optional
+steps that fail are logged and left to happen lazily on first use, as
+before; readiness doesn't wait for them.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, async_engine
+from app.services.recipe_matching import recipe_index
+from app.utils.auth0 import jwks_keys
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WarmupStep:
+    run: Callable[[], Awaitable[None]]
+    required: bool = False
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+class Warmup:
+    def __init__(self, timeout: float, retry_interval: float = 2.0):
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.steps: Dict[str, WarmupStep] = {}
+        self.ready = False
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def step(self, name: str, run: Callable[[], Awaitable[None]], required: bool = False):
+        self.steps[name] = WarmupStep(run, required)
+
+    async def _run_step(self, name: str, step: WarmupStep) -> bool:
+        step.attempts += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step.run(), self.timeout)
+            step.error = None
+            return True
+        except Exception as e:
+            step.error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Warmup step {name} failed (attempt {step.attempts}): {step.error}")
+            return False
+        finally:
+            step.seconds = round(time.perf_counter() - started, 4)
+
+    async def run(self):
+        started = time.perf_counter()
+        pending = dict(self.steps)
+        while True:
+            results = await asyncio.gather(*(self._run_step(name, step) for name, step in pending.items()))
+            pending = {
+                name: step for (name, step), ok in zip(pending.items(), results)
+                if not ok and step.required
+            }
+            if not pending:
+                break
+            await asyncio.sleep(self.retry_interval)
+        self.seconds = round(time.perf_counter() - started, 4)
+        self.ready = True
+        logger.info(f"Warmup done in {self.seconds}s")
+
+    def start(self):
+        if not settings.warmup_enabled:
+            self.ready = True
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "enabled": settings.warmup_enabled,
+            "seconds": self.seconds,
+            "steps": {
+                name: {
+                    "required": step.required,
+                    "seconds": step.seconds,
+                    "attempts": step.attempts,
+                    "error": step.error,
+                }
+                for name, step in self.steps.items()
+            },
+        }
+
+async def open_pool_connections():
+    """Open warmup_db_connections connections at once, so they all stay pooled"""
+    count = min(settings.warmup_db_connections, settings.db_pool_size)
+    if async_engine.url.get_backend_name() == "sqlite":
+        count = 1
+    results = await asyncio.gather(
+        *(async_engine.connect() for _ in range(count)), return_exceptions=True
+    )
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        # Close whatever opened, even when another connect failed
+        await asyncio.gather(*(conn.close() for conn in connections), return_exceptions=True)
+
+async def build_recipe_index():
+    async with AsyncSessionLocal() as db:
+        await recipe_index.ensure_fresh(db, settings.recipe_index_refresh_seconds)
+
+async def import_ai_sdk():
+    # In a thread: the import is mostly CPU and would stall the event loop
+    await asyncio.to_thread(importlib.import_module, "anthropic")
+
+warmup = Warmup(timeout=settings.warmup_timeout_seconds)
+warmup.step("db_pool", open_pool_connections, required=True)
+warmup.step("jwks", jwks_keys.refresh)
+warmup.step("recipe_index", build_recipe_index)
+warmup.step("ai_sdk", import_ai_sdk)
@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import external_call
+from app.utils.percentile import percentile
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class AIClientBusy(Exception):
+    """No call slot freed up within the queue timeout"""
+
+@dataclass
+class AIResponse:
+    text: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_s: float = 0.0
+    stop_reason: Optional[str] = None
+    cached: bool = False
+
+# Context lists that are sets by contract (the users' profile columns of
+# the same names): their order and case carry no meaning. Every other
+# list, e.g. recent meals or plan days, keeps its order.
+SET_VALUED_KEYS = frozenset({"goals", "food_exclusions", "preferred_cooking_days"})
+
+def normalize_context(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Canonical form of user context: whitespace folded, empty values
+    dropped, and the lists named in SET_VALUED_KEYS lowercased, sorted
+    and de-duplicated. The result is both hashed into the cache key and
+    sent in the prompt, so equal keys always mean equal prompts.
+    """
+    if isinstance(value, dict):
+        normalized = {str(k): normalize_context(v, str(k)) for k, v in value.items()}
+        return {k: v for k, v in sorted(normalized.items()) if v not in (None, "", [], {})}
+    if isinstance(value, (list, tuple, set)):
+        items = [normalize_context(v) for v in value]
+        if key in SET_VALUED_KEYS and all(isinstance(item, str) for item in items):
+            return sorted({item.lower() for item in items})
+        return items
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def cache_key(
+    model: str,
+    system: Optional[str],
+    messages: List[dict],
+    context: Optional[dict],
+    max_tokens: int,
+    temperature: float
+) -> str:
+    """Hash of one call; `context` must already be normalized"""
+    canonical = json.dumps({
+        "model": model,
+        "system": system,
+        "messages": messages,
+        "context": context or {},
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class AIClient:
+    """
+    Shared async client for LLM calls (Anthropic Messages API).
+
+    - One pooled httpx.AsyncClient under the SDK.
+    - At most `max_concurrency` calls in flight; the rest queue, and
+      give up with AIClientBusy after `queue_timeout` seconds.
+    - User context is normalized once (see normalize_context) and the
+      same form is sent in the prompt and hashed into the cache key.
+    - Responses are cached for `cache_ttl` seconds under a hash of the
+      model, prompt and that context.
+    - Identical prompts already in flight share one call (complete()
+      only; stream() callers each get their own stream).
+    - Latency and token counters for /health.
+
+    `base_url` and `transport` let tests point it at a fake provider
+    (see benchmarks/fake_ai_provider.py).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        queue_timeout: float = 30,
+        cache_ttl: float = 86400,
+        cache_max_size: int = 2000,
+        timeout: float = 60,
+        max_retries: int = 2,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = TTLCache(max_size=cache_max_size, ttl=cache_ttl, name="ai_responses")
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._sdk: Optional["AsyncAnthropic"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._latencies: deque = deque(maxlen=1000)
+        self.calls = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.queued = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def _client(self) -> "AsyncAnthropic":
+        # Created lazily so the pool binds to the running event loop, and
+        # the SDK (a large import) only loads when the first call is made
+        # or startup warmup preloads it
+        if self._sdk is None:
+            from anthropic import AsyncAnthropic
+
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                transport=self._transport
+            )
+            self._sdk = AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=self._http,
+                max_retries=self.max_retries
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._sdk
+
+    async def aclose(self):
+        if self._sdk is not None:
+            await self._sdk.close()
+            self._sdk = None
+            self._http = None
+
+    @staticmethod
+    def _with_context(system: Optional[str], context: Optional[dict]) -> Optional[str]:
+        if not context:
+            return system
+        # Already normalized; rendered canonically like the cache key
+        rendered = f"User context:\n{json.dumps(context, sort_keys=True, default=str)}"
+        return f"{system}\n\n{rendered}" if system else rendered
+
+    async def complete(
+        self,
+        prompt: Optional[str] = None,
+        messages: Optional[List[dict]] = None,
+        system: Optional[str] = None,
+        context: Optional[dict] = None,
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.0,
+        use_cache: bool = True
+    ) -> AIResponse:
+        """
+        One Messages API call, served from the cache or from an identical
+        call already in flight when possible.
+        """
+        model = model or self.model
+        messages = messages or [{"role": "user", "content": prompt}]
+        context = normalize_context(context or {})
+        key = cache_key(model, system, messages, context, max_tokens, temperature)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return replace(cached, cached=True, latency_s=0.0)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.ensure_future(self._call(
+            model, messages, self._with_context(system, context), max_tokens, temperature
+        ))
+        self._inflight[key] = future
+
+        def _done(done: asyncio.Future):
+            self._inflight.pop(key, None)
+            if not done.cancelled() and done.exception() is None and use_cache:
+                self.cache.set(key, done.result())
+
+        future.add_done_callback(_done)
+        # Shielded: one caller disconnecting must not cancel the others' call
+        return await asyncio.shield(future)
+
+    async def _acquire(self):
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AIClientBusy(f"No AI call slot free within {self.queue_timeout}s")
+        finally:
+            self.queued -= 1
+
+    async def _call(self, model, messages, system, max_tokens, temperature) -> AIResponse:
+        client = self._client()
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            kwargs = {"system": system} if system else {}
+            with external_call("ai"):
+                message = await client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=messages,
+                    **kwargs
+                )
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._semaphore.release()
+        latency = time.perf_counter() - started
+        self._record(latency, message.usage.input_tokens, message.usage.output_tokens)
+        return AIResponse(
+            text="".join(block.text for block in message.content if block.type == "text"),
+            model=message.model,
+            input_tokens=message.usage.input_tokens,
+            output_tokens=message.usage.output_tokens,
+            latency_s=round(latency, 4),
+            stop_reason=message.stop_reason
+        )
+
+    def _record(self, latency: float, input_tokens: int, output_tokens: int):
+        self.calls += 1
+        self._latencies.append(latency)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+
+    async def stream(
+        self,
+        prompt: Optional[str] = None,
+        messages: Optional[List[dict]] = None,
+        system: Optional[str] = None,
+        context: Optional[dict] = None,
+        model: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.0,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Yield the reply text as it is generated. A cached reply comes
+        back as a single chunk; a completed stream is cached like
+        complete()'s result. Holds a call slot until the stream ends or
+        the caller stops iterating.
+        """
+        model = model or self.model
+        messages = messages or [{"role": "user", "content": prompt}]
+        context = normalize_context(context or {})
+        key = cache_key(model, system, messages, context, max_tokens, temperature)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached.text
+                return
+
+        client = self._client()
+        await self._acquire()
+        started = time.perf_counter()
+        chunks = []
+        try:
+            system = self._with_context(system, context)
+            kwargs = {"system": system} if system else {}
+            with external_call("ai_stream"):
+                async with client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=messages,
+                    **kwargs
+                ) as response:
+                    async for text in response.text_stream:
+                        chunks.append(text)
+                        yield text
+                    message = await response.get_final_message()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._semaphore.release()
+        latency = time.perf_counter() - started
+        self._record(latency, message.usage.input_tokens, message.usage.output_tokens)
+        if use_cache:
+            self.cache.set(key, AIResponse(
+                text="".join(chunks),
+                model=message.model,
+                input_tokens=message.usage.input_tokens,
+                output_tokens=message.usage.output_tokens,
+                latency_s=round(latency, 4),
+                stop_reason=message.stop_reason
+            ))
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "in_flight": len(self._inflight),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_p50_s": round(p50, 4) if p50 is not None else None,
+            "latency_p95_s": round(p95, 4) if p95 is not None else None,
+            "cache": self.cache.stats(),
+        }
+
+ai_client = AIClient(
+    api_key=settings.anthropic_api_key,
+    model=settings.ai_model,
+    base_url=settings.anthropic_base_url or None,
+    max_concurrency=settings.ai_max_concurrency,
+    queue_timeout=settings.ai_queue_timeout_seconds,
+    cache_ttl=settings.ai_cache_ttl_seconds,
+    cache_max_size=settings.ai_cache_max_size,
+    timeout=settings.ai_timeout_seconds
+)
@@ -1,70 +1,162 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+from typing import Dict, Optional
 from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import external_call
+import asyncio
+import hashlib
 import httpx
+import logging
+import time
 
 settings = get_settings()
 security = HTTPBearer()
+logger = logging.getLogger(__name__)
 
-# Cache for Auth0 public key
-_jwks_cache = None
+class JWKSKeySet:
+    """
+    Auth0 signing keys indexed by `kid`, as ready-to-use key objects.
 
-async def get_jwks():
-    global _jwks_cache
-    if _jwks_cache is None:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://{settings.auth0_domain}/.well-known/jwks.json"
-            )
-            _jwks_cache = response.json()
-    return _jwks_cache
+    Keys are refetched once `ttl` has passed, or when a token names a kid
+    we don't know (key rotation) - at most once per `min_refresh_interval`
+    so garbage kids can't make us hammer Auth0. Concurrent refreshes share
+    one in-flight fetch.
+    """
+
+    def __init__(self, url: str, ttl: float, min_refresh_interval: float = 30):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, Key] = {}
+        self.fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+    async def get_key(self, kid: str) -> Optional[Key]:
+        now = time.monotonic()
+        if self.fetched_at is None or now - self.fetched_at >= self.ttl:
+            await self.refresh()
+        elif kid not in self.keys and now - self.fetched_at >= self.min_refresh_interval:
+            await self.refresh()
+        return self.keys.get(kid)
+
+    async def refresh(self):
+        """Refetch the JWKS, joining a fetch that is already running"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # shield: one cancelled request must not cancel everyone's fetch
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, _future: asyncio.Future):
+        self._inflight = None
+
+    async def _fetch(self):
+        try:
+            async with httpx.AsyncClient(timeout=10) as client:
+                with external_call("auth0_jwks"):
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                jwks = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            if not self.keys:
+                raise
+            # Keep serving the keys we have; retry after min_refresh_interval
+            logger.warning(f"JWKS refresh failed, keeping {len(self.keys)} cached keys: {e}")
+            self.fetched_at = time.monotonic() - self.ttl + self.min_refresh_interval
+            return
+
+        self.load(jwks)
+
+    def load(self, jwks: dict):
+        """Swap in a new key set (also used to preload keys at startup)"""
+        keys = {}
+        for key in jwks.get("keys", []):
+            if key.get("use", "sig") != "sig" or "kid" not in key:
+                continue
+            try:
+                keys[key["kid"]] = jwk.construct(
+                    key, algorithm=key.get("alg", settings.auth0_algorithms[0])
+                )
+            except JWTError as e:
+                logger.warning(f"Skipping unusable JWKS key {key['kid']}: {e}")
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+
+jwks_keys = JWKSKeySet(
+    url=f"https://{settings.auth0_domain}/.well-known/jwks.json",
+    ttl=settings.auth0_jwks_ttl_seconds
+)
+
+# Payloads of tokens that already passed verification, keyed by the token's
+# SHA-256. Entries never outlive the token's `exp`.
+verified_tokens = TTLCache(
+    max_size=settings.token_cache_max_size,
+    ttl=settings.token_cache_max_ttl_seconds,
+    name="tokens"
+)
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 async def verify_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """Verify Auth0 JWT token"""
     token = credentials.credentials
-    
+    cache_key = _token_cache_key(token)
+
+    payload = verified_tokens.get(cache_key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         # Get signing key from Auth0
-        jwks = await get_jwks()
         unverified_header = jwt.get_unverified_header(token)
-        rsa_key = {}
-        
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
-                
-        if not rsa_key:
+        try:
+            key = await jwks_keys.get_key(unverified_header.get("kid"))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Could not fetch Auth0 JWKS: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Unable to fetch signing keys"
+            )
+
+        if key is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Unable to find appropriate key"
             )
-        
+
         # Verify token
         payload = jwt.decode(
             token,
-            rsa_key,
+            key,
             algorithms=settings.auth0_algorithms,
             audience=settings.auth0_api_audience,
             issuer=f"https://{settings.auth0_domain}/"
         )
-        
-        return payload
-        
+
     except JWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {str(e)}"
         )
 
+    exp = payload.get("exp")
+    if exp is not None:
+        remaining = exp - time.time()
+        if remaining > 0:
+            verified_tokens.set(
+                cache_key,
+                payload,
+                ttl=min(remaining, verified_tokens.ttl)
+            )
+
+    return dict(payload)
+
 async def get_current_user_id(token_payload: dict = Depends(verify_token)) -> str:
     """Extract user ID from verified token"""
     user_id = token_payload.get("sub")
@@ -73,4 +165,4 @@ async def get_current_user_id(token_payload: dict = Depends(verify_token)) -> st
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User ID not found in token"
         )
-    return user_id
\ No newline at end of file
+    return user_id
@@ -1,54 +1,194 @@
 # In: app/utils/auth0_management.py
 
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+from urllib.parse import quote
+
 import httpx
-from functools import lru_cache
 from app.config import get_settings
+from app.utils.metrics import external_call
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-@lru_cache(maxsize=1)
-def get_auth0_management_token() -> str:
+class Auth0ManagementClient:
     """
-    Get a new Management API token from Auth0.
-    This is cached in memory.
+    Async client for the Auth0 Management API.
+
+    - One pooled httpx.AsyncClient, so calls reuse TLS connections.
+    - The access token is refreshed `refresh_margin` seconds before it
+      expires; concurrent callers wait on a single token request.
+    - At most `max_concurrency` calls are in flight; 429s (and 503s) are
+      retried with Retry-After or exponential backoff. A Retry-After
+      longer than `max_retry_delay` isn't waited out: the 429 is returned
+      to the caller, who is usually inside a request.
+
+    `base_url` and `transport` let tests point it at a local stub server.
     """
-    payload = {
-        "client_id": settings.auth0_management_client_id,
-        "client_secret": settings.auth0_management_client_secret,
-        "audience": f"https://{settings.auth0_domain}/api/v2/",
-        "grant_type": "client_credentials"
-    }
-    headers = {'content-type': "application/json"}
-    
-    try:
-        response = httpx.post(f"https://{settings.auth0_domain}/oauth/token", json=payload, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad responses (4xx, 5xx)
-        token_data = response.json()
-        return token_data["access_token"]
-    except httpx.HTTPStatusError as e:
-        print(f"Error getting Auth0 Management Token: {e}")
-        raise
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        raise
+
+    def __init__(
+        self,
+        domain: str,
+        client_id: str,
+        client_secret: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 5,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        max_retry_delay: float = 10,
+        refresh_margin: float = 60,
+        timeout: float = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.domain = domain
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base_url = (base_url or f"https://{domain}").rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_retry_delay = max_retry_delay
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self._transport = transport
+        self._max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self._max_concurrency,
+                    max_keepalive_connections=self._max_concurrency
+                ),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._token_lock = asyncio.Lock()
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _token_is_fresh(self) -> bool:
+        return (
+            self._token is not None
+            and time.monotonic() < self._token_expires_at - self.refresh_margin
+        )
+
+    async def get_token(self) -> str:
+        """Return a Management API token, fetching a new one if it is about to expire"""
+        if self._token_is_fresh():
+            return self._token
+
+        self._http()
+        async with self._token_lock:
+            # Another caller may have refreshed it while we waited
+            if self._token_is_fresh():
+                return self._token
+
+            response = await self._send("POST", "/oauth/token", json={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "audience": f"https://{self.domain}/api/v2/",
+                "grant_type": "client_credentials"
+            })
+            response.raise_for_status()
+            token_data = response.json()
+            self._token = token_data["access_token"]
+            self._token_expires_at = time.monotonic() + token_data.get("expires_in", 86400)
+            return self._token
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                pass
+        delay = self.backoff_base * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send one request under the concurrency limit, retrying rate limits"""
+        client = self._http()
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                with external_call("auth0_management") as call:
+                    response = await client.request(method, path, **kwargs)
+                    if response.status_code >= 400:
+                        call.outcome = str(response.status_code)
+            if response.status_code not in (429, 503) or attempt == self.max_retries:
+                return response
+            delay = self._retry_delay(response, attempt)
+            if delay > self.max_retry_delay:
+                logger.warning(
+                    f"Auth0 {method} {path} returned {response.status_code} with "
+                    f"Retry-After {delay:.0f}s, not retrying"
+                )
+                return response
+            logger.warning(
+                f"Auth0 {method} {path} returned {response.status_code}, "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        return response
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Authenticated Management API call; retries once if the token was rejected"""
+        for attempt in range(2):
+            token = await self.get_token()
+            response = await self._send(
+                method, path, headers={"Authorization": f"Bearer {token}"}, **kwargs
+            )
+            if response.status_code != 401 or attempt == 1:
+                return response
+            # Revoked or rotated early - force a new one
+            self._token = None
+        return response
+
+    async def update_app_metadata(self, user_id: str, metadata: dict) -> bool:
+        response = await self.request(
+            "PATCH",
+            f"/api/v2/users/{quote(user_id, safe='')}",
+            json={"app_metadata": metadata}
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error updating Auth0 metadata for {user_id}: {e}")
+            return False
+        return True
+
+management_client = Auth0ManagementClient(
+    domain=settings.auth0_domain,
+    client_id=settings.auth0_management_client_id,
+    client_secret=settings.auth0_management_client_secret,
+    base_url=settings.auth0_management_base_url or None,
+    max_concurrency=settings.auth0_management_max_concurrency,
+    max_retry_delay=settings.auth0_management_max_retry_delay_seconds
+)
+
+async def get_auth0_management_token() -> str:
+    """
+    Get a Management API token from Auth0.
+    Cached in memory until shortly before it expires.
+    """
+    return await management_client.get_token()
 
 async def update_auth0_app_metadata(user_id: str, metadata: dict) -> bool:
     """
     Updates the app_metadata for a given Auth0 user.
     """
-    token = get_auth0_management_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    url = f"https://{settings.auth0_domain}/api/v2/users/{user_id}"
-    payload = {"app_metadata": metadata}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.patch(url, json=payload, headers=headers)
-            response.raise_for_status()
-            return True
-        except httpx.HTTPStatusError as e:
-            print(f"Error updating Auth0 metadata for {user_id}: {e}")
-            return False
\ No newline at end of file
+    return await management_client.update_app_metadata(user_id, metadata)
@@ -0,0 +1,187 @@
+"""
+Per-request database instrumentation, from SQLAlchemy events.
+
+With `db_instrumentation` on, every statement's cursor time is added to
+the current request's DBRequestStats (a ContextVar that DBStatsMiddleware
+sets per request), and the request's totals go out in the response
+headers and one log line:
+
+    X-DB-Queries: 7
+    Server-Timing: db;dur=12.41, db-pool;dur=0.03
+
+Statements are normalized (literals and parameters -> ?, IN lists
+collapsed) so the same query with different values counts as one. A
+request that runs one normalized statement `db_n_plus_one_threshold`
+times is logged as a likely N+1, statements slower than
+`db_slow_query_ms` go to the slow-query log, and connection checkout
+time is measured by the pool. Process totals are on /health.
+
+With it off, no listeners, pool subclass or middleware are installed,
+so it costs nothing. `db_echo` still logs every statement, for local
+debugging only.
+"""
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import get_settings
+from app.utils.percentile import percentile
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+\b|\?"), "?"),
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?)"),
+    (re.compile(r"\(__\[POSTCOMPILE_\w+\]\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """SELECT ... WHERE id IN ($1, $2, $3) LIMIT 5 -> SELECT ... WHERE id IN (?) LIMIT ?"""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+@dataclass
+class DBRequestStats:
+    queries: int = 0
+    db_ms: float = 0.0
+    pool_wait_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    repeated: List[str] = field(default_factory=list)  # N+1 suspects
+
+    def headers(self) -> List[tuple]:
+        timing = f"db;dur={self.db_ms:.2f}, db-pool;dur={self.pool_wait_ms:.2f}"
+        return [(b"x-db-queries", str(self.queries).encode()), (b"server-timing", timing.encode())]
+
+_current: ContextVar[Optional[DBRequestStats]] = ContextVar("db_request_stats", default=None)
+
+class DBStats:
+    """Process-wide totals, for /health"""
+
+    def __init__(self):
+        self.enabled = False
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slow_queries = 0
+        self.n_plus_one = 0
+        self._pool_waits: deque = deque(maxlen=1000)
+
+    def stats(self) -> dict:
+        wait_p95 = percentile(sorted(self._pool_waits), 0.95)
+        return {
+            "enabled": self.enabled,
+            "queries": self.queries,
+            "db_ms": round(self.db_ms, 1),
+            "slow_queries": self.slow_queries,
+            "n_plus_one": self.n_plus_one,
+            "pool_wait_p95_ms": round(wait_p95, 3) if wait_p95 is not None else None,
+        }
+
+db_stats = DBStats()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._query_started) * 1000
+    db_stats.queries += 1
+    db_stats.db_ms += elapsed_ms
+    if elapsed_ms >= settings.db_slow_query_ms:
+        db_stats.slow_queries += 1
+        logger.warning("slow query %.1f ms: %s", elapsed_ms, normalize_statement(statement))
+
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_ms += elapsed_ms
+    normalized = normalize_statement(statement)
+    stats.statements[normalized] += 1
+    if stats.statements[normalized] == settings.db_n_plus_one_threshold:
+        db_stats.n_plus_one += 1
+        stats.repeated.append(normalized)
+
+def _record_pool_wait(started: float):
+    waited_ms = (time.perf_counter() - started) * 1000
+    db_stats._pool_waits.append(waited_ms)
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_ms += waited_ms
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait(started)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait(started)
+
+def instrument_engine(engine):
+    """Attach the cursor listeners to a (sync, or an async engine's sync_engine) Engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    db_stats.enabled = True
+
+class DBStatsMiddleware:
+    """
+    ASGI middleware: one DBRequestStats per HTTP request, sent back as
+    headers when the response starts and logged when it ends. Queries a
+    streamed response runs after its headers are out only make the log.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = DBRequestStats()
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_stats(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), *stats.headers()]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            logger.info(
+                "%s %s %s: %d queries, %.1f ms db, %.1f ms pool wait",
+                scope["method"], route, status, stats.queries, stats.db_ms, stats.pool_wait_ms
+            )
+            for statement in stats.repeated:
+                logger.warning(
+                    "possible N+1 in %s %s: %d x %s",
+                    scope["method"], route, stats.statements[statement], statement
+                )
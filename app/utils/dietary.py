@@ -0,0 +1,175 @@
+"""
+Allergen / diet bitmasks.
+
+Every recipe stores `contains_mask`: one bit per category below that any
+of its ingredients falls into. Every user stores `exclusion_mask`: the
+categories their diet and food exclusions rule out. A recipe suits a
+user when
+
+    recipes.contains_mask & users.exclusion_mask = 0
+
+Bit positions are persisted in the database: append new categories at
+the end and never renumber (then rerun app.jobs.backfill_diet_masks).
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from app.utils.ingredients import ingredient_name, normalize_ingredient
+
+_CATEGORIES = [
+    "dairy", "egg", "gluten", "peanut", "tree_nut", "soy", "fish", "shellfish",
+    "sesame", "pork", "beef", "poultry", "other_meat", "alcohol", "honey",
+]
+CATEGORY_BITS = {name: 1 << bit for bit, name in enumerate(_CATEGORIES)}
+
+def _mask(*categories: str) -> int:
+    mask = 0
+    for category in categories:
+        mask |= CATEGORY_BITS[category]
+    return mask
+
+MEAT = _mask("pork", "beef", "poultry", "other_meat")
+SEAFOOD = _mask("fish", "shellfish")
+VEGETARIAN = MEAT | SEAFOOD
+VEGAN = VEGETARIAN | _mask("dairy", "egg", "honey")
+
+# Normalized ingredient phrase -> categories. Matched longest phrase first,
+# so "peanut butter" is not dairy and "coconut milk" is nothing at all.
+_LEXICON = {
+    # dairy
+    "milk": _mask("dairy"), "butter": _mask("dairy"), "cheese": _mask("dairy"),
+    "cream": _mask("dairy"), "yogurt": _mask("dairy"), "yoghurt": _mask("dairy"),
+    "ghee": _mask("dairy"), "whey": _mask("dairy"), "buttermilk": _mask("dairy"),
+    "parmesan": _mask("dairy"), "mozzarella": _mask("dairy"), "cheddar": _mask("dairy"),
+    "ricotta": _mask("dairy"), "feta": _mask("dairy"), "mascarpone": _mask("dairy"),
+    "paneer": _mask("dairy"), "kefir": _mask("dairy"), "custard": _mask("dairy") | _mask("egg"),
+    # egg
+    "egg": _mask("egg"), "mayonnaise": _mask("egg"), "mayo": _mask("egg"),
+    "aioli": _mask("egg"), "meringue": _mask("egg"),
+    # gluten
+    "flour": _mask("gluten"), "wheat": _mask("gluten"), "bread": _mask("gluten"),
+    "breadcrumb": _mask("gluten"), "panko": _mask("gluten"), "pasta": _mask("gluten"),
+    "spaghetti": _mask("gluten"), "penne": _mask("gluten"), "macaroni": _mask("gluten"),
+    "noodle": _mask("gluten"), "couscous": _mask("gluten"), "barley": _mask("gluten"),
+    "rye": _mask("gluten"), "bulgur": _mask("gluten"), "farro": _mask("gluten"),
+    "semolina": _mask("gluten"), "seitan": _mask("gluten"), "tortilla": _mask("gluten"),
+    "pita": _mask("gluten"), "bagel": _mask("gluten"), "cracker": _mask("gluten"),
+    "beer": _mask("gluten", "alcohol"),
+    # nuts and seeds
+    "peanut": _mask("peanut"), "peanut butter": _mask("peanut"),
+    "almond": _mask("tree_nut"), "walnut": _mask("tree_nut"), "cashew": _mask("tree_nut"),
+    "pecan": _mask("tree_nut"), "pistachio": _mask("tree_nut"), "hazelnut": _mask("tree_nut"),
+    "macadamia": _mask("tree_nut"), "pine nut": _mask("tree_nut"), "brazil nut": _mask("tree_nut"),
+    "almond milk": _mask("tree_nut"), "almond butter": _mask("tree_nut"),
+    "sesame": _mask("sesame"), "tahini": _mask("sesame"),
+    # soy
+    "soy": _mask("soy"), "soybean": _mask("soy"), "tofu": _mask("soy"), "tempeh": _mask("soy"),
+    "edamame": _mask("soy"), "miso": _mask("soy"), "soy milk": _mask("soy"),
+    "soy sauce": _mask("soy", "gluten"), "tamari": _mask("soy"),
+    # seafood
+    "fish": _mask("fish"), "fish sauce": _mask("fish"), "salmon": _mask("fish"),
+    "tuna": _mask("fish"), "cod": _mask("fish"), "tilapia": _mask("fish"),
+    "anchovy": _mask("fish"), "sardine": _mask("fish"), "trout": _mask("fish"),
+    "halibut": _mask("fish"), "mackerel": _mask("fish"),
+    "shrimp": _mask("shellfish"), "prawn": _mask("shellfish"), "crab": _mask("shellfish"),
+    "lobster": _mask("shellfish"), "clam": _mask("shellfish"), "mussel": _mask("shellfish"),
+    "oyster": _mask("shellfish"), "scallop": _mask("shellfish"),
+    "oyster sauce": _mask("shellfish"),
+    # meat
+    "pork": _mask("pork"), "bacon": _mask("pork"), "ham": _mask("pork"),
+    "prosciutto": _mask("pork"), "pancetta": _mask("pork"), "chorizo": _mask("pork"),
+    "salami": _mask("pork"), "pepperoni": _mask("pork"), "lard": _mask("pork"),
+    "sausage": _mask("pork"),
+    "beef": _mask("beef"), "steak": _mask("beef"), "veal": _mask("beef"), "brisket": _mask("beef"),
+    "chicken": _mask("poultry"), "turkey": _mask("poultry"), "duck": _mask("poultry"),
+    "lamb": _mask("other_meat"), "mutton": _mask("other_meat"), "goat": _mask("other_meat"),
+    "venison": _mask("other_meat"), "bison": _mask("other_meat"),
+    "gelatin": _mask("beef", "pork"),
+    # other
+    "wine": _mask("alcohol"), "rum": _mask("alcohol"), "vodka": _mask("alcohol"),
+    "whiskey": _mask("alcohol"), "bourbon": _mask("alcohol"), "brandy": _mask("alcohol"),
+    "sake": _mask("alcohol"), "honey": _mask("honey"),
+    # look-alikes that contain none of the above
+    "coconut milk": 0, "coconut cream": 0, "oat milk": 0, "rice milk": 0,
+    "cocoa butter": 0, "cream of tartar": 0, "rice noodle": 0, "corn tortilla": 0,
+    "rice flour": 0, "almond flour": _mask("tree_nut"), "coconut flour": 0,
+    "chickpea flour": 0, "corn flour": 0, "buckwheat": 0, "eggplant": 0,
+    "flax egg": 0, "chia egg": 0, "egg replacer": 0, "turkey bacon": _mask("poultry"),
+    "cashew cream": _mask("tree_nut"), "coconut yogurt": 0, "chicken sausage": _mask("poultry"),
+}
+_MAX_PHRASE = max(len(phrase.split()) for phrase in _LEXICON)
+
+# Qualifiers that take categories back out: "gluten free pasta", "vegan butter"
+_FREE_OF = {
+    "gluten free": _mask("gluten"),
+    "dairy free": _mask("dairy"),
+    "egg free": _mask("egg"),
+    "vegan": VEGAN,
+    "plant based": VEGAN,
+    "non alcoholic": _mask("alcohol"),
+}
+
+# What a food_exclusions entry can name as a whole category
+_EXCLUSION_ALIASES = {
+    **{name.replace("_", " "): bit for name, bit in CATEGORY_BITS.items()},
+    "milk": _mask("dairy"), "lactose": _mask("dairy"),
+    "wheat": _mask("gluten"), "nut": _mask("peanut", "tree_nut"), "tree nut": _mask("tree_nut"),
+    "seafood": SEAFOOD, "meat": MEAT, "red meat": _mask("pork", "beef", "other_meat"),
+    "soy": _mask("soy"), "soya": _mask("soy"),
+}
+
+DIET_EXCLUSIONS = {
+    "vegetarian": VEGETARIAN,
+    "pescatarian": MEAT,
+    "vegan": VEGAN,
+    "gluten free": _mask("gluten"),
+    "dairy free": _mask("dairy"),
+    "halal": _mask("pork", "alcohol"),
+}
+
+def ingredient_mask(name: str) -> int:
+    """Categories one ingredient belongs to"""
+    normalized = normalize_ingredient(name)
+    mask = 0
+    words = normalized.split()
+    i = 0
+    while i < len(words):
+        for size in range(min(_MAX_PHRASE, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + size])
+            if phrase in _LEXICON:
+                mask |= _LEXICON[phrase]
+                i += size
+                break
+        else:
+            i += 1
+    for qualifier, removed in _FREE_OF.items():
+        if f" {qualifier} " in f" {normalized} ":
+            mask &= ~removed
+    return mask
+
+def recipe_contains_mask(ingredients: Optional[list], main_ingredients: Optional[list] = None) -> int:
+    mask = 0
+    for ingredient in list(ingredients or []) + list(main_ingredients or []):
+        mask |= ingredient_mask(ingredient_name(ingredient))
+    return mask
+
+def profile_mask(diet_type: Optional[str], exclusions: Optional[Iterable[str]]) -> Tuple[int, List[str]]:
+    """
+    Compile a user's diet and food exclusions into an exclusion mask.
+    Exclusions that aren't a whole category ("cilantro") can't be a bit;
+    they come back normalized as the second element so callers can
+    filter on them separately.
+    """
+    mask = DIET_EXCLUSIONS.get(normalize_ingredient(diet_type or ""), 0)
+    unmapped = []
+    for exclusion in exclusions or []:
+        term = normalize_ingredient(exclusion)
+        if term in _EXCLUSION_ALIASES:
+            mask |= _EXCLUSION_ALIASES[term]
+        elif term in DIET_EXCLUSIONS:
+            mask |= DIET_EXCLUSIONS[term]
+        elif term:
+            unmapped.append(term)
+    return mask, unmapped
+
+def describe_mask(mask: int) -> List[str]:
+    return [name for name, bit in CATEGORY_BITS.items() if mask & bit]
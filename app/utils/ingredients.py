@@ -0,0 +1,26 @@
+import re
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def normalize_ingredient(name: str) -> str:
+    """'Cherry Tomatoes,' -> 'cherry tomato'"""
+    name = _NON_WORD.sub(" ", name.lower())
+    return " ".join(_singular(word) for word in _SPACES.split(name.strip()) if word)
+
+def ingredient_name(ingredient) -> str:
+    """Recipe.ingredients entries are either strings or objects with a name"""
+    if isinstance(ingredient, dict):
+        return str(ingredient.get("name") or ingredient.get("item") or "")
+    return str(ingredient)
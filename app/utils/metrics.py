@@ -0,0 +1,223 @@
+"""
+Prometheus metrics, served as text on GET /metrics.
+
+- HTTP latency histograms and in-flight gauges, labelled by method,
+  route template (/api/pantry/{item_id}, never the raw path) and status
+  (MetricsMiddleware)
+- hits and misses for every named TTLCache
+- latency and outcome of calls to Auth0, SendGrid and the AI provider
+  (external_call)
+- DB pool checked-out and open connections, per engine (instrument_pool)
+
+Multiple uvicorn workers: set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before the workers start, and empty it on every
+deploy. Each worker then writes its samples to mmapped files there and
+/metrics merges all of them, so counters and histograms add up whichever
+worker answers the scrape (gauges are summed over live workers). Without
+it, /metrics reports only the process that serves it.
+
+Recording is a dict lookup and a float add (plus an mmap write in
+multiprocess mode) per sample, a few microseconds per request; see
+benchmarks/bench_metrics.py. `metrics_enabled=false` turns all of it off.
+"""
+import asyncio
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.config import get_settings
+
+settings = get_settings()
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# 5 ms .. 30 s; streamed meal plans land in the top buckets
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HTTP_LATENCY = Histogram(
+    "athyra_http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "athyra_http_requests_in_flight", "HTTP requests being served",
+    ["method", "route"], multiprocess_mode="livesum"
+)
+CACHE_REQUESTS = Counter(
+    "athyra_cache_requests_total", "In-process cache lookups",
+    ["cache", "result"]
+)
+EXTERNAL_LATENCY = Histogram(
+    "athyra_external_request_duration_seconds", "Calls to external services",
+    ["service", "outcome"], buckets=_LATENCY_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "athyra_db_pool_checked_out", "DB connections in use",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "athyra_db_pool_connections", "DB connections open (in use or idle)",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_SIZE = Gauge(
+    "athyra_db_pool_size", "Configured DB pool size",
+    ["engine"], multiprocess_mode="livesum"
+)
+
+def render() -> Tuple[bytes, str]:
+    """Exposition text and its content type"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_process_dead():
+    """Drop this worker's live gauges; call on shutdown"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+def cache_counters(name: str) -> Optional[Tuple[Counter, Counter]]:
+    """(hits, misses) counters for a named cache, bound once"""
+    if not settings.metrics_enabled:
+        return None
+    return CACHE_REQUESTS.labels(name, "hit"), CACHE_REQUESTS.labels(name, "miss")
+
+class ExternalCall:
+    outcome = "ok"
+
+@contextmanager
+def external_call(service: str) -> Iterator[ExternalCall]:
+    """
+    Time a call to an external service. An exception marks it "error"
+    (or "cancelled" when the caller went away); callers can set
+    `.outcome` themselves for failures that don't raise, e.g. a 429 that
+    gets retried.
+    """
+    call = ExternalCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except (asyncio.CancelledError, GeneratorExit):
+        call.outcome = "cancelled"
+        raise
+    except BaseException:
+        call.outcome = "error"
+        raise
+    finally:
+        if settings.metrics_enabled:
+            EXTERNAL_LATENCY.labels(service, call.outcome).observe(time.perf_counter() - started)
+
+def instrument_pool(engine, name: str):
+    """Keep the pool gauges current from checkout/checkin events"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return  # SQLite's pools don't count connections
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    connections = DB_POOL_CONNECTIONS.labels(name)
+    DB_POOL_SIZE.labels(name).set(pool.size())
+
+    def update(*_):
+        checked_out.set(pool.checkedout())
+        connections.set(pool.checkedout() + pool.checkedin())
+
+    for event_name in ("checkout", "checkin", "close", "close_detached"):
+        event.listen(engine, event_name, update)
+
+def _route_template(routes, scope) -> str:
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return getattr(route, "path", "unmatched")
+        if match is Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+    # PARTIAL: right path, wrong method (405)
+    return partial or "unmatched"
+
+class RouteTemplates:
+    """
+    Request path -> route template. Every route's path regex is folded
+    into one alternation, so a lookup is a single regex match instead of
+    asking each route in turn (which also builds its path params). When
+    the first route matching the path doesn't take the method, the
+    router's own per-route matching decides.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self._pattern = None
+        self._count = -1
+
+    def _compile(self):
+        alternatives = []
+        for index, route in enumerate(self.routes):
+            regex = getattr(route, "path_regex", None)
+            if regex is not None:
+                # Path params become plain groups: names can't repeat across alternatives
+                body = re.sub(r"\(\?P<\w+>", "(?:", regex.pattern[1:-1])
+                alternatives.append(f"(?P<r{index}>{body})")
+        self._pattern = re.compile(f"^(?:{'|'.join(alternatives)})$")
+        self._count = len(self.routes)
+
+    def resolve(self, scope) -> str:
+        if self._count != len(self.routes):  # routes added after startup
+            self._compile()
+        match = self._pattern.match(scope["path"])
+        if match is None:
+            return "unmatched"
+        route = self.routes[int(match.lastgroup[1:])]
+        methods = getattr(route, "methods", None)
+        if methods is None or scope["method"] in methods:
+            return route.path
+        return _route_template(self.routes, scope)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and in-flight requests. The route
+    is resolved up front (RouteTemplates) so the in-flight gauge has it
+    too. Streamed responses count until their last chunk.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = RouteTemplates(routes)
+        # (method, route[, status]) -> bound child, skipping labels()' lock
+        self._in_flight = {}
+        self._latency = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.routes.resolve(scope)
+        in_flight = self._in_flight.get((method, route))
+        if in_flight is None:
+            in_flight = self._in_flight[method, route] = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            latency = self._latency.get((method, route, status))
+            if latency is None:
+                latency = self._latency[method, route, status] = HTTP_LATENCY.labels(method, route, str(status))
+            latency.observe(time.perf_counter() - started)
@@ -0,0 +1,24 @@
+import base64
+import binascii
+from typing import List
+
+from fastapi import HTTPException
+
+# Unit separator: can't appear in ids or ISO timestamps
+_SEPARATOR = "\x1f"
+
+def encode_cursor(*parts) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor"""
+    raw = _SEPARATOR.join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[str]:
+    """Unpack a cursor made by encode_cursor() into its `size` string parts"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().split(_SEPARATOR)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        parts = []
+    if len(parts) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return parts
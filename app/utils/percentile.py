@@ -0,0 +1,12 @@
+import math
+from typing import Optional, Sequence
+
+def percentile(ordered: Sequence[float], p: float) -> Optional[float]:
+    """
+    Nearest-rank percentile (0 < p <= 1) of an already sorted sample:
+    the smallest value with at least p of the sample at or below it.
+    None for an empty sample.
+    """
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(len(ordered) * p) - 1, 0)]
@@ -0,0 +1,40 @@
+"""
+Fast JSON for list endpoints.
+
+With a `response_model`, FastAPI validates whatever the route returned
+(usually ORM instances, through from_attributes), dumps the result to
+Python dicts, then encodes those with the JSON encoder. For a few hundred
+pantry items that conversion costs more than the query.
+
+A ResponseAdapter compiles a pydantic TypeAdapter for the response type
+once. Routes select just the schema's columns (plain rows, no ORM
+instances or identity map), and the adapter validates the rows and
+writes JSON bytes in one pass inside pydantic-core. Keep the
+`response_model` on the route for the OpenAPI schema; the Response the
+adapter builds is sent as is.
+
+Everything else is rendered by ORJSONResponse, the app's default
+response class.
+"""
+from typing import Any, Dict, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class ResponseAdapter:
+    def __init__(self, schema: Type[BaseModel], many: bool = True):
+        self.schema = schema
+        self.many = many
+        self.adapter = TypeAdapter(List[schema] if many else schema)
+
+    def columns(self, model) -> list:
+        """The ORM columns the schema reads, for select(*adapter.columns(Model))"""
+        return [getattr(model, name) for name in self.schema.model_fields]
+
+    def dump(self, value: Any) -> bytes:
+        """Rows, ORM objects or dicts -> JSON bytes"""
+        return self.adapter.dump_json(self.adapter.validate_python(value, from_attributes=True))
+
+    def response(self, value: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(self.dump(value), status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,129 @@
+"""
+Cooking units and quantities.
+
+Every unit maps to a base unit for its dimension: grams for weight,
+millilitres for volume, and for countable things the thing itself
+("clove", "can", "each"). The table is compiled once into numpy arrays
+so a whole shopping list converts with one gather and one multiply:
+
+    base_amounts = quantities * UNIT_FACTORS[unit_ids]
+
+Weight and volume are never converted into each other (that needs a
+density per ingredient), so "1 cup flour" and "200 g flour" stay two
+lines on a shopping list.
+"""
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.utils.ingredients import ingredient_name, normalize_ingredient
+
+# alias -> (base unit, factor to the base unit)
+_UNITS = {
+    # weight
+    "g": ("g", 1.0), "gram": ("g", 1.0), "gramme": ("g", 1.0), "gr": ("g", 1.0),
+    "kg": ("g", 1000.0), "kilogram": ("g", 1000.0), "kilo": ("g", 1000.0),
+    "mg": ("g", 0.001), "milligram": ("g", 0.001),
+    "oz": ("g", 28.3495), "ounce": ("g", 28.3495),
+    "lb": ("g", 453.592), "lbs": ("g", 453.592), "pound": ("g", 453.592), "kgs": ("g", 1000.0),
+    # volume
+    "ml": ("ml", 1.0), "mls": ("ml", 1.0), "millilitre": ("ml", 1.0), "milliliter": ("ml", 1.0),
+    "cl": ("ml", 10.0), "dl": ("ml", 100.0),
+    "l": ("ml", 1000.0), "litre": ("ml", 1000.0), "liter": ("ml", 1000.0),
+    "tsp": ("ml", 4.92892), "teaspoon": ("ml", 4.92892),
+    "tbsp": ("ml", 14.7868), "tablespoon": ("ml", 14.7868), "tbs": ("ml", 14.7868),
+    "cup": ("ml", 236.588), "c": ("ml", 236.588),
+    "fl oz": ("ml", 29.5735), "fluid ounce": ("ml", 29.5735),
+    "pint": ("ml", 473.176), "pt": ("ml", 473.176),
+    "quart": ("ml", 946.353), "qt": ("ml", 946.353),
+    "gallon": ("ml", 3785.41), "gal": ("ml", 3785.41),
+    "pinch": ("ml", 0.31), "dash": ("ml", 0.62),
+    # counts
+    "": ("each", 1.0), "each": ("each", 1.0), "ea": ("each", 1.0), "piece": ("each", 1.0),
+    "pc": ("each", 1.0), "pcs": ("each", 1.0), "whole": ("each", 1.0), "unit": ("each", 1.0), "item": ("each", 1.0),
+    "dozen": ("each", 12.0),
+    "clove": ("clove", 1.0), "can": ("can", 1.0), "tin": ("can", 1.0), "jar": ("jar", 1.0),
+    "bottle": ("bottle", 1.0), "bunch": ("bunch", 1.0), "head": ("head", 1.0),
+    "slice": ("slice", 1.0), "sprig": ("sprig", 1.0), "stalk": ("stalk", 1.0),
+    "package": ("package", 1.0), "pack": ("package", 1.0), "pkg": ("package", 1.0),
+    "packet": ("package", 1.0), "bag": ("bag", 1.0), "box": ("box", 1.0), "loaf": ("loaf", 1.0),
+}
+
+UNIT_IDS = {alias: i for i, alias in enumerate(_UNITS)}
+UNIT_FACTORS = np.array([factor for _, factor in _UNITS.values()], dtype=np.float64)
+UNIT_BASES = [base for base, _ in _UNITS.values()]
+
+# Bigger display units for the metric bases
+_DISPLAY = {"g": (1000.0, "kg"), "ml": (1000.0, "l")}
+
+_VULGAR = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅛": "1/8"}
+_LEADING_QUANTITY = re.compile(
+    r"^\s*((?:\d+\s+)?\d+\s*/\s*\d+|\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*[\d./]+)?\s*(.*)$"
+)
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """'Tbsp.' -> 'tbsp', 'Cups' -> 'cup'; unknown units come back normalized"""
+    return normalize_ingredient(unit or "")
+
+def unit_id(unit: Optional[str]) -> Optional[int]:
+    """Row of UNIT_FACTORS/UNIT_BASES for `unit`, None if unknown"""
+    return UNIT_IDS.get(normalize_unit(unit))
+
+def parse_quantity(value) -> Optional[float]:
+    """2, '2', '1/2', '1 1/2', '½', '2-3' (the lower end) -> float"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    for glyph, fraction in _VULGAR.items():
+        text = text.replace(glyph, f" {fraction}")
+    match = _LEADING_QUANTITY.match(text)
+    if not match:
+        return None
+    try:
+        return float(sum(Fraction(part) for part in match.group(1).replace(" /", "/").replace("/ ", "/").split()))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+@lru_cache(maxsize=65536)
+def parse_ingredient_text(text: str) -> Tuple[Optional[float], str, str]:
+    """'2 cups flour' -> (2.0, 'cup', 'flour'); '1 onion' -> (1.0, '', 'onion')"""
+    for glyph, fraction in _VULGAR.items():
+        text = text.replace(glyph, f" {fraction}")
+    match = _LEADING_QUANTITY.match(text)
+    if not match:
+        return None, "", text
+    quantity = parse_quantity(match.group(1))
+    rest = match.group(2).split()
+    # Longest unit first: "fl oz" before "fl"
+    for size in (2, 1):
+        if len(rest) > size and normalize_unit(" ".join(rest[:size])) in UNIT_IDS:
+            return quantity, normalize_unit(" ".join(rest[:size])), " ".join(rest[size:])
+    return quantity, "", " ".join(rest)
+
+def parse_ingredient(ingredient) -> Tuple[Optional[float], str, str]:
+    """
+    A Recipe.ingredients entry -> (quantity, unit, name). Objects carry
+    quantity/amount and unit fields; plain strings may lead with them.
+    """
+    if isinstance(ingredient, dict):
+        quantity = ingredient.get("quantity", ingredient.get("amount", ingredient.get("qty")))
+        unit = ingredient.get("unit") or ""
+        name = ingredient_name(ingredient)
+        if quantity is None and not unit:
+            return parse_ingredient_text(name)
+        return parse_quantity(quantity), normalize_unit(unit), name
+    return parse_ingredient_text(str(ingredient))
+
+def display_unit(amount: float, base: str) -> Tuple[float, str]:
+    """(divisor, unit) to show `amount` of `base` in: 1500 g -> (1000, 'kg')"""
+    scale, unit = _DISPLAY.get(base, (None, base))
+    if scale and amount >= scale:
+        return scale, unit
+    return 1.0, base
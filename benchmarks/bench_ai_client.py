@@ -0,0 +1,63 @@
+"""
+Show what caching and request coalescing save on LLM calls.
+
+Runs AIClient against the in-process fake provider: many concurrent
+requests over a small set of distinct prompts (the same context arriving
+with different list order and casing), then the same burst again once the
+cache is warm:
+
+    python -m benchmarks.bench_ai_client --requests 500 --distinct 25 --latency 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.utils.ai_client import AIClient
+from benchmarks.fake_ai_provider import fake_provider
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    fake_provider.state.latency = args.latency
+    client = AIClient(
+        api_key="bench",
+        model="fake-model",
+        base_url="http://fake",
+        max_concurrency=args.concurrency,
+        transport=httpx.ASGITransport(app=fake_provider),
+    )
+    rng = random.Random(1)
+
+    def request(i: int):
+        exclusions = ["Peanut" if i % 2 else "peanut", "shellfish", "cilantro"]
+        rng.shuffle(exclusions)
+        context = {"primary_diet_type": "vegetarian", "food_exclusions": exclusions}
+        return client.complete(f"Suggest a dinner, variant {i % args.distinct}", context=context)
+
+    for phase in ("cold", "warm"):
+        before = fake_provider.state.requests
+        started = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        print({
+            "phase": phase,
+            "requests": args.requests,
+            "provider_calls": fake_provider.state.requests - before,
+            "elapsed_s": round(elapsed, 3),
+            "serial_uncached_s": round(args.requests * args.latency, 1),
+        })
+    print(client.stats())
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Compare concurrent throughput of the old sync-session-in-async-route pattern
+against the asyncio engine.
+
+Each simulated request runs the same two queries as `GET /api/pantry/`
+(user lookup + pantry listing). Point DATABASE_URL at a Postgres instance:
+
+    python -m benchmarks.bench_async_db --concurrency 50 --requests 2000
+
+`--latency-ms` adds a server-side `pg_sleep` per request to mimic the round
+trip to a remote database, which is where blocking the event loop hurts most.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.pantry import PantryItem
+from app.models.user import User
+
+
+def _sync_request(user_id: str, latency_s: float):
+    # What every route did before: psycopg2 calls straight on the event loop
+    db = SessionLocal()
+    try:
+        if latency_s:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": latency_s})
+        db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+        db.execute(
+            select(PantryItem).where(PantryItem.user_id == user_id)
+            .order_by(PantryItem.added_at.desc())
+        ).scalars().all()
+    finally:
+        db.close()
+
+
+async def _async_request(user_id: str, latency_s: float):
+    async with AsyncSessionLocal() as db:
+        if latency_s:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": latency_s})
+        (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        (await db.execute(
+            select(PantryItem).where(PantryItem.user_id == user_id)
+            .order_by(PantryItem.added_at.desc())
+        )).scalars().all()
+
+
+async def _run(mode: str, concurrency: int, total: int, user_id: str, latency_s: float) -> dict:
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            if mode == "sync":
+                _sync_request(user_id, latency_s)
+            else:
+                await _async_request(user_id, latency_s)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": total,
+        "concurrency": concurrency,
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--user-id", default="auth0|bench-user")
+    args = parser.parse_args()
+
+    latency_s = args.latency_ms / 1000
+    for mode in ("sync", "async"):
+        result = await _run(mode, args.concurrency, args.requests, args.user_id, latency_s)
+        print(result)
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
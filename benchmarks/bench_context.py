@@ -0,0 +1,70 @@
+"""
+Time a user's context snapshot on the cache hit path against a rebuild.
+
+A hit is the version check alone (one small query); a miss is the
+version check plus the single build query and rendering. Also reports
+how much smaller the text form is than the JSON data, which is what a
+prompt would otherwise carry. Point DATABASE_URL at a Postgres instance
+with the user in it:
+
+    python -m benchmarks.bench_context --user-id "auth0|bench-user" --requests 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.database import AsyncSessionLocal, async_engine
+from app.services.context import build_context, context_cache, context_version, get_context
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--user-id", default="auth0|bench-user")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        snapshot = await get_context(db, args.user_id)
+        if snapshot is None:
+            raise SystemExit(f"no user {args.user_id!r}")
+
+        hits, misses = [], []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            await get_context(db, args.user_id)
+            hits.append(time.perf_counter() - started)
+
+        for _ in range(args.requests):
+            context_cache.clear()
+            started = time.perf_counter()
+            version = await context_version(db, args.user_id)
+            await build_context(db, args.user_id, version)
+            misses.append(time.perf_counter() - started)
+
+    data = json.dumps(snapshot.data)
+    print({
+        "requests": args.requests,
+        "hit": _percentiles(hits),
+        "miss": _percentiles(misses),
+        "json_chars": len(data),
+        "text_chars": len(snapshot.text),
+        # ~4 characters per token for English-ish text
+        "approx_tokens_json": len(data) // 4,
+        "approx_tokens_text": len(snapshot.text) // 4,
+    })
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
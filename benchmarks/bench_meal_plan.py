@@ -0,0 +1,66 @@
+"""
+Generate weekly meal plans against a synthetic 100k-recipe catalog.
+
+In memory only: builds a RecipeIndex over the same generated catalog as
+bench_recipe_matching (with cook times and meal-type tags), then times
+plan_week() for random pantries and reports how much of each plan reuses
+ingredients. Runs every pantry twice to check the output is deterministic:
+
+    python -m benchmarks.bench_meal_plan --recipes 100000 --plans 100
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.meal_generation import plan_slots, plan_week
+from app.services.recipe_matching import MEAL_TYPE_BITS, UNTAGGED_MEAL_TYPES, RecipeIndex
+from benchmarks.bench_recipe_matching import _catalog, _pantries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--pantry-size", type=int, default=30)
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--meal-layout", default="breakfast-lunch-dinner")
+    parser.add_argument("--prep-time", type=int, default=45)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    catalog, ingredients = _catalog(args.recipes, args.vocabulary, rng)
+    pantries = _pantries(args.plans, args.pantry_size, ingredients, rng)
+
+    index = RecipeIndex()
+    for recipe_id, terms in catalog:
+        meal_types = MEAL_TYPE_BITS["breakfast"] if rng.random() < 0.15 else UNTAGGED_MEAL_TYPES
+        index.upsert(recipe_id, terms, cook_time=rng.choice((10, 20, 30, 45, 60, 90)), meal_types=meal_types)
+    index.match({}, limit=1)  # merges the pending postings
+
+    slots = plan_slots(args.meal_layout, [])
+    timings, shared, deterministic = [], [], 0
+    for pantry in pantries:
+        started = time.perf_counter()
+        draft = plan_week(index, pantry, slots, max_cook_time=args.prep_time, candidates=args.candidates)
+        timings.append(time.perf_counter() - started)
+        shared.append(len(draft.shared_ingredients))
+        again = plan_week(index, pantry, slots, max_cook_time=args.prep_time, candidates=args.candidates)
+        deterministic += again.meals == draft.meals
+
+    timings.sort()
+    print({
+        "recipes": len(index),
+        "slots": len(slots),
+        "candidates": args.candidates,
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(timings[-1] * 1000, 2),
+        "median_shared_ingredients": statistics.median(shared),
+        "deterministic": f"{deterministic}/{len(pantries)}",
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure what MetricsMiddleware and cache counters add per request.
+
+In memory only: drives a bare ASGI app with the app's real route table
+directly (no HTTP server) with and without the middleware, and times
+TTLCache.get() on a named and an unnamed cache. Run it once as is and
+once with PROMETHEUS_MULTIPROC_DIR pointing at an empty directory to
+see the multiprocess (mmap) cost:
+
+    python -m benchmarks.bench_metrics --requests 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.main import app
+from app.utils.cache import TTLCache
+from app.utils.metrics import MULTIPROCESS, MetricsMiddleware
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _send(message):
+    pass
+
+
+async def _time_requests(asgi, paths, rounds):
+    timings = []
+    for i in range(rounds):
+        path = paths[i % len(paths)]
+        scope = {"type": "http", "method": "GET", "path": path, "root_path": "", "query_string": b"", "headers": []}
+        started = time.perf_counter()
+        await asgi(scope, None, _send)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def _time_cache(cache, rounds):
+    cache.set("key", 1)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        cache.get("key")
+        cache.get("missing")
+    return (time.perf_counter() - started) / (rounds * 2) * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Early, middle and unmatched routes: matching cost grows with position
+    paths = ["/api/profile", "/api/pantry/abc", "/api/recipes/abc/substitutions", "/api/missing"]
+    bare = await _time_requests(_endpoint, paths, args.requests)
+    measured = await _time_requests(MetricsMiddleware(_endpoint, app.routes), paths, args.requests)
+
+    print({
+        "multiprocess": MULTIPROCESS,
+        "routes": len(app.routes),
+        "request_p50_us": round(bare, 2),
+        "request_with_metrics_p50_us": round(measured, 2),
+        "middleware_overhead_us": round(measured - bare, 2),
+        "cache_get_us": round(_time_cache(TTLCache(1000, 60), args.requests), 3),
+        "cache_get_counted_us": round(_time_cache(TTLCache(1000, 60, name="bench"), args.requests), 3),
+    })
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
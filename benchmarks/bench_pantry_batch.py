@@ -0,0 +1,84 @@
+"""
+Import a grocery receipt through the per-item pantry endpoints and through
+the batch endpoints, and compare wall time.
+
+Runs the real FastAPI app in-process (httpx ASGITransport) against
+DATABASE_URL with token verification stubbed out:
+
+    python -m benchmarks.bench_pantry_batch --items 40 --rounds 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.database import async_engine
+from app.main import app
+from app.utils.auth0 import verify_token
+
+USER = {"sub": "auth0|bench-batch", "email": "bench-batch@example.com"}
+
+
+def _receipt(size: int) -> list:
+    return [
+        {
+            "name": f"item {i}",
+            "quantity": 1 + i % 5,
+            "unit": "pc",
+            "category": "vegetable",
+            "storage_location": "fridge",
+        }
+        for i in range(size)
+    ]
+
+
+async def _per_item(client: httpx.AsyncClient, receipt: list) -> float:
+    start = time.perf_counter()
+    ids = []
+    for item in receipt:
+        response = await client.post("/api/pantry/", json=item)
+        ids.append(response.json()["id"])
+    for item_id in ids:
+        await client.put(f"/api/pantry/{item_id}", json={"quantity": 2})
+    for item_id in ids:
+        await client.delete(f"/api/pantry/{item_id}")
+    return time.perf_counter() - start
+
+
+async def _batched(client: httpx.AsyncClient, receipt: list) -> float:
+    start = time.perf_counter()
+    response = await client.post("/api/pantry/batch", json=receipt)
+    ids = [item["id"] for item in response.json()["items"]]
+    await client.patch("/api/pantry/batch", json=[{"id": i, "quantity": 2} for i in ids])
+    await client.request("DELETE", "/api/pantry/batch", json=ids)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    app.dependency_overrides[verify_token] = lambda: USER
+    receipt = _receipt(args.items)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/profile")  # create the user, warm the pool
+        for name, run in (("per_item", _per_item), ("batch", _batched)):
+            timings = [await run(client, receipt) for _ in range(args.rounds)]
+            median = statistics.median(timings)
+            print({
+                "mode": name,
+                "items": args.items,
+                "median_ms": round(median * 1000, 2),
+                "items_per_s": round(args.items / median, 1),
+            })
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Match pantries against a synthetic 100k-recipe catalog with the inverted index.
+
+Everything is in memory (no database): builds a RecipeIndex over a
+generated catalog, times matching random pantries through the index and
+through a plain per-recipe Python scan, then times an incremental update
+of a slice of the catalog:
+
+    python -m benchmarks.bench_recipe_matching --recipes 100000 --pantry-size 30
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.recipe_matching import RecipeIndex
+
+
+def _catalog(size: int, vocabulary: int, rng: random.Random) -> list:
+    ingredients = [f"ingredient {i}" for i in range(vocabulary)]
+    # A few ingredients (onion, garlic...) show up everywhere, most rarely
+    popularity = [1 / (rank + 1) for rank in range(vocabulary)]
+    catalog = []
+    for i in range(size):
+        names = set(rng.choices(ingredients, weights=popularity, k=rng.randint(6, 15)))
+        main = rng.sample(sorted(names), min(2, len(names)))
+        terms = {name: 1.0 for name in names}
+        terms.update({name: 2.0 for name in main})
+        catalog.append((f"recipe-{i}", terms))
+    return catalog, ingredients
+
+
+def _pantries(count: int, size: int, ingredients: list, rng: random.Random) -> list:
+    popularity = [1 / (rank + 1) ** 0.5 for rank in range(len(ingredients))]
+    pantries = []
+    for _ in range(count):
+        names = set(rng.choices(ingredients, weights=popularity, k=size))
+        pantries.append({name: rng.choice((0.0, 0.0, 0.0, 0.5, 1.0)) for name in names})
+    return pantries
+
+
+def _scan(catalog: list, pantry: dict, limit: int, expiry_weight: float) -> list:
+    scored = []
+    for recipe_id, terms in catalog:
+        covered = [term for term in terms if term in pantry]
+        if not covered:
+            continue
+        coverage = sum(terms[term] for term in covered) / sum(terms.values())
+        score = coverage + expiry_weight * sum(pantry[term] for term in covered)
+        scored.append((-score, recipe_id))
+    scored.sort()
+    return [(-score, recipe_id) for score, recipe_id in scored[:limit]]
+
+
+def _percentiles(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--pantry-size", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    catalog, ingredients = _catalog(args.recipes, args.vocabulary, rng)
+    pantries = _pantries(args.queries, args.pantry_size, ingredients, rng)
+
+    index = RecipeIndex()
+    started = time.perf_counter()
+    for recipe_id, terms in catalog:
+        index.upsert(recipe_id, terms)
+    index.match({}, limit=1)  # merges the pending postings
+    build_s = time.perf_counter() - started
+
+    timings = []
+    for pantry in pantries:
+        started = time.perf_counter()
+        index.match(pantry, limit=args.limit)
+        timings.append(time.perf_counter() - started)
+    print({"mode": "index", "recipes": len(index), "build_s": round(build_s, 3), **_percentiles(timings)})
+
+    scan_timings, agreed = [], 0
+    for pantry in pantries[:args.scan_queries]:
+        started = time.perf_counter()
+        expected = _scan(catalog, pantry, args.limit, index.expiry_weight)
+        scan_timings.append(time.perf_counter() - started)
+        top = index.match(pantry, limit=args.limit)
+        agreed += bool(top) and abs(top[0].score - expected[0][0]) < 1e-3
+    print({"mode": "python_scan", **_percentiles(scan_timings), "same_top_score": f"{agreed}/{len(scan_timings)}"})
+
+    started = time.perf_counter()
+    for recipe_id, terms in rng.sample(catalog, args.updates):
+        index.upsert(recipe_id, {**terms, rng.choice(ingredients): 1.0})
+    index.match(pantries[0], limit=args.limit)
+    print({
+        "mode": "incremental_update",
+        "updated": args.updates,
+        "update_and_first_match_ms": round((time.perf_counter() - started) * 1000, 2),
+        **index.stats(),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Serialize pantry listings the way FastAPI does by default and through a ResponseAdapter.
+
+In memory only: builds --items pantry items both as ORM instances (what
+`select(PantryItem)` hands back) and as plain column rows (what
+`select(*columns)` hands back), then times each path from loaded data
+to response bytes:
+
+- default: validate ORM objects from attributes, dump to Python dicts
+  in JSON mode, encode with the stdlib JSON encoder (JSONResponse)
+- orjson: same, but encoded by ORJSONResponse
+- adapter: ResponseAdapter.dump() on the column rows
+
+    python -m benchmarks.bench_serialization --items 500 --rounds 200
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.models.pantry import PantryItem
+from app.schemas.pantry import PantryItemResponse
+from app.utils.serialization import ResponseAdapter
+
+
+def _items(count, rng):
+    now = datetime(2026, 10, 1)
+    return [
+        PantryItem(
+            id=str(uuid.uuid4()),
+            user_id="auth0|bench-user",
+            name=f"ingredient {rng.randrange(400)}",
+            quantity=round(rng.uniform(0.1, 5), 2),
+            unit=rng.choice(["g", "kg", "ml", "l", "each"]),
+            expires_at=now + timedelta(days=rng.randrange(30)) if rng.random() < 0.8 else None,
+            category=rng.choice(["protein", "grain", "vegetable", "dairy"]),
+            storage_location=rng.choice(["pantry", "fridge", "freezer"]),
+            purchase_source=None,
+            added_at=now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    objects = _items(args.items, random.Random(7))
+    adapter = ResponseAdapter(PantryItemResponse)
+    fields = list(PantryItemResponse.model_fields)
+    Row = namedtuple("Row", fields)
+    rows = [Row(*(getattr(item, name) for name in fields)) for item in objects]
+    # What FastAPI builds per route for response_model=List[PantryItemResponse]
+    field = TypeAdapter(List[PantryItemResponse])
+
+    paths = {
+        "default": lambda: json.dumps(
+            field.dump_python(field.validate_python(objects, from_attributes=True), mode="json"),
+            ensure_ascii=False, separators=(",", ":")
+        ).encode(),
+        "orjson": lambda: orjson.dumps(
+            field.dump_python(field.validate_python(objects, from_attributes=True), mode="json")
+        ),
+        "adapter": lambda: adapter.dump(rows),
+    }
+    expected = json.loads(paths["default"]())
+    results = {"items": args.items}
+    for name, serialize in paths.items():
+        assert json.loads(serialize()) == expected, name
+        timings = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            serialize()
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        results[name] = {
+            "p50_ms": round(median * 1000, 3),
+            "items_per_s": round(args.items / median),
+        }
+    print(results)
+
+
+if __name__ == "__main__":
+    main()
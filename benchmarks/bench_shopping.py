@@ -0,0 +1,121 @@
+"""
+Build shopping lists for large households from synthetic week plans.
+
+In memory only: generates week plans (meals x ingredient lines in mixed
+units, scaled to --servings) and pantries, then times
+build_shopping_list() against a straightforward per-line loop that
+converts and sums one ingredient at a time, and checks both agree:
+
+    python -m benchmarks.bench_shopping --meals 35 --servings 10 --pantry-size 400
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.shopping import build_shopping_list, parse_recipe
+from app.utils.ingredients import normalize_ingredient
+from app.utils.units import UNIT_BASES, UNIT_FACTORS, UNIT_IDS, normalize_unit, parse_ingredient
+
+_UNITS = ["g", "kg", "oz", "lb", "ml", "l", "cup", "tbsp", "tsp", "", "clove", "can", "bunch"]
+
+
+def _plans(count, meals, lines, vocabulary, rng):
+    names = [f"ingredient {i}" for i in range(vocabulary)]
+    recipes = {}
+    for i in range(meals * 4):
+        recipes[f"r{i}"] = (
+            [
+                {"name": rng.choice(names), "quantity": round(rng.uniform(0.25, 4), 2), "unit": rng.choice(_UNITS)}
+                if rng.random() < 0.9 else rng.choice(names)
+                for _ in range(lines)
+            ],
+            rng.choice((2, 4, 6)),
+        )
+    plans = []
+    for _ in range(count):
+        plans.append([(recipe_id, *recipes[recipe_id]) for recipe_id in rng.choices(list(recipes), k=meals)])
+    return plans, names
+
+
+def _naive(meals, pantry, servings):
+    """One dict update per line; the reference the vectorized path must match"""
+    required, have = {}, {}
+    for recipe_id, ingredients, recipe_servings in meals:
+        scale = servings / recipe_servings if servings and recipe_servings else 1.0
+        for ingredient in ingredients:
+            quantity, unit, name = parse_ingredient(ingredient)
+            term = normalize_ingredient(name)
+            if quantity is None:
+                continue
+            row = UNIT_IDS.get(unit)
+            base, factor = (UNIT_BASES[row], UNIT_FACTORS[row]) if row is not None else (unit, 1.0)
+            required[(term, base)] = required.get((term, base), 0.0) + quantity * factor * scale
+    for name, quantity, unit in pantry:
+        row = UNIT_IDS.get(normalize_unit(unit))
+        base, factor = (UNIT_BASES[row], UNIT_FACTORS[row]) if row is not None else (unit, 1.0)
+        key = (normalize_ingredient(name), base)
+        if key in required:
+            have[key] = have.get(key, 0.0) + quantity * factor
+    return {key: max(total - have.get(key, 0.0), 0.0) for key, total in required.items()}
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--meals", type=int, default=35, help="meals on each week plan")
+    parser.add_argument("--lines", type=int, default=15, help="ingredient lines per recipe")
+    parser.add_argument("--servings", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=400)
+    parser.add_argument("--pantry-size", type=int, default=400)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    plans, names = _plans(args.lists, args.meals, args.lines, args.vocabulary, rng)
+    pantries = [
+        [(rng.choice(names), round(rng.uniform(1, 500), 1), rng.choice(_UNITS)) for _ in range(args.pantry_size)]
+        for _ in plans
+    ]
+
+    vectorized, parsed_once, naive, mismatches = [], [], [], 0
+    for meals, pantry in zip(plans, pantries):
+        started = time.perf_counter()
+        to_buy, covered = build_shopping_list(meals, pantry, args.servings)
+        vectorized.append(time.perf_counter() - started)
+
+        # What get_shopping_list() does with its parsed-recipe cache warm
+        parsed = {recipe_id: parse_recipe(ingredients) for recipe_id, ingredients, _ in meals}
+        started = time.perf_counter()
+        build_shopping_list(meals, pantry, args.servings, parsed)
+        parsed_once.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        reference = _naive(meals, pantry, args.servings)
+        naive.append(time.perf_counter() - started)
+
+        buying = {(item.name, item.unit): item.to_buy for item in to_buy if item.required is not None}
+        mismatches += len(buying) != sum(1 for amount in reference.values() if amount > 1e-6)
+
+    print({
+        "lists": args.lists,
+        "meals": args.meals,
+        "lines_per_list": args.meals * args.lines,
+        "servings": args.servings,
+        "pantry_size": args.pantry_size,
+        "vectorized": _percentiles(vectorized),
+        "vectorized_parsed_cached": _percentiles(parsed_once),
+        "per_line_loop": _percentiles(naive),
+        "mismatches": mismatches,
+    })
+
+
+if __name__ == "__main__":
+    main()
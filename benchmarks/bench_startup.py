@@ -0,0 +1,129 @@
+"""
+Measure cold start and time to first request, with and without startup warmup.
+
+Every run is a fresh interpreter (this module with --child), so imports
+are cold. The child:
+
+1. imports app.main (import_s)
+2. creates a fake Auth0 signer and serves its JWKS from a local thread,
+   adding --jwks-latency per fetch to stand in for the trip to Auth0,
+   and points jwks_keys at it (not counted anywhere below)
+3. enters the app's lifespan (startup_s) and, with warmup on, polls
+   GET /ready until it answers 200 (ready_s)
+4. sends an authenticated GET /api/pantry/ (first_request_ms), then the
+   same request again (warm_request_ms)
+
+time_to_first_response_s runs from spawning the interpreter to the
+first response, minus step 2. Needs the database at DATABASE_URL
+(migrated Postgres, or SQLite with the schema created); the request's
+user is created on first sight:
+
+    python -m benchmarks.bench_startup --runs 3 --jwks-latency 0.15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _serve_jwks(jwks: dict, latency: float) -> str:
+    body = json.dumps(jwks).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/.well-known/jwks.json"
+
+
+async def _child(spawned_at: float, jwks_latency: float) -> dict:
+    import asyncio
+
+    import httpx
+
+    started = time.perf_counter()
+    from app.main import app
+    import_s = time.perf_counter() - started
+
+    setup_started = time.perf_counter()
+    from app.database import async_engine
+    from app.utils.auth0 import jwks_keys
+    from benchmarks.fake_auth0 import FakeAuth0
+
+    signer = FakeAuth0()
+    jwks_keys.url = _serve_jwks(signer.jwks(), jwks_latency)
+    headers = {"Authorization": f"Bearer {signer.token('auth0|bench-startup')}"}
+    setup_s = time.perf_counter() - setup_started
+
+    result = {"import_s": round(import_s, 4)}
+    lifespan_started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        result["startup_s"] = round(time.perf_counter() - lifespan_started, 4)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+            waited = time.perf_counter()
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.005)
+            result["ready_s"] = round(time.perf_counter() - waited, 4)
+
+            first = time.perf_counter()
+            response = await client.get("/api/pantry/", headers=headers)
+            response.raise_for_status()
+            result["first_request_ms"] = round((time.perf_counter() - first) * 1000, 2)
+            result["time_to_first_response_s"] = round(time.time() - spawned_at - setup_s, 4)
+
+            second = time.perf_counter()
+            await client.get("/api/pantry/", headers=headers)
+            result["warm_request_ms"] = round((time.perf_counter() - second) * 1000, 2)
+    await async_engine.dispose()
+    return result
+
+
+def _spawn(warmup: bool, jwks_latency: float) -> dict:
+    env = {**os.environ, "WARMUP_ENABLED": "true" if warmup else "false"}
+    spawned_at = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", str(spawned_at), "--jwks-latency", str(jwks_latency)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--jwks-latency", type=float, default=0.15, help="seconds per JWKS fetch")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        import asyncio
+
+        print(json.dumps(asyncio.run(_child(args.child, args.jwks_latency))))
+        return
+
+    for warmup in (False, True):
+        runs = [_spawn(warmup, args.jwks_latency) for _ in range(args.runs)]
+        print({
+            "warmup": warmup,
+            "runs": args.runs,
+            **{key: round(statistics.median(run[key] for run in runs), 4) for key in runs[0]},
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Load-test telemetry ingestion: many clients POSTing event batches at once.
+
+Runs the FastAPI app in-process against DATABASE_URL (token verification
+stubbed out), then drains the buffer and reports sustained events/s both
+accepted by the endpoint and written to the database:
+
+    python -m benchmarks.bench_telemetry --clients 50 --batches 40 --batch-size 100
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.database import async_engine
+from app.main import app
+from app.services.telemetry import telemetry_buffer
+from app.utils.auth0 import verify_token
+
+USER = {"sub": "auth0|bench-telemetry", "email": "bench-telemetry@example.com"}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--batches", type=int, default=40, help="batches per client")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    app.dependency_overrides[verify_token] = lambda: USER
+    batch = {
+        "events": [
+            {"event_type": "screen_view", "event_data": {"screen": "pantry", "n": i}}
+            for i in range(args.batch_size)
+        ]
+    }
+    rejected = 0
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal rejected
+        for _ in range(args.batches):
+            response = await client.post("/api/telemetry/events", json=batch)
+            if response.status_code == 503:
+                rejected += 1
+
+    await telemetry_buffer.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/profile")  # create the user
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.clients)))
+        accepted_s = time.perf_counter() - started
+        await telemetry_buffer.stop()
+        written_s = time.perf_counter() - started
+
+    stats = telemetry_buffer.stats()
+    print({
+        **stats,
+        "rejected_batches": rejected,
+        "accepted_events_per_s": round(stats["accepted"] / accepted_s),
+        "written_events_per_s": round(stats["written"] / written_s),
+    })
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
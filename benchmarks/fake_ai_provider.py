@@ -0,0 +1,108 @@
+"""
+A fake Anthropic Messages API for local runs, benchmarks and tests.
+
+Answers POST /v1/messages after `latency` seconds with a canned reply and
+token counts derived from the prompt size; with "stream": true the reply
+comes as Messages API server-sent events, one line every `line_latency`
+seconds after the first. Meal-plan prompts ({"slots": ..., "candidates":
+...}) get one valid pick per line. Setting `state.fail_status` (e.g. 529)
+makes every request fail with that status until it's reset to 0, and
+`state.last_system` holds the last request's system prompt. Use it
+in-process:
+
+    transport = httpx.ASGITransport(app=fake_provider)
+    client = AIClient(api_key="test", model="fake", base_url="http://fake", transport=transport)
+
+or as a server, with ANTHROPIC_BASE_URL=http://127.0.0.1:8100 for the API:
+
+    uvicorn benchmarks.fake_ai_provider:fake_provider --port 8100
+"""
+import asyncio
+import json
+import os
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+fake_provider = FastAPI(title="Fake AI provider")
+fake_provider.state.latency = float(os.environ.get("FAKE_AI_LATENCY", "0.2"))
+fake_provider.state.line_latency = float(os.environ.get("FAKE_AI_LINE_LATENCY", "0.05"))
+fake_provider.state.fail_status = 0
+fake_provider.state.requests = 0
+fake_provider.state.last_system = None
+
+
+def _reply_text(body: dict) -> str:
+    last = body["messages"][-1]["content"]
+    if isinstance(last, list):
+        last = " ".join(block.get("text", "") for block in last)
+    try:
+        request = json.loads(last)
+    except ValueError:
+        request = None
+    if isinstance(request, dict) and request.get("slots") and request.get("candidates"):
+        candidates = request["candidates"]
+        return "\n".join(
+            json.dumps({**slot, "recipe_id": candidates[i % len(candidates)]["id"]})
+            for i, slot in enumerate(request["slots"])
+        )
+    return f"Fake reply to: {last[:200]}"
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream(body: dict, text: str):
+    yield _event("message_start", {"type": "message_start", "message": {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": [],
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(json.dumps(body["messages"])) // 4, "output_tokens": 0},
+    }})
+    yield _event("content_block_start", {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}})
+    for i, line in enumerate(text.splitlines(keepends=True)):
+        if i:
+            await asyncio.sleep(fake_provider.state.line_latency)
+        yield _event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                             "delta": {"type": "text_delta", "text": line}})
+    yield _event("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _event("message_delta", {"type": "message_delta",
+                                   "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                   "usage": {"output_tokens": len(text) // 4}})
+    yield _event("message_stop", {"type": "message_stop"})
+
+
+@fake_provider.post("/v1/messages")
+async def create_message(request: Request):
+    body = await request.json()
+    fake_provider.state.requests += 1
+    fake_provider.state.last_system = body.get("system")
+    await asyncio.sleep(fake_provider.state.latency)
+    if fake_provider.state.fail_status:
+        return JSONResponse(status_code=fake_provider.state.fail_status, content={
+            "type": "error",
+            "error": {"type": "overloaded_error", "message": "Fake provider failure"},
+        })
+    text = _reply_text(body)
+    if body.get("stream"):
+        return StreamingResponse(_stream(body, text), media_type="text/event-stream")
+    return {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": len(json.dumps(body["messages"])) // 4,
+            "output_tokens": len(text) // 4,
+        },
+    }
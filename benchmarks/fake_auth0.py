@@ -0,0 +1,58 @@
+"""
+A fake Auth0 tenant for offline runs: an RSA signing key, its JWKS, and
+tokens for any `sub` that verify_token accepts for real (signature,
+audience, issuer and expiry are all checked).
+
+    signer = FakeAuth0()
+    signer.install()  # preload jwks_keys; no request to Auth0 is made
+    headers = {"Authorization": f"Bearer {signer.token('auth0|load-0')}"}
+
+install() loads the key set the same way a JWKS fetch would, so nothing
+refetches until auth0_jwks_ttl_seconds have passed.
+"""
+import time
+import uuid
+from typing import Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class FakeAuth0:
+    def __init__(self, domain: Optional[str] = None, audience: Optional[str] = None):
+        self.domain = domain or settings.auth0_domain
+        self.audience = audience or settings.auth0_api_audience
+        self.kid = uuid.uuid4().hex
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+
+    def jwks(self) -> dict:
+        public = jwk.construct(self._private_pem, "RS256").public_key().to_dict()
+        return {"keys": [{**public, "kid": self.kid, "use": "sig"}]}
+
+    def install(self):
+        # Imported here so a signer can exist before the app is imported
+        from app.utils.auth0 import jwks_keys
+
+        jwks_keys.load(self.jwks())
+
+    def token(self, sub: str, email: Optional[str] = None, ttl: float = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "sub": sub,
+            "email": email or f"{sub.split('|')[-1]}@example.com",
+            "aud": self.audience,
+            "iss": f"https://{self.domain}/",
+            "iat": now,
+            "exp": now + int(ttl),
+        }
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self.kid})
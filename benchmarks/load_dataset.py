@@ -0,0 +1,130 @@
+"""
+Generate a reproducible dataset of users with large pantries.
+
+Users are auth0|load-<n>; their pantry items have ids load-<n>-<m>, so a
+load run can address seeded items without listing them first. The same
+--seed always produces the same rows. Reseeding replaces the load users'
+pantries (with their versions and tombstones) and leaves everyone else alone:
+
+    python -m benchmarks.load_dataset --users 200 --pantry-size 500
+
+On SQLite (DATABASE_URL=sqlite:///bench.db) the schema is created from
+the models; on Postgres run `alembic upgrade head` first.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import delete, insert
+
+from app.database import AsyncSessionLocal, Base, async_engine
+from app.models.pantry import PantryItem, PantryTombstone, PantryVersion
+from app.models.user import User
+
+_NAMES = [
+    "chicken breast", "ground beef", "salmon", "tofu", "eggs", "milk", "butter", "cheddar",
+    "greek yogurt", "spinach", "kale", "carrots", "onions", "garlic", "tomatoes", "bell pepper",
+    "broccoli", "potatoes", "rice", "pasta", "quinoa", "oats", "flour", "sugar", "olive oil",
+    "black beans", "chickpeas", "lentils", "apples", "bananas", "lemons", "ginger", "soy sauce",
+]
+_UNITS = ["g", "kg", "ml", "l", "each", "cup", "can", "bunch"]
+_CATEGORIES = ["protein", "dairy", "vegetable", "fruit", "grain", "legume", "condiment"]
+_LOCATIONS = ["pantry", "fridge", "freezer"]
+_CHUNK = 5000
+
+
+def user_id(n: int) -> str:
+    return f"auth0|load-{n}"
+
+
+def item_id(n: int, m: int) -> str:
+    return f"load-{n}-{m}"
+
+
+def users(count: int) -> List[dict]:
+    return [
+        {
+            "id": user_id(n),
+            "email": f"load-{n}@example.com",
+            "goals": [],
+            "food_exclusions": [],
+            "preferred_cooking_days": [],
+        }
+        for n in range(count)
+    ]
+
+
+def pantry_items(count: int, pantry_size: int, seed: int, now: datetime) -> Iterator[dict]:
+    """About a tenth of each pantry expires within 3 days, a fifth never does"""
+    rng = random.Random(seed)
+    for n in range(count):
+        for m in range(pantry_size):
+            roll = rng.random()
+            expires_at = (
+                None if roll < 0.2
+                else now + timedelta(hours=rng.uniform(1, 72)) if roll < 0.3
+                else now + timedelta(days=rng.uniform(3, 60))
+            )
+            yield {
+                "id": item_id(n, m),
+                "user_id": user_id(n),
+                "name": f"{rng.choice(_NAMES)} {m % 50}",
+                "quantity": round(rng.uniform(0.1, 5), 2),
+                "unit": rng.choice(_UNITS),
+                "expires_at": expires_at,
+                "category": rng.choice(_CATEGORIES),
+                "storage_location": rng.choice(_LOCATIONS),
+                "added_at": now - timedelta(minutes=m),
+                "updated_at": now,
+                "change_seq": 1,
+            }
+
+
+async def seed(count: int, pantry_size: int, seed: int = 7) -> dict:
+    """(Re)create the load users and their pantries"""
+    started = time.perf_counter()
+    if async_engine.url.get_backend_name() == "sqlite":
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    ids = [user_id(n) for n in range(count)]
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(PantryItem).where(PantryItem.user_id.in_(ids)))
+        await db.execute(delete(PantryTombstone).where(PantryTombstone.user_id.in_(ids)))
+        await db.execute(delete(PantryVersion).where(PantryVersion.user_id.in_(ids)))
+        await db.execute(delete(User).where(User.id.in_(ids)))
+        await db.execute(insert(User), users(count))
+        await db.execute(insert(PantryVersion), [{"user_id": uid, "version": 1} for uid in ids])
+        batch = []
+        for row in pantry_items(count, pantry_size, seed, now):
+            batch.append(row)
+            if len(batch) == _CHUNK:
+                await db.execute(insert(PantryItem), batch)
+                batch = []
+        if batch:
+            await db.execute(insert(PantryItem), batch)
+        await db.commit()
+    return {
+        "users": count,
+        "pantry_items": count * pantry_size,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pantry-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(await seed(args.users, args.pantry_size, args.seed))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
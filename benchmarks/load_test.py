@@ -0,0 +1,247 @@
+"""
+Drive a mixed API workload against the app in-process and record latency percentiles.
+
+Fully offline: the FastAPI app runs in this process behind
+httpx.ASGITransport (lifespan included), tokens come from a fake Auth0
+signer (benchmarks/fake_auth0.py) so verify_token checks them for real,
+and the database is whatever DATABASE_URL points at: a local Postgres
+(after `alembic upgrade head`) or SQLite (sqlite:///bench.db, schema
+created from the models). Users and pantries are reseeded by
+benchmarks/load_dataset.py first unless --no-seed is given.
+
+Operations are drawn from --mix by weight, each against a random load
+user, from --concurrency workers with fixed seeds, so two runs with the
+same arguments issue the same requests:
+
+    profile    GET /api/profile
+    pantry     GET /api/pantry/ (whole pantry)
+    page       GET /api/pantry/?limit=50
+    expiring   GET /api/pantry/expiring?days=3
+    create     POST /api/pantry/
+    update     PUT /api/pantry/{id} on a seeded item
+    delete     DELETE /api/pantry/{id} on an item this run created
+
+Results (req/s, p50/p95/p99 per operation and overall, errors) are
+written as JSON, by default to benchmarks/results/load-<commit>.json.
+--compare checks them against an earlier file and exits 1 if any
+operation's p95 got worse by more than --tolerance:
+
+    python -m benchmarks.load_test --users 200 --pantry-size 500 --concurrency 32 --requests 20000
+    python -m benchmarks.load_test --no-seed --compare benchmarks/results/load-abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+
+from app.database import async_engine
+from app.main import app
+from app.utils.percentile import percentile
+from benchmarks.fake_auth0 import FakeAuth0
+from benchmarks.load_dataset import item_id, seed, user_id
+
+DEFAULT_MIX = "profile=25,pantry=20,page=15,expiring=15,create=10,update=10,delete=5"
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(_OPERATIONS)
+    if unknown:
+        raise SystemExit(f"unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, tokens: List[str], pantry_size: int):
+        self.client = client
+        self.tokens = tokens
+        self.pantry_size = pantry_size
+        self.created: Dict[int, List[str]] = {}  # user -> items this run created
+
+    def _headers(self, user: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user]}"}
+
+    async def profile(self, user, rng):
+        return await self.client.get("/api/profile", headers=self._headers(user))
+
+    async def pantry(self, user, rng):
+        return await self.client.get("/api/pantry/", headers=self._headers(user))
+
+    async def page(self, user, rng):
+        return await self.client.get("/api/pantry/", params={"limit": 50}, headers=self._headers(user))
+
+    async def expiring(self, user, rng):
+        return await self.client.get("/api/pantry/expiring", params={"days": 3}, headers=self._headers(user))
+
+    async def create(self, user, rng):
+        response = await self.client.post("/api/pantry/", headers=self._headers(user), json={
+            "name": f"load item {rng.randrange(1000)}",
+            "quantity": round(rng.uniform(0.1, 5), 2),
+            "unit": "g",
+            "category": "vegetable",
+            "storage_location": "fridge",
+            "expires_at": (datetime.utcnow() + timedelta(days=rng.uniform(0, 10))).isoformat(),
+        })
+        if response.status_code == 201:
+            self.created.setdefault(user, []).append(response.json()["id"])
+        return response
+
+    async def update(self, user, rng):
+        item = item_id(user, rng.randrange(self.pantry_size))
+        return await self.client.put(
+            f"/api/pantry/{item}", headers=self._headers(user), json={"quantity": round(rng.uniform(0.1, 5), 2)}
+        )
+
+    async def delete(self, user, rng):
+        created = self.created.get(user)
+        if not created:
+            return None  # nothing of ours to delete yet; not timed
+        return await self.client.delete(f"/api/pantry/{created.pop()}", headers=self._headers(user))
+
+
+_OPERATIONS = ["profile", "pantry", "page", "expiring", "create", "update", "delete"]
+
+
+def _summary(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+
+    def ms(p: float):
+        value = percentile(latencies, p)
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(0.50),
+        "p95_ms": ms(0.95),
+        "p99_ms": ms(0.99),
+    }
+
+
+async def _run(workload: Workload, mix: Dict[str, float], users: int, concurrency: int, total: int, seed_value: int):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    remaining = iter(range(total))
+
+    async def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        for _ in remaining:
+            name = rng.choices(names, weights)[0]
+            user = rng.randrange(users)
+            started = time.perf_counter()
+            response = await getattr(workload, name)(user, rng)
+            if response is None:
+                continue
+            latencies[name].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    every = [latency for values in latencies.values() for latency in values]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": _summary(every, sum(errors.values()), elapsed),
+        "operations": {name: _summary(latencies[name], errors[name], elapsed) for name in names},
+    }
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return f"{commit}-dirty" if dirty.strip() else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, now in current["operations"].items():
+        before = baseline.get("operations", {}).get(name)
+        if not before or not before.get("p95_ms") or not now.get("p95_ms"):
+            continue
+        change = now["p95_ms"] / before["p95_ms"] - 1
+        line = f"{name:10} p95 {before['p95_ms']:>8} -> {now['p95_ms']:>8} ms ({change:+.1%})"
+        print(line)
+        if change > tolerance:
+            regressions.append(line)
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pantry-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=500, help="requests before timing starts")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the dataset already in the database")
+    parser.add_argument("--output", help="results file (default benchmarks/results/load-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to check p95s against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p95 slowdown, as a fraction")
+    args = parser.parse_args()
+    mix = _parse_mix(args.mix)
+
+    dataset = None if args.no_seed else await seed(args.users, args.pantry_size, args.seed)
+    signer = FakeAuth0()
+    signer.install()
+    tokens = [signer.token(user_id(n)) for n in range(args.users)]
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60) as client:
+            workload = Workload(client, tokens, args.pantry_size)
+            if args.warmup:
+                await _run(workload, mix, args.users, args.concurrency, args.warmup, args.seed + 1)
+            result = await _run(workload, mix, args.users, args.concurrency, args.requests, args.seed)
+    await async_engine.dispose()
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": async_engine.url.get_backend_name(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "dataset": dataset,
+        **result,
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"load-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps({"total": report["total"], **report["operations"]}, indent=2))
+    print(f"results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = _compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} operation(s) regressed by more than {args.tolerance:.0%}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
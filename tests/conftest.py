@@ -0,0 +1,74 @@
+"""
+Tests run against a throwaway SQLite database, with tokens from a fake
+Auth0 signer, so neither Postgres nor the network is needed.
+"""
+import os
+import tempfile
+import uuid
+
+_tmp = tempfile.mkdtemp(prefix="athyra-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ.setdefault("AUTH0_DOMAIN", "tests.auth0.local")
+os.environ.setdefault("AUTH0_API_AUDIENCE", "https://api.tests.local")
+os.environ.setdefault("AUTH0_MANAGEMENT_CLIENT_ID", "tests")
+os.environ.setdefault("AUTH0_MANAGEMENT_CLIENT_SECRET", "tests")
+os.environ.setdefault("ANTHROPIC_API_KEY", "tests")
+os.environ.setdefault("SENDGRID_API_KEY", "tests")
+os.environ.setdefault("FROM_EMAIL", "tests@example.com")
+os.environ["WARMUP_ENABLED"] = "false"
+
+import httpx
+import pytest
+
+import app.models  # noqa: F401  (registers every table on Base)
+from app.database import Base, engine
+from benchmarks.fake_auth0 import FakeAuth0
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def signer():
+    signer = FakeAuth0()
+    signer.install()
+    return signer
+
+
+@pytest.fixture
+def auth_headers(signer):
+    """Headers for a brand new user, so tests never see each other's rows"""
+    return {"Authorization": f"Bearer {signer.token(f'auth0|test-{uuid.uuid4().hex}')}"}
+
+
+@pytest.fixture
+async def client():
+    from app.database import async_engine
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tests") as client:
+        yield client
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def add_pantry_items(client, auth_headers):
+    """Batch-create pantry items with the given names for the test's user"""
+    async def add(names):
+        response = await client.post("/api/pantry/batch", headers=auth_headers, json=[
+            {"name": name, "quantity": 1, "unit": "kg", "category": "grain", "storage_location": "pantry"}
+            for name in names
+        ])
+        assert response.status_code == 201
+        return response.json()["items"]
+
+    return add
@@ -0,0 +1,135 @@
+import asyncio
+
+import anthropic
+import httpx
+import pytest
+
+from app.utils.ai_client import AIClient, AIClientBusy
+from benchmarks.fake_ai_provider import fake_provider
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def provider():
+    state = fake_provider.state
+    state.latency, state.line_latency, state.fail_status, state.requests = 0.05, 0.0, 0, 0
+    state.last_system = None
+    yield state
+    state.fail_status = 0
+
+
+@pytest.fixture
+async def make_client(provider):
+    clients = []
+
+    def make(**options) -> AIClient:
+        client = AIClient(
+            api_key="test",
+            model="fake",
+            base_url="http://fake",
+            max_retries=0,
+            transport=httpx.ASGITransport(app=fake_provider),
+            **options
+        )
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        await client.aclose()
+
+
+async def test_identical_concurrent_calls_share_one_request(make_client, provider):
+    client = make_client()
+
+    replies = await asyncio.gather(*(client.complete("hello") for _ in range(5)))
+
+    assert provider.requests == 1
+    assert client.coalesced == 4
+    assert {reply.text for reply in replies} == {"Fake reply to: hello"}
+
+
+async def test_repeated_call_is_served_from_cache_until_it_expires(make_client, provider):
+    client = make_client(cache_ttl=0.2)
+
+    first = await client.complete("hello")
+    second = await client.complete("hello")
+    assert provider.requests == 1
+    assert (first.cached, second.cached) == (False, True)
+    assert second.text == first.text
+
+    await asyncio.sleep(0.25)
+    third = await client.complete("hello")
+    assert provider.requests == 2
+    assert third.cached is False
+
+
+async def test_set_valued_context_is_normalized_into_the_cache_key(make_client, provider):
+    client = make_client()
+
+    await client.complete("plan", context={"food_exclusions": ["Nuts", "dairy"], "notes": ""})
+    reply = await client.complete("plan", context={"food_exclusions": ["dairy", " nuts "]})
+
+    assert reply.cached is True
+    assert provider.requests == 1
+
+
+async def test_ordered_context_lists_keep_their_order(make_client, provider):
+    client = make_client()
+
+    await client.complete("plan", context={"recent_meals": ["Curry", "Soup"]})
+    reply = await client.complete("plan", context={"recent_meals": ["Soup", "Curry"]})
+
+    assert reply.cached is False
+    assert provider.requests == 2
+
+
+async def test_prompt_carries_the_normalized_context(make_client, provider):
+    client = make_client()
+
+    reply = await client.complete(
+        "plan", context={"food_exclusions": [" Nuts", "dairy", "nuts"], "recent_meals": ["Soup", "Curry"]}
+    )
+
+    assert '"food_exclusions": ["dairy", "nuts"]' in provider.last_system
+    assert '"recent_meals": ["Soup", "Curry"]' in provider.last_system
+    assert reply.cached is False
+
+
+async def test_failures_are_not_cached(make_client, provider):
+    client = make_client()
+    provider.fail_status = 529
+
+    with pytest.raises(anthropic.APIStatusError):
+        await client.complete("hello")
+    assert client.errors == 1
+    assert len(client.cache) == 0
+
+    provider.fail_status = 0
+    reply = await client.complete("hello")
+    assert reply.cached is False
+    assert provider.requests == 2
+
+
+async def test_queued_call_gives_up_when_no_slot_frees(make_client, provider):
+    provider.latency = 0.3
+    client = make_client(max_concurrency=1, queue_timeout=0.05)
+
+    results = await asyncio.gather(client.complete("first"), client.complete("second"), return_exceptions=True)
+
+    assert results[0].text == "Fake reply to: first"
+    assert isinstance(results[1], AIClientBusy)
+    assert client.rejected == 1
+    assert provider.requests == 1
+
+
+async def test_completed_stream_is_cached(make_client, provider):
+    client = make_client()
+
+    chunks = [chunk async for chunk in client.stream("hello")]
+    again = [chunk async for chunk in client.stream("hello")]
+
+    assert "".join(chunks) == "Fake reply to: hello"
+    assert again == ["Fake reply to: hello"]
+    assert provider.requests == 1
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.auth0_management import Auth0ManagementClient
+
+pytestmark = pytest.mark.anyio
+
+
+class StubAuth0:
+    """Token endpoint plus one user endpoint, answering with queued statuses"""
+
+    def __init__(self):
+        self.token_requests = 0
+        self.user_requests = []
+        self.responses = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            self.token_requests += 1
+            # Long enough for concurrent callers to pile up on the lock
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"access_token": f"token-{self.token_requests}", "expires_in": 3600})
+        self.user_requests.append(request.headers["Authorization"])
+        if self.responses:
+            return self.responses.pop(0)
+        return httpx.Response(200, json={})
+
+
+@pytest.fixture
+def stub():
+    return StubAuth0()
+
+
+@pytest.fixture
+async def make_client(stub):
+    clients = []
+
+    def make(**options) -> Auth0ManagementClient:
+        client = Auth0ManagementClient(
+            domain="tests.auth0.local",
+            client_id="id",
+            client_secret="secret",
+            backoff_base=0.01,
+            transport=httpx.MockTransport(stub.handler),
+            **options
+        )
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        await client.aclose()
+
+
+async def test_concurrent_callers_share_one_token_fetch(make_client, stub):
+    client = make_client()
+
+    tokens = await asyncio.gather(*(client.get_token() for _ in range(10)))
+
+    assert stub.token_requests == 1
+    assert set(tokens) == {"token-1"}
+
+
+async def test_rate_limited_call_is_retried(make_client, stub):
+    client = make_client()
+    stub.responses = [httpx.Response(429, headers={"Retry-After": "0"})]
+
+    assert await client.update_app_metadata("auth0|user", {"plan": "pro"}) is True
+    assert len(stub.user_requests) == 2
+
+
+async def test_rejected_token_is_refreshed_once(make_client, stub):
+    client = make_client()
+    stub.responses = [httpx.Response(401)]
+
+    response = await client.request("GET", "/api/v2/users/auth0%7Cuser")
+
+    assert response.status_code == 200
+    assert stub.token_requests == 2
+    assert stub.user_requests == ["Bearer token-1", "Bearer token-2"]
+
+
+async def test_retry_after_above_the_cap_is_returned_without_waiting(make_client, stub):
+    client = make_client(max_retry_delay=1)
+    stub.responses = [httpx.Response(429, headers={"Retry-After": "120"})]
+
+    response = await asyncio.wait_for(client.request("GET", "/api/v2/users/auth0%7Cuser"), timeout=1)
+
+    assert response.status_code == 429
+    assert len(stub.user_requests) == 1
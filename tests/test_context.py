@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.recipe import Recipe
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_context_bundles_pantry_expiring_and_plans(client, signer):
+    user_id = f"auth0|test-{uuid.uuid4().hex}"
+    headers = {"Authorization": f"Bearer {signer.token(user_id)}"}
+    soon = (datetime.utcnow() + timedelta(days=1, hours=1)).isoformat()
+    response = await client.post("/api/pantry/batch", headers=headers, json=[
+        {"name": "milk", "quantity": 1, "unit": "l", "category": "dairy", "storage_location": "fridge", "expires_at": soon},
+        {"name": "rice", "quantity": 2, "unit": "kg", "category": "grain", "storage_location": "pantry"},
+    ])
+    assert response.status_code == 201
+
+    with SessionLocal() as db:
+        recipe_id, plan_id = f"recipe-{uuid.uuid4().hex}", str(uuid.uuid4())
+        db.add(Recipe(
+            id=recipe_id, name="Rice pudding", cook_time=30, servings=2, calories=400,
+            ingredients=["1 cup rice", "2 cups milk"], main_ingredients=["rice"],
+            instructions=[], prep_complexity="quick"
+        ))
+        db.add(WeekPlan(id=plan_id, user_id=user_id, week_of=datetime(2026, 10, 12), shared_ingredients=[]))
+        db.add(MealPlan(id=str(uuid.uuid4()), week_plan_id=plan_id, recipe_id=recipe_id, day="Monday", meal_type="dinner"))
+        db.commit()
+
+    response = await client.get("/api/context", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["name"] for item in body["data"]["pantry"]] == ["milk", "rice"]
+    assert [(item["name"], item["expires_in_days"]) for item in body["data"]["expiring"]] == [("milk", 1)]
+    assert body["data"]["recent_plans"] == [
+        {"week_of": "2026-10-12", "meals": [{"day": "Monday", "meal_type": "dinner", "recipe": "Rice pudding"}]}
+    ]
+    assert "pantry: milk 1 l (1d); rice 2 kg" in body["text"]
+    assert "plan 2026-10-12: Mon Rice pudding" in body["text"]
+
+
+async def test_context_etag_changes_with_the_pantry(client, auth_headers):
+    first = await client.get("/api/context", headers=auth_headers)
+    assert first.status_code == 200
+    assert first.json()["data"]["pantry"] == []
+    etag = first.headers["ETag"]
+
+    cached = await client.get("/api/context", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await client.post("/api/pantry/", headers=auth_headers, json={
+        "name": "oats", "quantity": 1, "unit": "kg", "category": "grain", "storage_location": "pantry",
+    })
+    changed = await client.get("/api/context", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert [item["name"] for item in changed.json()["data"]["pantry"]] == ["oats"]
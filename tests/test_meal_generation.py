@@ -0,0 +1,18 @@
+import pytest
+
+from app.services import meal_generation
+from app.services.meal_generation import PlanDraft, plan_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_plan_without_meals_is_a_422_and_nothing_is_cached(client, auth_headers, monkeypatch):
+    # As if every recipe in the catalog were excluded
+    monkeypatch.setattr(meal_generation, "plan_week", lambda *args, **kwargs: PlanDraft())
+    cached = len(plan_cache)
+
+    response = await client.post("/api/meal-plans/generate", headers=auth_headers)
+
+    assert response.status_code == 422
+    assert len(plan_cache) == cached
+    assert (await client.get("/api/context", headers=auth_headers)).json()["data"]["recent_plans"] == []
@@ -0,0 +1,69 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_create_returns_items_in_request_order(client, auth_headers, add_pantry_items):
+    items = await add_pantry_items(["rice", "beans", "oats"])
+
+    assert [item["name"] for item in items] == ["rice", "beans", "oats"]
+    listed = (await client.get("/api/pantry/", headers=auth_headers)).json()
+    assert {item["id"] for item in listed} == {item["id"] for item in items}
+
+
+async def test_batch_size_is_limited(client, auth_headers):
+    response = await client.post("/api/pantry/batch", headers=auth_headers, json=[])
+    assert response.status_code == 422
+
+
+async def test_atomic_batch_update_with_unknown_id_changes_nothing(client, auth_headers, add_pantry_items):
+    [item] = await add_pantry_items(["rice"])
+
+    response = await client.patch("/api/pantry/batch", headers=auth_headers, json=[
+        {"id": item["id"], "quantity": 5},
+        {"id": "missing", "quantity": 5},
+    ])
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == [{"index": 1, "id": "missing", "detail": "Item not found"}]
+    [unchanged] = (await client.get("/api/pantry/", headers=auth_headers)).json()
+    assert unchanged["quantity"] == 1
+
+
+async def test_batch_update_duplicate_id_is_a_conflict(client, auth_headers, add_pantry_items):
+    [item] = await add_pantry_items(["rice"])
+
+    response = await client.patch("/api/pantry/batch", headers=auth_headers, json=[
+        {"id": item["id"], "quantity": 2},
+        {"id": item["id"], "quantity": 3},
+    ])
+
+    assert response.status_code == 409
+
+
+async def test_non_atomic_batch_update_applies_the_rest(client, auth_headers, add_pantry_items):
+    [item] = await add_pantry_items(["rice"])
+
+    response = await client.patch("/api/pantry/batch?atomic=false", headers=auth_headers, json=[
+        {"id": "missing", "quantity": 5},
+        {"id": item["id"], "quantity": 5},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [updated["quantity"] for updated in body["items"]] == [5]
+    assert [error["index"] for error in body["errors"]] == [0]
+
+
+async def test_atomic_batch_delete_with_unknown_id_deletes_nothing(client, auth_headers, add_pantry_items):
+    items = await add_pantry_items(["rice", "beans"])
+    ids = [item["id"] for item in items]
+
+    response = await client.request("DELETE", "/api/pantry/batch", headers=auth_headers, json=ids + ["missing"])
+    assert response.status_code == 404
+    assert len((await client.get("/api/pantry/", headers=auth_headers)).json()) == 2
+
+    response = await client.request("DELETE", "/api/pantry/batch", headers=auth_headers, json=ids)
+    assert response.status_code == 200
+    assert response.json()["deleted_ids"] == ids
+    assert (await client.get("/api/pantry/", headers=auth_headers)).json() == []
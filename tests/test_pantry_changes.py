@@ -0,0 +1,32 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_changes_reports_updates_and_deletions_since_cursor(client, auth_headers, add_pantry_items):
+    rice, beans, oats = await add_pantry_items(["rice", "beans", "oats"])
+
+    full = (await client.get("/api/pantry/changes", headers=auth_headers)).json()
+    assert full["reset"] is True
+    assert len(full["items"]) == 3
+
+    await client.put(f"/api/pantry/{rice['id']}", headers=auth_headers, json={"quantity": 3})
+    await client.delete(f"/api/pantry/{beans['id']}", headers=auth_headers)
+
+    delta = (await client.get("/api/pantry/changes", params={"since": full["cursor"]}, headers=auth_headers)).json()
+    assert delta["reset"] is False
+    assert delta["cursor"] > full["cursor"]
+    assert [(item["id"], item["quantity"]) for item in delta["items"]] == [(rice["id"], 3)]
+    assert delta["deleted_ids"] == [beans["id"]]
+
+    nothing = (await client.get("/api/pantry/changes", params={"since": delta["cursor"]}, headers=auth_headers)).json()
+    assert nothing == {"cursor": delta["cursor"], "reset": False, "items": [], "deleted_ids": []}
+
+
+async def test_changes_resets_a_cursor_from_the_future(client, auth_headers, add_pantry_items):
+    await add_pantry_items(["rice"])
+
+    response = (await client.get("/api/pantry/changes", params={"since": 10_000}, headers=auth_headers)).json()
+
+    assert response["reset"] is True
+    assert len(response["items"]) == 1
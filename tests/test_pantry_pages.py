@@ -0,0 +1,43 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_etag_answers_304_until_the_pantry_changes(client, auth_headers, add_pantry_items):
+    await add_pantry_items(["rice"])
+    first = await client.get("/api/pantry/", headers=auth_headers)
+    etag = first.headers["ETag"]
+
+    cached = await client.get("/api/pantry/", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    await add_pantry_items(["beans"])
+    changed = await client.get("/api/pantry/", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+async def test_keyset_pages_cover_the_pantry_once(client, auth_headers, add_pantry_items):
+    created = await add_pantry_items([f"item {n}" for n in range(7)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/pantry/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [item["id"] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 7
+    assert set(seen) == {item["id"] for item in created}
+
+
+async def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = await client.get("/api/pantry/", params={"limit": 3, "cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+from app.services.recipe_search import InMemorySearchIndex, SearchFilters
+
+# (id, name, cuisine, tags, main_ingredients, contains_mask)
+RECIPES = [
+    ("r1", "Chicken Curry", "Indian", ["spicy", "dinner"], ["chicken"], 0b00),
+    ("r2", "Thai Green Curry", "Thai", ["spicy"], ["chicken", "coconut"], 0b01),
+    ("r3", "Lentil Soup", "Indian", ["vegan", "soup"], ["lentils"], 0b00),
+    ("r4", "Curry Rice Bowl", "Japanese", ["dinner"], ["rice"], 0b10),
+    ("r5", "Pancakes", "American", ["breakfast", "curry"], ["flour"], 0b10),
+    ("r6", "Chicken Salad", "American", ["lunch"], ["chicken"], 0b00),
+]
+
+
+def _index() -> InMemorySearchIndex:
+    index = InMemorySearchIndex()
+    index.build(RECIPES)
+    return index
+
+
+def _ids(hits):
+    return [recipe_id for recipe_id, _ in hits]
+
+
+def test_name_matches_outrank_cuisine_and_tag_matches():
+    hits = _index().search(SearchFilters(q="indian curry"), limit=10, after=None)
+
+    ids = _ids(hits)
+    # name + cuisine beats name only, which beats cuisine only or tag only
+    assert ids[0] == "r1"
+    assert ids.index("r2") < ids.index("r3")
+    assert ids.index("r4") < ids.index("r5")
+    ranks = [rank for _, rank in hits]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+def test_misspelled_names_match_by_trigram():
+    hits = _index().search(SearchFilters(q="chiken cury"), limit=10, after=None)
+
+    assert _ids(hits)[0] == "r1"
+
+
+def test_unrelated_query_finds_nothing():
+    assert _index().search(SearchFilters(q="zzzz"), limit=10, after=None) == []
+
+
+def test_filters_apply_on_top_of_ranking():
+    index = _index()
+
+    assert _ids(index.search(SearchFilters(q="curry", cuisine="thai"), 10, None)) == ["r2"]
+    assert set(_ids(index.search(SearchFilters(tags=["spicy", "dinner"]), 10, None))) == {"r1"}
+    assert set(_ids(index.search(SearchFilters(ingredients=["rice", "lentils"]), 10, None))) == {"r3", "r4"}
+    assert set(_ids(index.search(SearchFilters(exclude_mask=0b10), 10, None))) == {"r1", "r2", "r3", "r6"}
+
+
+def test_ties_are_ordered_by_id():
+    hits = _index().search(SearchFilters(), limit=10, after=None)
+
+    assert _ids(hits) == ["r1", "r2", "r3", "r4", "r5", "r6"]
+
+
+def test_keyset_pages_follow_the_full_ranking():
+    index = _index()
+    for filters in (SearchFilters(q="chicken curry"), SearchFilters()):
+        everything = index.search(filters, limit=100, after=None)
+
+        pages, after = [], None
+        while True:
+            page = index.search(filters, limit=2, after=after)
+            if not page:
+                break
+            pages += page
+            last_id, last_rank = page[-1]
+            after = (last_rank, last_id)
+
+        assert pages == everything
@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.meal_plan import MealPlan, WeekPlan
+from app.models.recipe import Recipe
+from app.services.shopping import build_shopping_list
+
+
+def test_unquantified_lines_join_every_base_of_their_term():
+    to_buy, _ = build_shopping_list(
+        [("a", ["200 g flour"], 2), ("b", ["1 cup flour"], 2), ("c", ["flour"], 2)], []
+    )
+
+    assert [(item.unit, item.recipe_ids) for item in to_buy] == [("g", ["a", "c"]), ("ml", ["b", "c"])]
+
+
+@pytest.fixture
+def planned_recipe(signer):
+    """A user with a one-meal week plan; yields (headers, plan id, recipe id)"""
+    user_id = f"auth0|test-{uuid.uuid4().hex}"
+    recipe_id, plan_id = f"recipe-{uuid.uuid4().hex}", str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(Recipe(
+            id=recipe_id, name="Pancakes", cook_time=20, servings=2, calories=300,
+            ingredients=["200 g flour", "2 eggs"], main_ingredients=["flour"],
+            instructions=[], prep_complexity="quick"
+        ))
+        db.add(WeekPlan(id=plan_id, user_id=user_id, week_of=datetime(2026, 10, 12), shared_ingredients=[]))
+        db.add(MealPlan(id=str(uuid.uuid4()), week_plan_id=plan_id, recipe_id=recipe_id, day="Monday", meal_type="breakfast"))
+        db.commit()
+    return {"Authorization": f"Bearer {signer.token(user_id)}"}, plan_id, recipe_id
+
+
+def _to_buy(response) -> dict:
+    assert response.status_code == 200
+    return {item["name"]: item["to_buy"] for item in response.json()["items"]}
+
+
+@pytest.mark.anyio
+async def test_cached_list_is_rebuilt_after_a_recipe_edit(client, planned_recipe):
+    headers, plan_id, recipe_id = planned_recipe
+    assert _to_buy(await client.get(f"/api/shopping/{plan_id}", headers=headers))["flour"] == 200
+
+    with SessionLocal() as db:
+        recipe = db.get(Recipe, recipe_id)
+        recipe.ingredients = ["300 g flour", "2 eggs"]
+        recipe.updated_at = datetime.utcnow()
+        db.commit()
+
+    assert _to_buy(await client.get(f"/api/shopping/{plan_id}", headers=headers))["flour"] == 300
+
+
+@pytest.mark.anyio
+async def test_cached_list_is_rebuilt_once_a_pantry_item_expires(client, planned_recipe):
+    headers, plan_id, _ = planned_recipe
+    expires_at = datetime.utcnow() + timedelta(seconds=1)
+    await client.post("/api/pantry/", headers=headers, json={
+        "name": "flour", "quantity": 200, "unit": "g", "category": "baking",
+        "storage_location": "pantry", "expires_at": expires_at.isoformat(),
+    })
+    assert "flour" not in _to_buy(await client.get(f"/api/shopping/{plan_id}", headers=headers))
+
+    await asyncio.sleep((expires_at - datetime.utcnow()).total_seconds() + 0.1)
+
+    assert _to_buy(await client.get(f"/api/shopping/{plan_id}", headers=headers))["flour"] == 200
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.substitutions import substitution_graph
+
+
+def test_lines_are_parsed_and_keyed_by_normalized_ingredient():
+    found = substitution_graph.lookup_many(["2 cups flour", "1 cup milk"], pantry_terms=["milk"])
+
+    assert list(found) == ["flour"]
+    assert found["flour"].reason == "missing"
+    assert found["flour"].substitute is not None
+
+
+def test_normalized_terms_keep_their_leading_numbers():
+    terms = ["5 spice powder", "00 flour", "flour"]
+
+    found = substitution_graph.lookup_many(terms, pantry_terms=[], normalized=True)
+
+    assert set(found) == set(terms)
+    assert found["00 flour"].ingredient == "00 flour"
+
+
+def test_pantry_items_need_no_substitute():
+    found = substitution_graph.lookup_many(["flour", "butter"], pantry_terms=["flour"], normalized=True)
+
+    assert list(found) == ["butter"]
+
+
+@pytest.mark.anyio
+async def test_recipe_substitutions_with_numbered_ingredients(client, auth_headers):
+    from app.database import SessionLocal
+    from app.models.recipe import Recipe
+
+    with SessionLocal() as db:
+        db.add(Recipe(
+            id="five-spice-noodles", name="Five spice noodles", cook_time=20, servings=2, calories=500,
+            ingredients=["1 tsp 5 spice powder", "200 g 00 flour", "2 eggs"],
+            main_ingredients=["00 flour"], instructions=[], prep_complexity="quick"
+        ))
+        db.commit()
+
+    response = await client.get("/api/recipes/five-spice-noodles/substitutions", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert {"5 spice powder", "00 flour"} <= {item["ingredient"] for item in response.json()}
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.schemas.telemetry import TelemetryEventIn
+from app.services.telemetry import BufferFull, TelemetryBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+def _events(event_type: str, count: int):
+    return [TelemetryEventIn(event_type=event_type) for _ in range(count)]
+
+
+@pytest.fixture
+async def stalled_buffer():
+    """A buffer of 5 whose writer blocks until `release` is set"""
+    release = asyncio.Event()
+    written = []
+
+    async def writer(rows):
+        await release.wait()
+        written.extend(rows)
+
+    buffer = TelemetryBuffer(max_size=5, batch_size=1, flush_interval=0.01, enqueue_timeout=0.05, writer=writer)
+    await buffer.start()
+    yield buffer, release, written
+    release.set()
+    await buffer.stop()
+
+
+async def test_batch_that_does_not_fit_is_rejected_whole(stalled_buffer):
+    buffer, release, written = stalled_buffer
+    # The flusher takes the first event and stalls on it; four more leave
+    # room for one, so a batch of two must not be half admitted
+    await buffer.enqueue("user", _events("first", 1))
+    await asyncio.sleep(0.02)
+    await buffer.enqueue("user", _events("fill", 4))
+    assert buffer.stats()["queued"] == 4
+
+    with pytest.raises(BufferFull):
+        await buffer.enqueue("user", _events("overflow", 2))
+
+    assert buffer.stats()["queued"] == 4
+    assert (buffer.accepted, buffer.rejected) == (5, 2)
+    release.set()
+    await buffer.stop()
+    assert [row["event_type"] for row in written] == ["first"] + ["fill"] * 4
+
+
+async def test_batch_larger_than_the_buffer_is_rejected_at_once(stalled_buffer):
+    buffer, _, _ = stalled_buffer
+
+    with pytest.raises(BufferFull):
+        await asyncio.wait_for(buffer.enqueue("user", _events("huge", 6)), timeout=0.01)
+
+    assert buffer.stats()["queued"] == 0
+    assert buffer.rejected == 6